@@ -0,0 +1,294 @@
+"""
+Fake Anthropic Server
+
+A local stand-in for the parts of the Messages API the Nautee tools use:
+messages (plain and streaming), count_tokens and Message Batches. Latency,
+output throughput and 429/529 error injection are configurable, and request and
+token counters are served at GET /_stats so benchmarks can measure each run.
+
+Point a tool at it with ANTHROPIC_BASE_URL=http://127.0.0.1:<port>.
+"""
+
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+class FakeConfig:
+    """
+    Behaviour knobs for the fake server.
+
+    Args:
+        latency (float): Seconds before the first token.
+        tokens_per_sec (float): Output throughput used to pace responses.
+        output_tokens (int): Tokens generated per response.
+        error_rate (float): Fraction of message requests answered with 429 or 529.
+        retry_after (float): Value of the retry-after header on injected 429s.
+        batch_seconds (float): How long a message batch stays in progress.
+        batch_errors (set): custom_ids whose batch results come back as errored.
+    """
+
+    def __init__(self, latency: float = 0.05, tokens_per_sec: float = 2000, output_tokens: int = 200,
+                 error_rate: float = 0.0, retry_after: float = 1, batch_seconds: float = 1,
+                 batch_errors: set = None):
+        self.latency = latency
+        self.tokens_per_sec = tokens_per_sec
+        self.output_tokens = output_tokens
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.batch_seconds = batch_seconds
+        self.batch_errors = set(batch_errors or ())
+
+class FakeState:
+    """
+    Counters and batch jobs shared by all handler threads.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.batches = {}
+        self.stats = {
+            "requests": 0, "messages": 0, "streams": 0, "count_tokens": 0, "batch_requests": 0,
+            "throttled": 0, "overloaded": 0, "input_tokens": 0, "output_tokens": 0,
+        }
+
+    def bump(self, **counts):
+        with self.lock:
+            for name, value in counts.items():
+                self.stats[name] += value
+
+def prompt_text(payload: dict) -> str:
+    """
+    Flattens the system prompt and messages of a request into one string.
+    """
+    parts = []
+    system = payload.get("system") or ""
+    blocks = system if isinstance(system, list) else [{"text": system}]
+    parts.extend(block.get("text", "") for block in blocks)
+    for message in payload.get("messages", []):
+        content = message.get("content", "")
+        if isinstance(content, list):
+            parts.extend(block.get("text", "") for block in content if isinstance(block, dict))
+        else:
+            parts.append(content)
+    return "\n".join(parts)
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+def fake_message(payload: dict, config: FakeConfig) -> dict:
+    """
+    Builds a Messages API response for a request.
+    """
+    prompt = prompt_text(payload)
+    output_tokens = min(config.output_tokens, payload.get("max_tokens", config.output_tokens))
+    body = " ".join(["lorem"] * max(0, output_tokens - 8))
+    text = f"## Review\n\nReceived {len(prompt)} characters.\n\n{body}\n"
+    return {
+        "id": f"msg_{uuid.uuid4().hex[:24]}",
+        "type": "message",
+        "role": "assistant",
+        "model": payload.get("model", "fake"),
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {
+            "input_tokens": estimate_tokens(prompt),
+            "output_tokens": output_tokens,
+            "cache_read_input_tokens": 0,
+            "cache_creation_input_tokens": 0,
+        },
+    }
+
+def make_handler(config: FakeConfig, state: FakeState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def send_json(self, status: int, payload: dict, headers: dict = None):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def read_json(self) -> dict:
+            length = int(self.headers.get("content-length", 0))
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def batch_status(self, batch_id: str) -> dict:
+            job = state.batches[batch_id]
+            ended = time.time() - job["created"] >= config.batch_seconds
+            total = len(job["requests"])
+            errored = sum(1 for request in job["requests"] if request["custom_id"] in config.batch_errors)
+            return {
+                "id": batch_id,
+                "type": "message_batch",
+                "processing_status": "ended" if ended else "in_progress",
+                "request_counts": {
+                    "processing": 0 if ended else total,
+                    "succeeded": total - errored if ended else 0,
+                    "errored": errored if ended else 0,
+                    "canceled": 0, "expired": 0,
+                },
+                "created_at": "2025-01-01T00:00:00Z",
+                "expires_at": "2025-01-02T00:00:00Z",
+                "ended_at": "2025-01-01T00:00:01Z" if ended else None,
+                "archived_at": None,
+                "cancel_initiated_at": None,
+                "results_url": f"http://{self.headers['host']}/v1/messages/batches/{batch_id}/results" if ended else None,
+            }
+
+        def do_GET(self):
+            path = self.path.split("?")[0].rstrip("/")
+            if path == "/_stats":
+                with state.lock:
+                    return self.send_json(200, dict(state.stats))
+            parts = path.strip("/").split("/")
+            if parts[:3] == ["v1", "messages", "batches"] and len(parts) >= 4 and parts[3] in state.batches:
+                if len(parts) == 5 and parts[4] == "results":
+                    lines = []
+                    for request in state.batches[parts[3]]["requests"]:
+                        if request["custom_id"] in config.batch_errors:
+                            lines.append(json.dumps({
+                                "custom_id": request["custom_id"],
+                                "result": {"type": "errored", "error": {
+                                    "type": "error", "error": {"type": "api_error", "message": "Injected error"}}},
+                            }))
+                            continue
+                        message = fake_message(request["params"], config)
+                        state.bump(input_tokens=message["usage"]["input_tokens"],
+                                   output_tokens=message["usage"]["output_tokens"])
+                        lines.append(json.dumps({
+                            "custom_id": request["custom_id"],
+                            "result": {"type": "succeeded", "message": message},
+                        }))
+                    body = "\n".join(lines).encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("content-type", "application/binary")
+                    self.send_header("content-length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                return self.send_json(200, self.batch_status(parts[3]))
+            self.send_json(404, {"type": "error", "error": {"type": "not_found_error", "message": path}})
+
+        def do_POST(self):
+            path = self.path.split("?")[0].rstrip("/")
+            payload = self.read_json()
+            state.bump(requests=1)
+
+            if path == "/v1/messages/count_tokens":
+                state.bump(count_tokens=1)
+                return self.send_json(200, {"input_tokens": estimate_tokens(prompt_text(payload))})
+
+            if path == "/v1/messages/batches":
+                batch_id = f"msgbatch_{uuid.uuid4().hex[:24]}"
+                with state.lock:
+                    state.batches[batch_id] = {"requests": payload.get("requests", []), "created": time.time()}
+                state.bump(batch_requests=len(payload.get("requests", [])))
+                return self.send_json(200, self.batch_status(batch_id))
+
+            if path != "/v1/messages":
+                return self.send_json(404, {"type": "error", "error": {"type": "not_found_error", "message": path}})
+
+            if config.error_rate and random.random() < config.error_rate:
+                if random.random() < 0.5:
+                    state.bump(throttled=1)
+                    return self.send_json(
+                        429, {"type": "error", "error": {"type": "rate_limit_error", "message": "Injected 429"}},
+                        headers={"retry-after": str(config.retry_after)},
+                    )
+                state.bump(overloaded=1)
+                return self.send_json(529, {"type": "error", "error": {"type": "overloaded_error", "message": "Injected 529"}})
+
+            message = fake_message(payload, config)
+            usage = message["usage"]
+            state.bump(messages=1, input_tokens=usage["input_tokens"], output_tokens=usage["output_tokens"])
+            time.sleep(config.latency)
+            generation = usage["output_tokens"] / config.tokens_per_sec if config.tokens_per_sec else 0
+
+            if not payload.get("stream"):
+                time.sleep(generation)
+                return self.send_json(200, message)
+
+            state.bump(streams=1)
+            self.stream(message, generation)
+
+        def stream(self, message: dict, generation: float):
+            self.send_response(200)
+            self.send_header("content-type", "text/event-stream")
+            self.send_header("connection", "close")
+            self.end_headers()
+            self.close_connection = True
+
+            def event(name: str, data: dict):
+                self.wfile.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            text = message["content"][0]["text"]
+            chunks = [text[i:i + 40] for i in range(0, len(text), 40)] or [""]
+            event("message_start", {"type": "message_start", "message": dict(
+                message, content=[], stop_reason=None, usage=dict(message["usage"], output_tokens=1))})
+            event("content_block_start", {"type": "content_block_start", "index": 0,
+                                          "content_block": {"type": "text", "text": ""}})
+            for chunk in chunks:
+                time.sleep(generation / len(chunks))
+                event("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                              "delta": {"type": "text_delta", "text": chunk}})
+            event("content_block_stop", {"type": "content_block_stop", "index": 0})
+            event("message_delta", {"type": "message_delta",
+                                    "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                    "usage": {"output_tokens": message["usage"]["output_tokens"]}})
+            event("message_stop", {"type": "message_stop"})
+
+    return Handler
+
+def start_server(config: FakeConfig = None, port: int = 0):
+    """
+    Starts the fake server on a background thread.
+
+    Args:
+        config (FakeConfig): Behaviour knobs (defaults if omitted).
+        port (int): Port to bind on 127.0.0.1; 0 picks a free one.
+
+    Returns:
+        tuple: (server, base_url). Call server.shutdown() when done.
+    """
+    state = FakeState()
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(config or FakeConfig(), state))
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the Anthropic Messages API.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds before the first token.")
+    parser.add_argument("--tokens-per-sec", type=float, default=2000, help="Output token throughput.")
+    parser.add_argument("--output-tokens", type=int, default=200, help="Tokens generated per response.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429/529.")
+    parser.add_argument("--retry-after", type=float, default=1, help="retry-after seconds on injected 429s.")
+    parser.add_argument("--batch-seconds", type=float, default=1, help="Time a message batch stays in progress.")
+    args = parser.parse_args()
+
+    config = FakeConfig(args.latency, args.tokens_per_sec, args.output_tokens,
+                        args.error_rate, args.retry_after, args.batch_seconds)
+    server, url = start_server(config, args.port)
+    print(f"🧪 Fake Anthropic API listening on {url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Nautee Benchmark Runner
+
+Generates synthetic repos, starts the fake Anthropic server and runs the tools
+against them, reporting wall time, API requests, tokens, peak RSS and file
+discovery time as JSON so runs can be compared between commits.
+
+Example:
+    python bench/run_bench.py --sizes 10,1000 --output bench_output.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+TOOLS_DIR = os.path.join(REPO_ROOT, "tools")
+sys.path.insert(0, TOOLS_DIR)
+
+from fake_anthropic import FakeConfig, start_server
+from synth_repo import generate_repo
+from discovery import discover_files
+
+# name -> (script, args, runs inside the repo). Tools that read git history run in the
+# repo itself; the others run in a scratch directory so their output stays out of the repo.
+TOOLS = {
+    "autodoc": ("autodoc.py", ["{repo}"], False),
+    "folder_review_batched": ("claude_folder_review_batched.py", ["{repo}"], False),
+    "claude_review": ("claude_review.py", [], True),
+    "changelog": ("changelog.py", [], True),
+}
+
+DISCOVERY_EXTS = (".py", ".js", ".ts", ".tsx", ".jsx", ".html", ".css", ".json", ".go", ".java", ".yaml", ".yml")
+
+def server_stats(server) -> dict:
+    with server.state.lock:
+        return dict(server.state.stats)
+
+def run_tool(name: str, repo: str, scratch: str, base_url: str, server, extra_args: list) -> dict:
+    """
+    Runs one tool as a subprocess and measures it.
+
+    Args:
+        name (str): Key in TOOLS.
+        repo (str): Synthetic repo path.
+        scratch (str): Working directory for tools that do not run in the repo.
+        base_url (str): Fake server URL.
+        server: Fake server (for request/token counters).
+        extra_args (list): Extra command-line arguments for the tool.
+
+    Returns:
+        dict: Measurements for this run.
+    """
+    script, args, in_repo = TOOLS[name]
+    cwd = repo if in_repo else scratch
+    env = dict(
+        os.environ,
+        ANTHROPIC_BASE_URL=base_url,
+        ANTHROPIC_API_KEY="bench",
+        NAUTEE_CACHE_PATH=os.path.join(scratch, "cache.sqlite3"),
+        PYTHONWARNINGS="ignore",
+    )
+    command = [sys.executable, os.path.join(TOOLS_DIR, script)] + [a.format(repo=repo) for a in args] + extra_args
+    log_path = os.path.join(scratch, f"{name}.log")
+
+    before = server_stats(server)
+    start = time.perf_counter()
+    with open(log_path, "a") as log:
+        proc = subprocess.Popen(command, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+        _, status, rusage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - start
+    after = server_stats(server)
+
+    result = {"tool": name, "wall_s": round(wall, 3), "exit_code": os.waitstatus_to_exitcode(status),
+              "peak_rss_mb": round(rusage.ru_maxrss / 1024, 1)}
+    for key in ("requests", "messages", "streams", "count_tokens", "batch_requests",
+                "throttled", "overloaded", "input_tokens", "output_tokens"):
+        result[key] = after[key] - before[key]
+    return result
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "-C", REPO_ROOT, "rev-parse", "HEAD"]).decode().strip()
+    except (subprocess.CalledProcessError, OSError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Nautee tools against a fake Anthropic API.")
+    parser.add_argument("--sizes", default="10,1000,10000", help="Comma-separated synthetic repo sizes (files).")
+    parser.add_argument("--tools", default=",".join(TOOLS), help="Comma-separated tools to run.")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per tool; later runs show warm-cache behaviour.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake server time to first token (s).")
+    parser.add_argument("--tokens-per-sec", type=float, default=2000, help="Fake server output throughput.")
+    parser.add_argument("--output-tokens", type=int, default=200, help="Tokens per fake response.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429/529.")
+    parser.add_argument("--tool-args", default="", help="Extra arguments passed to every tool.")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated repos and logs.")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+    args = parser.parse_args()
+
+    config = FakeConfig(latency=args.latency, tokens_per_sec=args.tokens_per_sec,
+                        output_tokens=args.output_tokens, error_rate=args.error_rate)
+    server, base_url = start_server(config)
+    workdir = tempfile.mkdtemp(prefix="nautee-bench-")
+    report = {"commit": git_commit(), "config": vars(args), "results": []}
+
+    try:
+        for size in [int(s) for s in args.sizes.split(",") if s]:
+            repo = os.path.join(workdir, f"repo_{size}")
+            scratch = os.path.join(workdir, f"scratch_{size}")
+            os.makedirs(scratch, exist_ok=True)
+            print(f"🏗️ Generating synthetic repo with {size} files...", file=sys.stderr)
+            generate_repo(repo, size)
+
+            start = time.perf_counter()
+            found = discover_files(repo, DISCOVERY_EXTS)
+            discovery = {"tool": "discovery", "size": size, "files": len(found),
+                         "wall_s": round(time.perf_counter() - start, 3)}
+            report["results"].append(discovery)
+
+            for name in [t for t in args.tools.split(",") if t]:
+                for run in range(1, args.repeat + 1):
+                    print(f"⏱️ {name} on {size} files (run {run})...", file=sys.stderr)
+                    result = run_tool(name, repo, scratch, base_url, server, args.tool_args.split())
+                    result.update(size=size, run=run)
+                    report["results"].append(result)
+    finally:
+        server.shutdown()
+        if args.keep:
+            print(f"📁 Kept benchmark files in {workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"✅ Benchmark report written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
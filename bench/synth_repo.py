@@ -0,0 +1,128 @@
+"""
+Synthetic Repo Generator
+
+Creates throwaway git repositories of a given size for benchmarking: nested
+Python packages with classes and functions, some JavaScript, a README, a
+tagged history for the changelog and a final commit that touches a handful
+of files for the diff review.
+"""
+
+import os
+import random
+import argparse
+import subprocess
+
+PY_TEMPLATE = '''"""
+Module {name}: synthetic code for benchmarking.
+"""
+
+import os
+from typing import List
+
+CONSTANT_{idx} = {idx}
+
+class {cls}:
+    """Keeps a list of values and summarizes them."""
+
+    def __init__(self, values: List[int]):
+        self.values = values
+
+    def total(self) -> int:
+        return sum(self.values) + CONSTANT_{idx}
+
+    def describe(self) -> str:
+        return f"{cls} with {{len(self.values)}} values in {{os.getcwd()}}"
+
+{functions}
+'''
+
+FUNC_TEMPLATE = '''def helper_{idx}_{n}(items):
+    """Filters and scales items."""
+    result = []
+    for item in items:
+        if item % {mod} == 0:
+            result.append(item * {n})
+    return result
+'''
+
+JS_TEMPLATE = '''// Synthetic component {idx}
+export function render{idx}(props) {{
+  const items = props.items || [];
+  return items.filter((x) => x % {mod} === 0).map((x) => `<li>${{x}}</li>`).join("");
+}}
+'''
+
+def git(repo: str, *args: str):
+    subprocess.check_call(
+        ["git", "-C", repo, "-c", "user.name=bench", "-c", "user.email=bench@example.com", *args],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+def file_path(repo: str, idx: int) -> str:
+    """
+    Places file idx in a tree roughly 10 files wide per directory.
+    """
+    package = f"pkg_{idx // 100:03d}/sub_{(idx // 10) % 10}"
+    ext = ".js" if idx % 5 == 4 else ".py"
+    return os.path.join(repo, "src", package, f"mod_{idx:05d}{ext}")
+
+def write_file(repo: str, idx: int, rng: random.Random, revision: int = 0):
+    path = file_path(repo, idx)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    mod = rng.randint(2, 9) + revision
+    if path.endswith(".js"):
+        content = JS_TEMPLATE.format(idx=idx, mod=mod)
+    else:
+        functions = "\n".join(FUNC_TEMPLATE.format(idx=idx, n=n, mod=mod) for n in range(rng.randint(2, 6)))
+        content = PY_TEMPLATE.format(name=idx, idx=idx, cls=f"Widget{idx}", functions=functions)
+    with open(path, "w") as f:
+        f.write(content)
+
+def generate_repo(repo: str, files: int, releases: int = 3, seed: int = 0) -> str:
+    """
+    Generates a synthetic git repo.
+
+    Args:
+        repo (str): Directory to create.
+        files (int): Number of source files.
+        releases (int): Number of tagged releases in the history.
+        seed (int): Random seed, so the same size always yields the same repo.
+
+    Returns:
+        str: The repo path.
+    """
+    rng = random.Random(seed)
+    os.makedirs(repo, exist_ok=True)
+    git(repo, "init", "-q")
+    with open(os.path.join(repo, "README.md"), "w") as f:
+        f.write(f"# Synthetic repo\n\n{files} generated source files for benchmarking Nautee.\n")
+
+    per_release = max(1, files // releases)
+    for release in range(releases):
+        written = files if release == releases - 1 else (release + 1) * per_release
+        for idx in range(release * per_release, written):
+            write_file(repo, idx, rng)
+        git(repo, "add", "-A")
+        git(repo, "commit", "-q", "-m", f"Add modules for release {release + 1}")
+        for n in range(3):
+            write_file(repo, rng.randrange(written), rng, revision=release + n + 1)
+            git(repo, "commit", "-q", "--allow-empty", "-am", f"Tweak helpers ({release + 1}.{n})")
+        git(repo, "tag", f"v0.{release + 1}.0")
+
+    # One more commit so `git diff HEAD^` has something to review.
+    for _ in range(min(files, 5)):
+        write_file(repo, rng.randrange(files), rng, revision=99)
+    git(repo, "commit", "-q", "--allow-empty", "-am", "Refactor helpers after release")
+    return repo
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic git repo for benchmarks.")
+    parser.add_argument("path", help="Directory to create.")
+    parser.add_argument("--files", type=int, default=100, help="Number of source files.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate_repo(args.path, args.files, seed=args.seed)
+    print(f"✅ Generated {args.files} files in {args.path}")
+
+if __name__ == "__main__":
+    main()
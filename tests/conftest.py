@@ -0,0 +1,54 @@
+"""
+Shared fixtures: the tools and the fake Messages API are imported from their folders,
+and every test runs in its own working directory with a fresh scheduler.
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+import llm  # noqa: E402
+from ratelimit import Scheduler  # noqa: E402
+from fake_anthropic import FakeConfig, start_server  # noqa: E402
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """
+    Runs each test in an empty folder, with no ledger file and no .env settings leaking in.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("NAUTEE_LEDGER", "off")
+    monkeypatch.setenv("NAUTEE_CACHE_PATH", str(tmp_path / ".nautee" / "cache.sqlite3"))
+    monkeypatch.delenv("NAUTEE_NO_CACHE", raising=False)
+    monkeypatch.delenv("NAUTEE_RPM", raising=False)
+    monkeypatch.delenv("NAUTEE_TPM", raising=False)
+    llm.set_scheduler(Scheduler(max_concurrency=4, max_retries=2, base_delay=0.01, max_delay=0.05))
+    yield tmp_path
+    llm.set_scheduler(None)
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    """
+    Starts the fake Messages API and points the Anthropic client at it.
+
+    Returns:
+        callable: start(**config) -> server; server.state.stats counts what it received.
+    """
+    servers = []
+
+    def start(**config):
+        server, url = start_server(FakeConfig(**{"latency": 0, "batch_seconds": 0.2, **config}))
+        servers.append(server)
+        monkeypatch.setenv("ANTHROPIC_BASE_URL", url)
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+        monkeypatch.setenv("ANTHROPIC_MODEL", "claude-test")
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
@@ -0,0 +1,36 @@
+"""
+autodoc against the fake Messages API.
+"""
+
+import os
+import threading
+
+import autodoc
+
+def write(rel_path: str, text: str):
+    os.makedirs(os.path.dirname(rel_path), exist_ok=True)
+    with open(rel_path, "w") as f:
+        f.write(text)
+
+def test_first_file_that_calls_claude_runs_alone(fake_api, monkeypatch):
+    server = fake_api()
+    for name in ("a", "b", "c"):
+        write(f"proj/{name}.py", f"def {name}():\n    return 1\n")
+    assert autodoc.main(["proj"]) == 0
+    calls = server.state.stats["messages"]
+
+    write("proj/c.py", "def c():\n    return 2\n")
+    write("proj/d.py", "def d():\n    return 3\n")
+    alone = []
+    document_file = autodoc.DocRun.document_file
+
+    def recording(run, path):
+        if threading.current_thread() is threading.main_thread():
+            alone.append(os.path.basename(path))
+        return document_file(run, path)
+
+    monkeypatch.setattr(autodoc.DocRun, "document_file", recording)
+    assert autodoc.main(["proj"]) == 0
+
+    assert alone == ["c.py"]
+    assert server.state.stats["messages"] == calls + 2
@@ -0,0 +1,78 @@
+"""
+Per-release changelog summaries against a local tagged repo and the fake Messages API.
+"""
+
+import json
+import subprocess
+
+import changelog
+
+def git(*args) -> str:
+    return subprocess.run(["git", *args], check=True, capture_output=True, text=True).stdout.strip()
+
+def make_tagged_repo(releases: dict):
+    """
+    Creates a repo in the working directory with `count` empty commits before each tag.
+    """
+    git("init", "-q")
+    for tag, count in releases.items():
+        for i in range(count):
+            git("-c", "user.name=Test", "-c", "user.email=test@example.com",
+                "commit", "-q", "--allow-empty", "-m", f"{tag} change {i}")
+        git("tag", tag)
+
+def load_manifest() -> dict:
+    with open(changelog.MANIFEST_PATH) as f:
+        return {entry["tag"]: entry for entry in json.load(f)["releases"].values()}
+
+def test_records_streamed_commits_per_release(fake_api):
+    fake_api()
+    make_tagged_repo({"v0.1": 7, "v0.2": 12})
+
+    assert changelog.main(["--all-tags", "--chunk-commits", "5"]) == 0
+
+    manifest = load_manifest()
+    assert manifest["v0.1"]["commits"] == 7
+    assert manifest["v0.2"]["commits"] == 12
+    with open(changelog.OUTPUT_PATH) as f:
+        text = f.read()
+    assert "## v0.2" in text and "## v0.1" in text
+
+def test_failed_release_keeps_the_others(fake_api, monkeypatch):
+    server = fake_api()
+    make_tagged_repo({"v0.1": 3, "v0.2": 3, "v0.3": 3})
+    summarize = changelog.summarize
+
+    def failing(client, cache, model, item, prompt):
+        if item.startswith("v0.2#"):
+            raise RuntimeError("injected")
+        return summarize(client, cache, model, item, prompt)
+
+    monkeypatch.setattr(changelog, "summarize", failing)
+    assert changelog.main(["--all-tags"]) == 1
+    assert set(load_manifest()) == {"v0.1", "v0.3"}
+
+    monkeypatch.setattr(changelog, "summarize", summarize)
+    calls = server.state.stats["messages"]
+    assert changelog.main(["--all-tags"]) == 0
+    assert set(load_manifest()) == {"v0.1", "v0.2", "v0.3"}
+    assert server.state.stats["messages"] == calls + 1
+
+def test_model_or_prompt_change_regenerates_notes(fake_api, monkeypatch):
+    server = fake_api()
+    make_tagged_repo({"v0.1": 3, "v0.2": 3})
+    assert changelog.main(["--all-tags"]) == 0
+    calls = server.state.stats["messages"]
+
+    assert changelog.main(["--all-tags"]) == 0
+    assert server.state.stats["messages"] == calls
+
+    monkeypatch.setenv("ANTHROPIC_MODEL", "claude-test-2")
+    assert changelog.main(["--all-tags"]) == 0
+    assert server.state.stats["messages"] == calls + 2
+    assert {entry["model"] for entry in load_manifest().values()} == {"claude-test-2"}
+
+    format_prompt = changelog.format_prompt
+    monkeypatch.setattr(changelog, "format_prompt", lambda git_log: "Briefly. " + format_prompt(git_log))
+    assert changelog.main(["--all-tags"]) == 0
+    assert server.state.stats["messages"] == calls + 4
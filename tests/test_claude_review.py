@@ -0,0 +1,39 @@
+"""
+Diff sharding for claude_review.
+"""
+
+from claude_review import parse_diff, shard_diff
+from tokens import TokenCounter
+
+def make_diff(path: str, lines: list) -> str:
+    body = "".join(f"+{line}\n" for line in lines)
+    return (f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n"
+            f"@@ -0,0 +1,{len(lines)} @@\n{body}")
+
+def shard_tokens(shards: list, counter: TokenCounter) -> list:
+    return [counter.count(text) for shard in shards for _, text in shard]
+
+def test_single_long_line_is_cut_to_the_budget():
+    counter = TokenCounter()
+    diff = make_diff("data.json", ["x" * 200000])
+
+    shards = shard_diff(parse_diff(diff), 2000, counter)
+
+    assert all(tokens <= 2000 for tokens in shard_tokens(shards, counter))
+    text = shards[0][0][1]
+    assert text.startswith("diff --git a/data.json") and "+xxx" in text
+    assert "hunk truncated" in text
+
+def test_long_line_among_short_ones_fits_the_budget():
+    counter = TokenCounter()
+    diff = make_diff("a.js", ["y" * 40000] + ["z = 1"] * 200)
+
+    shards = shard_diff(parse_diff(diff), 1500, counter)
+
+    assert all(tokens <= 1500 for tokens in shard_tokens(shards, counter))
+
+def test_small_diff_is_one_untouched_shard():
+    counter = TokenCounter()
+    diff = make_diff("a.py", ["x = 1", "y = 2"])
+
+    assert shard_diff(parse_diff(diff), 2000, counter) == [[("a.py", diff)]]
@@ -0,0 +1,23 @@
+"""
+NAUTEE_DEDUP_THRESHOLD parsing.
+"""
+
+import pytest
+
+from dedup import DEFAULT_THRESHOLD, dedup_threshold
+
+@pytest.mark.parametrize("value, expected", [
+    ("0.9", 0.9),
+    ("1", 1.0),
+    ("off", None),
+    ("0", None),
+])
+def test_valid_thresholds(monkeypatch, value, expected):
+    monkeypatch.setenv("NAUTEE_DEDUP_THRESHOLD", value)
+    assert dedup_threshold() == expected
+
+@pytest.mark.parametrize("value", ["high", "1.5", "-0.2", "nan"])
+def test_invalid_thresholds_fall_back_to_the_default(monkeypatch, capsys, value):
+    monkeypatch.setenv("NAUTEE_DEDUP_THRESHOLD", value)
+    assert dedup_threshold() == DEFAULT_THRESHOLD
+    assert "⚠️ Ignoring NAUTEE_DEDUP_THRESHOLD" in capsys.readouterr().out
@@ -0,0 +1,35 @@
+"""
+File discovery in git checkouts and plain folders.
+"""
+
+import os
+import subprocess
+
+from discovery import discover_files
+
+def git(*args):
+    subprocess.run(["git", *args], check=True, capture_output=True)
+
+def write(rel_path: str, text: str = "x = 1\n"):
+    os.makedirs(os.path.dirname(rel_path) or ".", exist_ok=True)
+    with open(rel_path, "w") as f:
+        f.write(text)
+
+def found(root: str = ".", **kwargs) -> list:
+    return sorted(os.path.relpath(path, root) for path in discover_files(root, (".py",), **kwargs))
+
+def test_tracked_files_in_pruned_dirs_are_kept(workdir):
+    write("app.py")
+    write("build/lib/core.py")
+    git("init", "-q")
+    git("add", ".")
+    write("build/out/generated.py")
+    write("site/page.py")
+
+    assert found() == ["app.py", "build/lib/core.py"]
+
+def test_walk_prunes_build_dirs_without_git(workdir):
+    write("app.py")
+    write("build/lib/core.py")
+
+    assert found(use_git=False) == ["app.py"]
@@ -0,0 +1,48 @@
+"""
+Import graph and dependency notes for --batching imports.
+"""
+
+from imports import import_graph, dependencies_note
+from tokens import TokenCounter
+
+def make_batch(modules: int, packages: int) -> tuple:
+    edges = {"main.py": {f"pkg/mod_{i:03d}.py" for i in range(modules)}}
+    external = {"main.py": {f"package_{i:03d}" for i in range(packages)}}
+    batch_of = {f"pkg/mod_{i:03d}.py": 2 for i in range(modules)}
+    return ["main.py"], edges, external, batch_of
+
+def test_caps_packages_like_modules():
+    note = dependencies_note(*make_batch(3, 50), limit=20)
+
+    assert "package_019" in note and "package_020" not in note
+    assert "and 30 more" in note
+
+def test_note_is_trimmed_to_its_token_cap():
+    counter = TokenCounter()
+    full = dependencies_note(*make_batch(40, 40))
+
+    for cap in (counter.count(full), 200, 60):
+        note = dependencies_note(*make_batch(40, 40), counter=counter, max_tokens=cap)
+        assert note and counter.count(note) <= cap
+    assert "40 project modules" in dependencies_note(*make_batch(40, 40), counter=counter, max_tokens=60)
+    assert dependencies_note(*make_batch(40, 40), counter=counter, max_tokens=5) == ""
+
+def test_self_contained_batch_has_no_note():
+    assert dependencies_note(["a.py"], {"a.py": set()}, {"a.py": set()}, {}) == ""
+
+def test_stdlib_and_ambiguous_names_are_not_project_edges():
+    sources = [
+        ("app/main.py", "import json\nimport logging\nimport helpers\nimport config\nimport yaml\n"),
+        ("app/helpers.py", ""),
+        ("app/util/logging.py", ""),
+        ("other/json.py", ""),
+        ("a/config.py", ""),
+        ("b/config.py", ""),
+        ("src/pkg/core.py", "from pkg import models\n"),
+        ("src/pkg/models.py", ""),
+    ]
+    edges, external = import_graph(sources)
+
+    assert edges["app/main.py"] == {"app/helpers.py"}
+    assert external["app/main.py"] == {"yaml"}
+    assert edges["src/pkg/core.py"] == {"src/pkg/models.py"}
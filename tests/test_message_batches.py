@@ -0,0 +1,86 @@
+"""
+Message Batches mode (llm.complete_batch and --submit-batch) against the fake Messages API.
+"""
+
+import os
+import random
+
+import claude_folder_review_batched
+from llm import complete_batch, make_client
+from llm_cache import open_cache
+
+def request(prompt: str) -> dict:
+    return {"model": "claude-test", "max_tokens": 100, "messages": [{"role": "user", "content": prompt}]}
+
+def write_sources(folder, count: int, lines: int = 400):
+    """
+    Writes distinct Python files large enough that the folder needs several batches.
+    """
+    rng = random.Random(7)
+    os.makedirs(folder, exist_ok=True)
+    for i in range(count):
+        body = "\n".join(f"def f{j}_{rng.randrange(10**9)}(x):\n    return x * {rng.randrange(10**9)}"
+                         for j in range(lines))
+        with open(os.path.join(folder, f"module_{i}.py"), "w") as f:
+            f.write(body + "\n")
+
+def test_complete_batch_creates_polls_and_reads_results(fake_api, capsys):
+    server = fake_api()
+    client = make_client()
+
+    results = complete_batch(client, {"a": request("first"), "b": request("second")}, poll_interval=0.05)
+
+    assert set(results) == {"a", "b"}
+    assert "Received" in results["a"]
+    assert server.state.stats["batch_requests"] == 2
+    output = capsys.readouterr().out
+    assert "📨 Submitted message batch" in output
+    assert "⏳ Batch" in output
+
+def test_complete_batch_leaves_out_errored_entries(fake_api, capsys):
+    fake_api(batch_errors={"b"})
+
+    results = complete_batch(make_client(), {"a": request("first"), "b": request("second")}, poll_interval=0.05)
+
+    assert set(results) == {"a"}
+    assert "❌ Request b errored" in capsys.readouterr().out
+
+def test_complete_batch_answers_cached_requests_without_submitting(fake_api):
+    server = fake_api()
+    client = make_client()
+    cache = open_cache()
+    requests = {"a": request("first"), "b": request("second")}
+
+    first = complete_batch(client, requests, cache=cache, poll_interval=0.05)
+    second = complete_batch(client, requests, cache=cache, poll_interval=0.05)
+    cache.close()
+
+    assert second == first
+    assert server.state.stats["batch_requests"] == 2
+
+def test_submit_batch_writes_one_review_per_batch(fake_api, workdir):
+    server = fake_api()
+    write_sources(workdir / "project", 6)
+    argv = [str(workdir / "project"), "--submit-batch", "--poll-interval", "0.05", "--no-overview"]
+
+    assert claude_folder_review_batched.main(argv) == 0
+
+    reviews = sorted(os.listdir("docs/folder_review"))
+    submitted = server.state.stats["batch_requests"]
+    assert submitted > 1
+    assert reviews == [f"folder_review_batch_{i:02d}.md" for i in range(1, submitted + 1)]
+
+    # A second run is answered from the response cache and submits nothing.
+    assert claude_folder_review_batched.main(argv) == 0
+    assert server.state.stats["batch_requests"] == submitted
+
+def test_submit_batch_reports_errored_batches(fake_api, workdir):
+    fake_api(batch_errors={"batch-02"})
+    write_sources(workdir / "project", 6)
+
+    status = claude_folder_review_batched.main(
+        [str(workdir / "project"), "--submit-batch", "--poll-interval", "0.05", "--no-overview"])
+
+    assert status == 1
+    assert os.path.exists("docs/folder_review/folder_review_batch_01.md")
+    assert not os.path.exists("docs/folder_review/folder_review_batch_02.md")
@@ -0,0 +1,111 @@
+"""
+Multi-repo orchestrator against local bare git repos and the fake Messages API.
+"""
+
+import os
+import json
+import subprocess
+
+import orchestrate
+
+def git(*args, cwd=None) -> str:
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+def commit_files(work, files: dict, message: str):
+    for rel_path, content in files.items():
+        with open(os.path.join(work, rel_path), "w") as f:
+            f.write(content)
+    git("add", ".", cwd=work)
+    git("-c", "user.name=Test", "-c", "user.email=test@example.com", "commit", "-q", "-m", message, cwd=work)
+    git("push", "-q", "origin", "HEAD", cwd=work)
+
+def make_bare_repo(root, name: str, files: dict) -> tuple:
+    """
+    Creates `<root>/<name>.git` (bare) plus a work tree that pushes to it.
+
+    Returns:
+        tuple: (bare repo path, work tree path).
+    """
+    bare = os.path.join(root, f"{name}.git")
+    work = os.path.join(root, f"{name}-work")
+    git("init", "-q", "--bare", bare)
+    git("clone", "-q", bare, work)
+    commit_files(work, files, "initial")
+    return bare, work
+
+def module(name: str, value: int) -> str:
+    return f'def {name}(x):\n    """Adds {value}."""\n    return x + {value}\n'
+
+def run(*argv) -> int:
+    return orchestrate.main([*argv, "--workdir", "repos", "--output", "sites", "--workers", "2"])
+
+def load_status() -> dict:
+    with open(os.path.join("sites", "status.json")) as f:
+        return {repo["repo"]: repo for repo in json.load(f)["repos"]}
+
+def test_clones_and_documents_each_repo(fake_api, workdir):
+    fake_api()
+    alpha, _ = make_bare_repo(str(workdir / "fixtures"), "alpha", {"a.py": module("a", 1), "b.py": module("b", 2)})
+    beta, _ = make_bare_repo(str(workdir / "fixtures"), "beta", {"c.py": module("c", 3)})
+
+    assert run(alpha, beta) == 0
+
+    assert {"a_py.md", "b_py.md", "index.md"} <= set(os.listdir("sites/alpha/docs"))
+    assert os.path.exists("sites/beta/docs/c_py.md")
+    assert os.path.exists("sites/alpha/mkdocs.yml")
+    status = load_status()
+    assert status["alpha"]["status"] == "ok"
+    assert status["alpha"]["commit"] == git("rev-parse", "HEAD", cwd=alpha)
+    assert status["alpha"]["modules"] == 2
+    assert status["alpha"]["calls"] == 2
+    assert status["beta"]["calls"] == 1
+    with open("sites/status.md") as f:
+        report = f.read()
+    assert "2 of 2 repos documented" in report
+    assert "| alpha | ✅ ok |" in report
+    assert "| beta | ✅ ok |" in report
+
+def test_pulls_and_documents_only_changed_modules(fake_api, workdir):
+    server = fake_api()
+    bare, work = make_bare_repo(str(workdir / "fixtures"), "alpha", {"a.py": module("a", 1), "b.py": module("b", 2)})
+    assert run(bare) == 0
+    messages = server.state.stats["messages"]
+
+    commit_files(work, {"b.py": module("b", 20)}, "change b")
+    assert run(bare) == 0
+
+    assert git("rev-parse", "HEAD", cwd="repos/alpha") == git("rev-parse", "HEAD", cwd=bare)
+    assert server.state.stats["messages"] == messages + 1
+    status = load_status()
+    assert status["alpha"]["status"] == "ok"
+    assert status["alpha"]["calls"] == 1
+    with open("sites/alpha/docs/b_py.md") as f:
+        assert "Received" in f.read()
+
+def test_missing_source_is_reported_without_stopping_the_others(fake_api, workdir):
+    fake_api()
+    good, _ = make_bare_repo(str(workdir / "fixtures"), "good", {"a.py": module("a", 1)})
+    missing = str(workdir / "fixtures" / "missing.git")
+
+    assert run(good, missing) == 1
+
+    status = load_status()
+    assert status["good"]["status"] == "ok"
+    assert status["missing"]["status"] == "checkout failed"
+    with open("sites/missing/autodoc.log") as f:
+        assert "git failed" in f.read()
+    with open("sites/status.md") as f:
+        report = f.read()
+    assert "1 of 2 repos documented" in report
+    assert "| missing | ❌ checkout failed |" in report
+
+def test_github_token_stays_out_of_the_clone(monkeypatch):
+    monkeypatch.setenv("GH_TOKEN", "secret-token")
+
+    url = orchestrate.clone_url("octo/repo")
+    options = orchestrate.git_auth(url)
+
+    assert url == "https://github.com/octo/repo.git"
+    assert options[0] == "-c" and options[1].startswith("http.https://github.com/.extraheader=AUTHORIZATION: basic ")
+    assert "secret-token" not in " ".join(options)
+    assert orchestrate.git_auth("/srv/git/repo.git") == []
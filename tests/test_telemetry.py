@@ -0,0 +1,23 @@
+"""
+Prometheus textfile written by the telemetry ledger.
+"""
+
+from telemetry import Ledger
+
+def read_samples(path: str) -> dict:
+    with open(path) as f:
+        return dict(line.rsplit(" ", 1) for line in f.read().splitlines() if not line.startswith("#"))
+
+def test_call_outcomes_are_not_counted_twice(workdir):
+    ledger = Ledger("demo", path=None)
+    ledger.record("a.py", "claude-test", latency=0.1)
+    ledger.record("b.py", "claude-test", cached=True)
+    ledger.record("c.py", "claude-test", latency=0.2, error="overloaded")
+    ledger.write_prometheus("metrics/nautee.prom")
+
+    samples = read_samples("metrics/nautee.prom")
+
+    calls = [value for name, value in samples.items() if name.startswith("nautee_llm_calls{")]
+    assert calls == ["3"]
+    assert samples['nautee_llm_call_outcomes{tool="demo",outcome="cached"}'] == "1"
+    assert samples['nautee_llm_call_outcomes{tool="demo",outcome="error"}'] == "1"
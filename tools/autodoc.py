@@ -1,4 +1,3 @@
-print("\U0001f441 autodoc.py is executing from:", __file__, flush=True)
 """
 Autodoc Generator
 
@@ -8,30 +7,125 @@ writes to docs/*.md, and updates mkdocs.yml and index.md.
 
 import os
 import sys
-import anthropic
-from dotenv import load_dotenv
+import re
+import json
+import hashlib
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import yaml
+from llm import complete, cached_system, repo_overview, start_ledger, make_client, load_env, context_map
+from llm_cache import ResponseCache, open_cache
+from discovery import discover_files, filter_files, in_pruned_dir, describe_skipped
+from chunking import split_module, module_header
+from tokens import TokenCounter
+from dedup import find_duplicates, dedup_threshold, describe_twin, twins_note, group_duplicates
+from journal import open_journal
 
-# === Setup ===
+OUTPUT_DIR = "docs"
+MKDOCS_YML_PATH = "mkdocs.yml"
+MANIFEST_NAME = ".autodoc_manifest.json"
 
-load_dotenv()
-client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-model = os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-20250514")
+SYSTEM_PROMPT = """You are a technical writer. Generate documentation in Markdown for the Python file in the user message.
 
-target_path = sys.argv[1] if len(sys.argv) > 1 else "."
-output_dir = "docs"
-os.makedirs(output_dir, exist_ok=True)
+Explain what the file does, its purpose, important functions or classes, and give suggestions or notes as needed.
+
+Use headings, bullet points, and code blocks to make it readable."""
+
+PROMPT_TEMPLATE = """File: `{rel_path}`
+
+```python
+{source_code}
+```"""
+
+CHUNK_TEMPLATE = """File: `{rel_path}` (part {part} of {parts}: {title})
+
+This module is too large to document in one pass. Document only the definitions in this part, as Markdown sections starting at `###` headings; the module overview is written separately.
+
+Module header (docstring and imports):
+```python
+{header}
+```
+
+Part source:
+```python
+{source_code}
+```"""
+
+MERGE_TEMPLATE = """File: `{rel_path}`
 
-mkdocs_yml_path = "mkdocs.yml"
-timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
+This module was documented in {parts} parts. Using the module header and the part docs below, write the opening of the module's page: a `#` title, what the module does and its purpose, how its main classes and functions fit together, and any suggestions or notes. Do not repeat the per-definition details; they follow your text under an "API Reference" heading.
+
+Module header:
+```python
+{header}
+```
+
+Part docs:
+
+{sections}"""
 
 # === Helpers ===
 
 def snake_md_path(rel_path: str) -> str:
     return rel_path.replace("/", "_").replace(".", "_") + ".md"
 
+def source_hash(source_code: str, model: str, chunk_tokens: int) -> str:
+    """
+    Hashes a source file together with everything else that shapes its docs.
+
+    Args:
+        source_code (str): Contents of the Python file.
+        model (str): Model the docs are generated with.
+        chunk_tokens (int): Size above which the module is documented in parts.
+
+    Returns:
+        str: Hex digest covering the model, prompt templates and source.
+    """
+    digest = hashlib.sha256()
+    for part in (model, SYSTEM_PROMPT, PROMPT_TEMPLATE, CHUNK_TEMPLATE, MERGE_TEMPLATE,
+                 str(chunk_tokens), source_code):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def load_manifest(path: str) -> dict:
+    if os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable manifest {path}: {e}")
+    return {"targets": {}}
+
+def write_if_changed(path: str, content: str) -> bool:
+    """
+    Atomically replaces a file with new content, unless it already holds exactly that content.
+
+    Unchanged files are left untouched so no-op runs cause no git churn (and no redeploy).
+
+    Args:
+        path (str): File to write.
+        content (str): Full new content.
+
+    Returns:
+        bool: True if the file was written.
+    """
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            if f.read() == content:
+                return False
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+    return True
+
+def save_manifest(path: str, manifest: dict) -> bool:
+    return write_if_changed(path, json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+
 def load_mkdocs_config(path: str):
+    import yaml
     if os.path.exists(path):
         with open(path, "r") as f:
             return yaml.safe_load(f)
@@ -41,199 +135,683 @@ def load_mkdocs_config(path: str):
         "nav": []
     }
 
-def write_index_md(nav_items):
-    index_md_path = os.path.join(output_dir, "index.md")
-    with open(index_md_path, "w") as f:
-        f.write("# \U0001f4da Auto-Generated Documentation Index\n\n")
-        f.write("Welcome to the **Nautee Documentation Portal**. This site contains documentation generated automatically by Claude from Anthropic.\n\n")
-        f.write("## \U0001f5c2️ AutoDocs (Generated)\n\n")
-        for item in nav_items:
-            for title, link in item.items():
-                f.write(f"- [{title}]({link})\n")
-        f.write(f"\n---\n\n_Last updated: {timestamp}_\n")
-
-def append_missing_docs_to_index(nav_items):
-    index_md_path = os.path.join(output_dir, "index.md")
+def other_markdown_files(nav_items, output_dir: str) -> list:
+    """
+    Markdown files in the docs folder that are not AutoDocs pages (reviews, changelog, ...), sorted.
+    """
     existing_links = set(link for item in nav_items for link in item.values())
-
-    with open(index_md_path, "a") as f:
-        f.write("\n## 🗃️ Other Markdown Files\n\n")
-        for root, _, files in os.walk(output_dir):
-            for file in files:
-                if file.endswith(".md") and file != "index.md":
-                    rel_path = os.path.relpath(os.path.join(root, file), output_dir)
-                    if rel_path not in existing_links:
-                        f.write(f"- [{rel_path}]({rel_path})\n")
-
-def write_mkdocs_config(path: str, static_nav, autodoc_items):
+    others = []
+    for root, _, files in os.walk(output_dir):
+        for file in files:
+            if file.endswith(".md") and file != "index.md":
+                rel_path = os.path.relpath(os.path.join(root, file), output_dir)
+                if rel_path not in existing_links:
+                    others.append(rel_path)
+    return sorted(others)
+
+def render_index_md(nav_items, others: list, timestamp: str) -> str:
+    lines = [
+        "# \U0001f4da Auto-Generated Documentation Index",
+        "",
+        "Welcome to the **Nautee Documentation Portal**. This site contains documentation generated automatically by Claude from Anthropic.",
+        "",
+        "## \U0001f5c2️ AutoDocs (Generated)",
+        "",
+    ]
+    for item in nav_items:
+        for title, link in item.items():
+            lines.append(f"- [{title}]({link})")
+    lines += ["", "---", "", f"_Last updated: {timestamp}_", "", "## 🗃️ Other Markdown Files", ""]
+    lines += [f"- [{rel_path}]({rel_path})" for rel_path in others]
+    return "\n".join(lines) + "\n"
+
+TIMESTAMP_LINE = re.compile(r"^_Last updated: .*_$", re.MULTILINE)
+
+def write_index_md(nav_items, output_dir: str, timestamp: str) -> bool:
+    """
+    Writes docs/index.md when its entries changed; the timestamp alone does not count as a change.
+
+    Returns:
+        bool: True if the file was written.
+    """
+    index_md_path = os.path.join(output_dir, "index.md")
+    content = render_index_md(nav_items, other_markdown_files(nav_items, output_dir), timestamp)
+    if os.path.exists(index_md_path):
+        with open(index_md_path, "r") as f:
+            if TIMESTAMP_LINE.sub("", f.read()) == TIMESTAMP_LINE.sub("", content):
+                return False
+    return write_if_changed(index_md_path, content)
+
+def write_mkdocs_config(path: str, static_nav, autodoc_items) -> bool:
+    """
+    Renders mkdocs.yml and writes it only if the result differs from the file on disk.
+
+    Returns:
+        bool: True if the file was written.
+    """
+    import yaml
     full_nav = static_nav + [{"AutoDocs": autodoc_items}]
-    with open(path, "w") as f:
-        yaml.dump({
-            "site_name": "Nautee Docs",
-            "theme": {
-                "name": "material",
-                "palette": [
-                    {
-                        "scheme": "slate",
-                        "primary": "blue",
-                        "accent": "green",
-                        "toggle": {
-                            "icon": "material/weather-sunny",
-                            "name": "Switch to light mode"
-                        }
-                    },
-                    {
-                        "scheme": "default",
-                        "primary": "blue",
-                        "accent": "green",
-                        "toggle": {
-                            "icon": "material/weather-night",
-                            "name": "Switch to dark mode"
-                        }
+    return write_if_changed(path, yaml.dump({
+        "site_name": "Nautee Docs",
+        "theme": {
+            "name": "material",
+            "palette": [
+                {
+                    "scheme": "slate",
+                    "primary": "blue",
+                    "accent": "green",
+                    "toggle": {
+                        "icon": "material/weather-sunny",
+                        "name": "Switch to light mode"
                     }
-                ],
-                "font": {
-                    "text": "Roboto",
-                    "code": "Roboto Mono"
                 },
-                "features": [
-                    "navigation.instant",
-                    "navigation.tabs",
-                    "navigation.top",
-                    "content.code.copy",
-                    "content.action.edit",
-                    "content.action.view",
-                    "content.code.annotate",
-                    "search.suggest",
-                    "search.highlight"
-                ]
-            },
-            "markdown_extensions": [
-                "admonition",
-                "codehilite",
-                "footnotes",
-                "meta",
-                {"toc": {"permalink": True}},
-                {"pymdownx.highlight": {"anchor_linenums": True, "linenums": True}},
-                "pymdownx.superfences",
-                "pymdownx.inlinehilite",
-                "pymdownx.details",
-                "pymdownx.snippets",
-                "pymdownx.magiclink",
-                "pymdownx.mark",
-                {"pymdownx.tasklist": {"custom_checkbox": True}},
-                "pymdownx.keys",
-                {"pymdownx.emoji": {
-                    "emoji_generator": "!!python/name:materialx.emoji.to_svg"
-                }}
-            ],
-            "plugins": [
-                "search",
                 {
-                    "mkdocstrings": {
-                        "handlers": {
-                            "python": {
-                                "options": {
-                                    "show_source": True
-                                }
+                    "scheme": "default",
+                    "primary": "blue",
+                    "accent": "green",
+                    "toggle": {
+                        "icon": "material/weather-night",
+                        "name": "Switch to dark mode"
+                    }
+                }
+            ],
+            "font": {
+                "text": "Roboto",
+                "code": "Roboto Mono"
+            },
+            "features": [
+                "navigation.instant",
+                "navigation.tabs",
+                "navigation.top",
+                "content.code.copy",
+                "content.action.edit",
+                "content.action.view",
+                "content.code.annotate",
+                "search.suggest",
+                "search.highlight"
+            ]
+        },
+        "markdown_extensions": [
+            "admonition",
+            "codehilite",
+            "footnotes",
+            "meta",
+            {"toc": {"permalink": True}},
+            {"pymdownx.highlight": {"anchor_linenums": True, "linenums": True}},
+            "pymdownx.superfences",
+            "pymdownx.inlinehilite",
+            "pymdownx.details",
+            "pymdownx.snippets",
+            "pymdownx.magiclink",
+            "pymdownx.mark",
+            {"pymdownx.tasklist": {"custom_checkbox": True}},
+            "pymdownx.keys",
+            {"pymdownx.emoji": {
+                "emoji_generator": "!!python/name:materialx.emoji.to_svg"
+            }}
+        ],
+        "plugins": [
+            "search",
+            {
+                "mkdocstrings": {
+                    "handlers": {
+                        "python": {
+                            "options": {
+                                "show_source": True
                             }
                         }
                     }
                 }
-            ],
-            "nav": full_nav
-        }, f, sort_keys=False)
+            }
+        ],
+        "nav": full_nav
+    }, sort_keys=False))
+
+def is_documentable(filename: str) -> bool:
+    name = os.path.basename(filename)
+    return name.endswith(".py") and not name.startswith("test_") and name != "__init__.py"
+
+def nav_from_manifest(manifest: dict) -> list:
+    """
+    AutoDocs nav entries for every module in the manifest, sorted by page.
+    """
+    pages = {}
+    for state in manifest["targets"].values():
+        for rel_path, entry in state["files"].items():
+            pages[entry["doc"]] = rel_path.split('/')[-1].replace('.py', '')
+    return [{pages[doc]: doc} for doc in sorted(pages)]
 
 def collect_python_files(base: str):
-    results = []
-    for root, _, files in os.walk(base):
-        for file in files:
-            if file.endswith(".py") and not file.startswith("test_") and file != "__init__.py":
-                results.append(os.path.join(root, file))
+    stats = {}
+    results = discover_files(base, (".py",), skip=lambda rel_path: not is_documentable(rel_path), stats=stats)
+    if stats:
+        print(describe_skipped(stats))
     return results
 
-# === Scan Python Files ===
-
-py_files = collect_python_files(target_path)
-if not py_files:
-    print("⚠️ No Python files found.")
-    sys.exit(0)
-
-print(f"📂 Found {len(py_files)} Python files.\n")
-
-autodoc_nav = []
-
-# === Generate Docs ===
-
-for file_path in py_files:
+def git_head(path: str):
+    try:
+        return subprocess.check_output(
+            ["git", "-C", path, "rev-parse", "HEAD"], stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (subprocess.CalledProcessError, OSError):
+        return None
+
+def git_changes(path: str, since: str):
+    """
+    Lists files changed in a git checkout since a commit, including uncommitted and untracked ones.
+
+    The commit is compared with the working tree, not with HEAD, so a local run
+    right after an edit picks the edit up.
+
+    Args:
+        path (str): Folder being documented (may be a subfolder of the repo).
+        since (str): Last documented commit SHA.
+
+    Returns:
+        list: (status, paths) tuples in `git diff --name-status` form, with paths
+        relative to `path`, or None when an incremental diff is not possible.
+    """
+    if not since:
+        return None
     try:
+        subprocess.check_output(
+            ["git", "-C", path, "cat-file", "-e", f"{since}^{{commit}}"], stderr=subprocess.DEVNULL
+        )
+        output = subprocess.check_output(
+            ["git", "-C", path, "diff", "--name-status", "-M", "--relative", since],
+            stderr=subprocess.DEVNULL
+        ).decode()
+        untracked = subprocess.check_output(
+            ["git", "-C", path, "ls-files", "-z", "--others", "--exclude-standard"],
+            stderr=subprocess.DEVNULL
+        ).decode("utf-8", "replace")
+    except (subprocess.CalledProcessError, OSError):
+        return None
+    changes = []
+    for line in output.splitlines():
+        status, *paths = line.split("\t")
+        changes.append((status, paths))
+    changes += [("A", [rel_path]) for rel_path in sorted(untracked.split("\0")) if rel_path and not in_pruned_dir(rel_path)]
+    return changes
+
+def remove_doc(files: dict, rel_path: str, output_dir: str, reason: str = "deleted"):
+    entry = files.pop(rel_path, None)
+    if entry is None:
+        return
+    doc_path = os.path.join(output_dir, entry["doc"])
+    if os.path.exists(doc_path):
+        os.remove(doc_path)
+    print(f"🗑️ Removed docs for {reason} module: {rel_path} → {entry['doc']}")
+
+def move_doc(files: dict, old_rel: str, new_rel: str, output_dir: str) -> bool:
+    entry = files.pop(old_rel, None)
+    old_doc = os.path.join(output_dir, entry["doc"]) if entry else None
+    if old_doc is None or not os.path.exists(old_doc):
+        return False
+    new_doc = snake_md_path(new_rel)
+    os.replace(old_doc, os.path.join(output_dir, new_doc))
+    files[new_rel] = dict(entry, doc=new_doc)
+    print(f"🚚 Moved docs for renamed module: {old_rel} → {new_rel}")
+    return True
+
+def apply_git_changes(files: dict, changes: list, target_path: str, output_dir: str, apply: bool = True) -> list:
+    """
+    Applies deletions and renames to the manifest and docs, and lists files to (re)document.
+
+    Changed files go through the same discovery filters as a full scan (size cap,
+    .nauteeignore, NAUTEE_EXCLUDE, binary and minified checks); modules that no
+    longer pass lose their docs, as they would on a full scan.
+
+    Args:
+        files (dict): Manifest entries for the target, keyed by relative path.
+        changes (list): Output of git_changes().
+        target_path (str): Folder being documented.
+        output_dir (str): Docs folder.
+        apply (bool): False only lists the files, leaving docs and manifest alone (dry runs).
+
+    Returns:
+        list: Paths of added or modified modules.
+    """
+    # Relative path -> whether it needs documenting (False for exact renames whose docs were moved).
+    candidates = {}
+    for status, paths in changes:
+        kind = status[0]
+        if kind == "D":
+            if apply:
+                remove_doc(files, paths[0], output_dir)
+        elif kind == "R":
+            old_rel, new_rel = paths
+            if not is_documentable(new_rel):
+                if apply:
+                    remove_doc(files, old_rel, output_dir)
+                continue
+            if apply:
+                moved = is_documentable(old_rel) and move_doc(files, old_rel, new_rel, output_dir)
+            else:
+                moved = old_rel in files
+            # Renames with edits still go through the hash check and get regenerated.
+            candidates[new_rel] = not moved or status != "R100"
+        elif is_documentable(paths[-1]) and os.path.exists(os.path.join(target_path, paths[-1])):
+            candidates[paths[-1]] = True
+
+    stats = {}
+    kept = filter_files(target_path, sorted(candidates), (".py",),
+                        skip=lambda rel_path: not is_documentable(rel_path), stats=stats)
+    if stats:
+        print(describe_skipped(stats))
+    kept_rel = {os.path.relpath(path, target_path) for path in kept}
+    for rel_path in sorted(set(candidates) - kept_rel):
+        if rel_path in files:
+            if apply:
+                remove_doc(files, rel_path, output_dir, reason="excluded")
+            else:
+                print(f"🗑️ Would remove docs for excluded module: {rel_path}")
+    return sorted(os.path.join(target_path, rel_path) for rel_path in kept_rel if candidates[rel_path])
+
+
+# === Documentation Run ===
+
+class DocRun:
+    """
+    State shared by the worker threads of one autodoc run.
+
+    Args:
+        args: Parsed command-line arguments.
+        client: Anthropic client (None for dry runs).
+        cache (ResponseCache): Shared response cache (None for dry runs).
+        model (str): Model name.
+        state (dict): Manifest entry for the target folder.
+        known_modules (set): Every module of the target, documented before or in this run.
+        output_dir (str): Docs folder.
+    """
+
+    def __init__(self, args, client, cache, model: str, state: dict, known_modules: set, output_dir: str):
+        self.args = args
+        self.client = client
+        self.cache = cache
+        self.model = model
+        self.state = state
+        self.target_path = args.target_path
+        self.output_dir = output_dir
+        self.timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
+        self.counter = TokenCounter(model=model)
+
+        # Every call shares the same instructions and project overview, so they go in a cached system prefix.
+        overview = "" if args.no_overview else repo_overview(self.target_path, known_modules)
+        self.system = cached_system(SYSTEM_PROMPT, overview)
+
+        # Duplicates get a stub page pointing at their canonical copy instead of their own Claude call.
+        self.duplicates = {}
+        threshold = dedup_threshold()
+        if threshold is not None:
+            self.duplicates = find_duplicates(sorted(path for path in known_modules if os.path.exists(path)), threshold)
+        self.twins = group_duplicates(self.duplicates)
+
+        # Parts of oversized modules get their own pool: file workers block on them, so sharing one pool could deadlock.
+        self.chunk_pool = ThreadPoolExecutor(max_workers=max(1, args.concurrency))
+
+        # Checkpoints finished pages until the manifest is saved at the end of the run (see journal.py).
+        self.journal = None
+
+    def duplicate_of(self, file_path: str):
+        twin = self.duplicates.get(file_path)
+        return os.path.relpath(twin[0], self.target_path) if twin else None
+
+    def plan(self, file_path: str) -> str:
+        """
+        Decides what a run does with a module without calling Claude.
+
+        Returns:
+            str: "unchanged", "stub", "chunked" or "document".
+        """
         with open(file_path, "r") as f:
             source_code = f.read()
-
-        rel_path = os.path.relpath(file_path, target_path)
-        md_filename = snake_md_path(rel_path)
-        md_output_path = os.path.join(output_dir, md_filename)
-
-        prompt = f"""You are a technical writer. Generate documentation in Markdown for the following Python file.
-
-Explain what the file does, its purpose, important functions or classes, and give suggestions or notes as needed.
-
-Use headings, bullet points, and code blocks to make it readable.
-
-```python
-{source_code}
-```"""
-
-        response = client.messages.create(
-            model=model,
+        rel_path = os.path.relpath(file_path, self.target_path)
+        previous = self.state["files"].get(rel_path)
+        digest = source_hash(source_code, self.model, self.args.chunk_tokens)
+        if not self.args.force and previous and previous.get("hash") == digest \
+                and previous.get("duplicate_of") == self.duplicate_of(file_path) \
+                and os.path.exists(os.path.join(self.output_dir, snake_md_path(rel_path))):
+            return "unchanged"
+        if self.duplicate_of(file_path):
+            return "stub"
+        if self.counter.count(source_code) > self.args.chunk_tokens:
+            chunks = split_module(source_code, self.args.chunk_tokens, self.counter.count)
+            if chunks and len(chunks) > 1:
+                return "chunked"
+        return "document"
+
+    def document_chunked(self, rel_path: str, source_code: str, chunks: list) -> str:
+        """
+        Documents an oversized module part by part in parallel, then merges the parts into one page.
+
+        Args:
+            rel_path (str): Module path relative to the target.
+            source_code (str): Module source.
+            chunks (list): Parts from split_module().
+
+        Returns:
+            str: Markdown for the whole module.
+        """
+        header = module_header(source_code)
+
+        def document_chunk(numbered):
+            part, chunk = numbered
+            prompt = CHUNK_TEMPLATE.format(rel_path=rel_path, part=part, parts=len(chunks), title=chunk["title"],
+                                           header=header, source_code=chunk["source"])
+            return complete(
+                self.client, self.cache,
+                item=f"{rel_path}#{part}",
+                model=self.model,
+                max_tokens=2000,
+                system=self.system,
+                messages=[{"role": "user", "content": prompt}]
+            )
+
+        print(f"🧩 Documenting {rel_path} in {len(chunks)} parts")
+        sections = context_map(self.chunk_pool, document_chunk, enumerate(chunks, start=1))
+        merged = "\n\n".join(f"<!-- Part {part}: {chunk['title']} -->\n\n{section}"
+                              for part, (chunk, section) in enumerate(zip(chunks, sections), start=1))
+        intro = complete(
+            self.client, self.cache,
+            item=f"{rel_path}#merge",
+            model=self.model,
             max_tokens=1500,
-            messages=[{"role": "user", "content": prompt}]
+            system=self.system,
+            messages=[{"role": "user", "content": MERGE_TEMPLATE.format(
+                rel_path=rel_path, parts=len(chunks), header=header, sections=merged)}]
         )
-
-        markdown = response.content[0].text.strip()
-
+        return f"{intro}\n\n## API Reference\n\n" + "\n\n".join(sections)
+
+    def write_stub(self, rel_path: str, nav_title: str, md_output_path: str, file_path: str):
+        """
+        Writes the page for a duplicate module: a pointer to its canonical copy's docs.
+        """
+        canonical, score = self.duplicates[file_path]
+        canonical_rel = os.path.relpath(canonical, self.target_path)
         with open(md_output_path, "w") as out:
-            out.write(f"<!-- Auto-generated by Claude on {timestamp} -->\n\n")
-            out.write(markdown)
-
-        print(f"✅ Documented: {rel_path} → {md_filename}")
-        autodoc_nav.append({rel_path.split('/')[-1].replace('.py', ''): md_filename})
-        print("🧭 Appending to autodoc_nav:", {rel_path.split('/')[-1].replace('.py', ''): md_filename})
-
-    except Exception as e:
-        print(f"❌ Error processing {file_path}: {e}")
-
-# === Update mkdocs.yml ===
-
-print("\n🧠 Loading existing mkdocs.yml...")
-existing = load_mkdocs_config(mkdocs_yml_path)
-if not existing:
-    print("⚠️ No existing config found. A new one will be created.")
-else:
-    print("✅ Found existing mkdocs.yml")
-    print("📄 Current nav section (before):")
-    for item in existing.get("nav", []):
-        print("   ", item)
-
-# Remove existing AutoDocs
-static_nav = [item for item in existing.get("nav", []) if "AutoDocs" not in item]
-
-# Debug new entries
-print("\n🧩 New AutoDocs entries to add:")
-for item in autodoc_nav:
-    print("   ", item)
-
-# Combine new nav
-full_nav = static_nav + [{"AutoDocs": autodoc_nav}]
-
-# Write mkdocs.yml
-print("\n💾 Writing updated mkdocs.yml...")
-write_mkdocs_config(mkdocs_yml_path, static_nav, autodoc_nav)
-print("✅ mkdocs.yml updated with latest AutoDocs.")
-
-# === Write index.md ===
-
-print("\n📝 Writing index.md with AutoDocs entries...")
-write_index_md(autodoc_nav)
-append_missing_docs_to_index(autodoc_nav)
-print("✅ index.md updated with all .md files.")
\ No newline at end of file
+            out.write(f"<!-- Auto-generated by Nautee on {self.timestamp} -->\n\n")
+            out.write(f"# {nav_title}\n\n")
+            out.write(f"`{rel_path}` duplicates {describe_twin(canonical_rel, score)}, so it is not documented separately.\n\n")
+            out.write(f"See [{os.path.basename(canonical_rel)}]({snake_md_path(canonical_rel)}).\n")
+
+    def document_params(self, file_path: str, rel_path: str, source_code: str) -> dict:
+        """
+        Builds the messages.create params that document a module in one call.
+        """
+        prompt = PROMPT_TEMPLATE.format(rel_path=rel_path, source_code=source_code)
+        if file_path in self.twins:
+            members = [(os.path.relpath(path, self.target_path), score) for path, score in self.twins[file_path]]
+            prompt += f"\n\n{twins_note(members)}"
+        return {
+            "model": self.model,
+            "max_tokens": 1500,
+            "system": self.system,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+
+    def needs_call(self, file_path: str) -> bool:
+        """
+        True when documenting a module sends one request to Claude (not reused, not a stub,
+        not split into parts, and not already in the response cache).
+        """
+        try:
+            if self.plan(file_path) != "document":
+                return False
+            with open(file_path, "r") as f:
+                source_code = f.read()
+        except (OSError, UnicodeDecodeError):
+            # document_file() reports the error.
+            return False
+        params = self.document_params(file_path, os.path.relpath(file_path, self.target_path), source_code)
+        return self.cache is None or not self.cache.has(ResponseCache.make_key(params))
+
+    def document_file(self, file_path: str):
+        """
+        Generates (or reuses) the Markdown page for a single Python file.
+
+        Runs on a worker thread, so it only reads the shared manifest and leaves
+        updating it to the caller.
+
+        Args:
+            file_path (str): Path of the Python file to document.
+
+        Returns:
+            tuple: (rel_path, nav_title, md_filename, manifest_entry, reused) or None on error.
+        """
+        try:
+            with open(file_path, "r") as f:
+                source_code = f.read()
+
+            rel_path = os.path.relpath(file_path, self.target_path)
+            md_filename = snake_md_path(rel_path)
+            md_output_path = os.path.join(self.output_dir, md_filename)
+            nav_title = rel_path.split('/')[-1].replace('.py', '')
+            digest = source_hash(source_code, self.model, self.args.chunk_tokens)
+            entry = {"hash": digest, "doc": md_filename}
+            canonical_rel = self.duplicate_of(file_path)
+            if canonical_rel:
+                entry["duplicate_of"] = canonical_rel
+
+            previous = self.state["files"].get(rel_path)
+            if not self.args.force and previous and previous.get("hash") == digest \
+                    and previous.get("duplicate_of") == canonical_rel and os.path.exists(md_output_path):
+                print(f"⏭️ Unchanged: {rel_path} → {md_filename}")
+                return rel_path, nav_title, md_filename, entry, True
+
+            if canonical_rel:
+                self.write_stub(rel_path, nav_title, md_output_path, file_path)
+                print(f"🪞 Duplicate: {rel_path} → stub pointing at {canonical_rel}")
+                return rel_path, nav_title, md_filename, entry, False
+
+            chunks = None
+            if self.counter.count(source_code) > self.args.chunk_tokens:
+                chunks = split_module(source_code, self.args.chunk_tokens, self.counter.count)
+
+            if chunks and len(chunks) > 1:
+                markdown = self.document_chunked(rel_path, source_code, chunks)
+            else:
+                markdown = complete(self.client, self.cache, item=rel_path,
+                                    **self.document_params(file_path, rel_path, source_code))
+
+            with open(md_output_path, "w") as out:
+                out.write(f"<!-- Auto-generated by Claude on {self.timestamp} -->\n\n")
+                out.write(markdown)
+            if self.journal:
+                self.journal.record(rel_path, digest, entry=entry)
+
+            print(f"✅ Documented: {rel_path} → {md_filename}")
+            return rel_path, nav_title, md_filename, entry, False
+
+        except Exception as e:
+            print(f"❌ Error processing {file_path}: {e}")
+            return None
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Generate Markdown docs for Python files using Claude.")
+    parser.add_argument("target_path", nargs="?", default=".", help="Project folder to document.")
+    parser.add_argument("--force", action="store_true", help="Regenerate docs even when the source is unchanged.")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("AUTODOC_CONCURRENCY", "4")),
+                        help="Number of files documented in parallel (default: 4).")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the shared response cache.")
+    parser.add_argument("--no-overview", action="store_true",
+                        help="Do not send the project file tree and README as shared context.")
+    parser.add_argument("--full", action="store_true",
+                        help="Scan every file instead of only those changed (committed or not) since the last documented commit.")
+    parser.add_argument("--chunk-tokens", type=int, default=int(os.getenv("AUTODOC_CHUNK_TOKENS", "6000")),
+                        help="Modules larger than this are documented in parts and merged (default: 6000).")
+    parser.add_argument("--files", nargs="+", metavar="PATH",
+                        help="Only document these modules (deleted ones lose their page); used by watch mode.")
+    parser.add_argument("--output-root", default=".",
+                        help="Folder that receives docs/ and mkdocs.yml (default: the current directory).")
+    parser.add_argument("--resume", action="store_true",
+                        help="Keep the pages an interrupted run already wrote instead of generating them again.")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="List what would be documented without calling Claude or writing docs.")
+    return parser
+
+def main(argv: list = None, client=None, cache=None) -> int:
+    """
+    Runs autodoc.
+
+    Args:
+        argv (list): Command-line arguments (default: sys.argv[1:]).
+        client: Anthropic client to reuse; one is created when needed and omitted.
+        cache (ResponseCache): Response cache to reuse; opened (and closed) here when omitted.
+
+    Returns:
+        int: Exit code.
+    """
+    args = build_parser().parse_args(argv)
+    load_env()
+    model = os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-20250514")
+    target_path = args.target_path
+    output_dir = os.path.join(args.output_root, OUTPUT_DIR)
+    mkdocs_path = os.path.join(args.output_root, MKDOCS_YML_PATH)
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+
+    # === Scan Python Files ===
+
+    manifest = load_manifest(manifest_path)
+    target_key = os.path.normpath(target_path)
+    if "files" in manifest:
+        # Manifests written before per-target tracking hold a single flat file map.
+        manifest = {"targets": {target_key: {"files": manifest["files"]}}}
+    state = manifest["targets"].setdefault(target_key, {"files": {}})
+
+    # Pages finished by an interrupted run are in the journal but not yet in the manifest.
+    journal = open_journal("autodoc", target_path, resume=args.resume)
+    if args.resume:
+        for rel_path, item in journal.data["items"].items():
+            if item.get("status") == "done":
+                state["files"][rel_path] = item["entry"]
+
+    head = git_head(target_path)
+    changes = None if args.force or args.full or args.files else git_changes(target_path, state.get("commit"))
+
+    if args.files:
+        py_files = []
+        for path in args.files:
+            rel_path = os.path.relpath(path, target_path)
+            if os.path.exists(path):
+                if is_documentable(rel_path):
+                    py_files.append(os.path.join(target_path, rel_path))
+            elif args.dry_run:
+                print(f"🗑️ Would remove docs for deleted module: {rel_path}")
+            else:
+                remove_doc(state["files"], rel_path, output_dir)
+        print(f"📂 {len(py_files)} Python files to document.\n")
+    elif changes is None:
+        py_files = collect_python_files(target_path)
+        if not py_files:
+            print("⚠️ No Python files found.")
+            return 0
+        print(f"📂 Found {len(py_files)} Python files.\n")
+
+        present = {os.path.relpath(path, target_path) for path in py_files}
+        for rel_path in sorted(set(state["files"]) - present):
+            if args.dry_run:
+                print(f"🗑️ Would remove docs for deleted module: {rel_path}")
+            else:
+                remove_doc(state["files"], rel_path, output_dir)
+    else:
+        print(f"🔀 {len(changes)} changed paths since {state['commit'][:10]}")
+        py_files = apply_git_changes(state["files"], changes, target_path, output_dir, apply=not args.dry_run)
+        print(f"📂 {len(py_files)} Python files to document.\n")
+
+    known_modules = {os.path.join(target_path, rel_path) for rel_path in state["files"]} | set(py_files)
+    run = DocRun(args, None, None, model, state, known_modules, output_dir)
+
+    # Pages whose duplicate status changed are rewritten even when their source did not change.
+    for rel_path, entry in state["files"].items():
+        path = os.path.join(target_path, rel_path)
+        if entry.get("duplicate_of") != run.duplicate_of(path) and path not in py_files and os.path.exists(path):
+            py_files.append(path)
+    py_files.sort()
+    if run.duplicates:
+        print(f"🪞 {len(run.duplicates)} modules duplicate another module and get a stub page.\n")
+
+    if args.dry_run:
+        run.chunk_pool.shutdown()
+        plans = {path: run.plan(path) for path in py_files}
+        for path, plan in plans.items():
+            print(f"🧪 {plan:>9}: {os.path.relpath(path, target_path)}")
+        calls = sum(1 for plan in plans.values() if plan in ("document", "chunked"))
+        print(f"\n🧪 Dry run: {calls} modules would be sent to Claude, "
+              f"{sum(1 for plan in plans.values() if plan == 'unchanged')} reused.")
+        return 0
+
+    run.journal = journal
+    run.client = client or make_client()
+    own_cache = cache is None or args.no_cache
+    run.cache = open_cache(bypass=args.no_cache) if own_cache else cache
+    ledger = start_ledger("autodoc")
+
+    # === Generate Docs ===
+
+    skipped = 0
+    failed = 0
+
+    # The first file that really calls Claude runs alone, so it writes the prompt cache
+    # (the shared system prompt) before the parallel calls read it.
+    first = next((path for path in py_files if run.needs_call(path)), None)
+    done = {first: run.document_file(first)} if first else {}
+    rest = [path for path in py_files if path != first]
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        done.update(zip(rest, context_map(pool, run.document_file, rest)))
+    run.chunk_pool.shutdown()
+    results = [done[path] for path in py_files]
+
+    for result in results:
+        if result is None:
+            failed += 1
+            continue
+        rel_path, nav_title, md_filename, entry, reused = result
+        state["files"][rel_path] = entry
+        if reused:
+            skipped += 1
+        else:
+            print("🧭 Appending to autodoc_nav:", {nav_title: md_filename})
+
+    # Only advance the documented commit when every file made it, so failures are retried.
+    # A --files run covers part of the tree, so the next full run still diffs from the old commit.
+    if head and not failed and not args.files:
+        state["commit"] = head
+
+    # Nav comes from the manifest so it also covers modules untouched by this run (and other targets sharing the docs folder).
+    autodoc_nav = nav_from_manifest(manifest)
+
+    manifest_written = save_manifest(manifest_path, manifest)
+    journal.discard()
+    print(f"\n♻️ Reused {skipped} unchanged docs, regenerated {len(results) - skipped - failed}.")
+    print(run.cache.summary())
+    print(ledger.summary())
+    if own_cache:
+        run.cache.close()
+    ledger.close()
+
+    # === Update mkdocs.yml ===
+
+    existing = load_mkdocs_config(mkdocs_path)
+    # Keep everything but the generated AutoDocs section.
+    static_nav = [item for item in existing.get("nav", []) if "AutoDocs" not in item]
+    mkdocs_written = write_mkdocs_config(mkdocs_path, static_nav, autodoc_nav)
+    if mkdocs_written:
+        print(f"✅ mkdocs.yml updated with {len(autodoc_nav)} AutoDocs entries.")
+    else:
+        print("⏭️ mkdocs.yml unchanged.")
+
+    # === Write index.md ===
+
+    index_written = write_index_md(autodoc_nav, output_dir, run.timestamp)
+    if index_written:
+        print("✅ index.md updated.")
+    else:
+        print("⏭️ index.md unchanged.")
+    if not (manifest_written or mkdocs_written or index_written) and skipped == len(results):
+        print("💤 Nothing changed; no files were written.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,36 @@
 """
 Changelog Generator
 
-Summarizes recent Git commit messages using Claude and writes a formatted changelog to docs/changelog.md.
+Summarizes Git commit messages using Claude and writes a formatted changelog to docs/changelog.md.
+
+By default the most recent commits are summarized. With --all-tags or --range
+the history is split into releases at tags: each release's commits are
+streamed from `git log` in chunks, the chunks are summarized in parallel (map)
+and their summaries merged into the release notes (reduce). Finished releases
+are stored in docs/.changelog_manifest.json keyed by their commit range, so
+regenerating the changelog only pays for releases that are new (or whose
+model or prompts changed).
 """
 
 import os
-import anthropic
-from dotenv import load_dotenv
+import sys
+import json
+import hashlib
+import argparse
+import threading
+import contextlib
+import contextvars
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import subprocess
+from llm import complete, start_ledger, make_client, load_env, context_map
+from llm_cache import open_cache
+from tokens import approx_tokens
+
+OUTPUT_PATH = "docs/changelog.md"
+MANIFEST_PATH = "docs/.changelog_manifest.json"
+# Partial summaries merged per reduce call; more are merged in rounds.
+REDUCE_FAN_IN = 20
 
 def get_git_log(n=20):
     """Fetch recent Git commit messages."""
@@ -29,30 +51,340 @@ Commits:
 {git_log}
 """
 
-def main():
-    load_dotenv()
-    client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-    model = os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-20250514")
+def format_reduce_prompt(title: str, summaries: list) -> str:
+    """Creates a prompt that merges partial release notes into one set."""
+    parts = "\n\n".join(f"### Part {i}\n\n{summary}" for i, summary in enumerate(summaries, start=1))
+    return f"""You are a changelog assistant. The release notes for {title} were written in parts, each covering a slice of its commits.
+Merge them into one set of clear, readable release notes: combine duplicate entries, keep every distinct change, and use markdown sections like 'Features', 'Fixes', 'Improvements' if applicable.
+
+{parts}
+"""
+
+def prompt_digest() -> str:
+    """
+    Short hash of the map and reduce prompt templates, stored with each release so edits to them regenerate its notes.
+    """
+    templates = format_prompt("{git_log}") + format_reduce_prompt("{title}", ["{summary}"])
+    return hashlib.sha256(templates.encode("utf-8")).hexdigest()[:16]
+
+def git_lines(args: list) -> list:
+    try:
+        return subprocess.check_output(["git", *args], stderr=subprocess.DEVNULL).decode().splitlines()
+    except (subprocess.CalledProcessError, OSError):
+        return []
+
+def rev_parse(rev: str):
+    lines = git_lines(["rev-parse", "--verify", "--quiet", f"{rev}^{{commit}}"])
+    return lines[0] if lines else None
+
+def list_tags() -> list:
+    """
+    Tags reachable from HEAD, oldest first, as (tag, date) tuples.
+    """
+    lines = git_lines(["for-each-ref", "--merged", "HEAD", "--sort=creatordate",
+                       "--format=%(refname:short)\t%(creatordate:short)", "refs/tags"])
+    return [tuple(line.split("\t", 1)) for line in lines if line]
 
-    git_log = get_git_log()
-    prompt = format_prompt(git_log)
+def plan_releases(range_spec: str = None, unreleased: bool = True) -> list:
+    """
+    Splits history into releases at tags.
 
-    response = client.messages.create(
+    Args:
+        range_spec (str): "FROM..TO" tag range (either end may be empty); None for all tags.
+        unreleased (bool): Add the commits after the last tag as an "Unreleased" section.
+
+    Returns:
+        list: Releases, newest first, as dicts with title, date, rev (a git
+        revision range) and key (the resolved commit range, or None when the
+        release is still open and must not be cached).
+    """
+    tags = list_tags()
+    names = [tag for tag, _ in tags]
+    start, end = 0, len(tags)
+    if range_spec:
+        first, _, last = range_spec.partition("..")
+        for tag in (first, last):
+            if tag and tag not in names:
+                raise ValueError(f"unknown tag {tag!r}")
+        # FROM is the previous release, so its own commits are not included.
+        start = names.index(first) + 1 if first else 0
+        end = names.index(last) + 1 if last else len(tags)
+        unreleased = unreleased and not last
+
+    releases = []
+    for i in range(start, end):
+        tag, date = tags[i]
+        previous = tags[i - 1][0] if i else None
+        tip = rev_parse(tag)
+        base = rev_parse(previous) if previous else None
+        if tip == base:
+            continue
+        releases.append({
+            "title": tag,
+            "date": date,
+            "rev": f"{previous}..{tag}" if previous else tag,
+            "key": f"{base or 'root'}..{tip}",
+        })
+    if unreleased:
+        last_tag = tags[end - 1][0] if end else None
+        if not last_tag or rev_parse(last_tag) != rev_parse("HEAD"):
+            releases.append({
+                "title": "Unreleased",
+                "date": datetime.now().strftime("%Y-%m-%d"),
+                "rev": f"{last_tag}..HEAD" if last_tag else "HEAD",
+                "key": None,
+            })
+    return list(reversed(releases))
+
+def stream_commit_chunks(rev: str, chunk_commits: int, max_count: int = None):
+    """
+    Streams commit subjects from `git log` and yields them in chunks, without loading the whole history.
+
+    Args:
+        rev (str): Revision range.
+        chunk_commits (int): Commits per chunk.
+        max_count (int): Optional cap on the number of commits.
+
+    Yields:
+        tuple: (chunk of "* subject" lines, number of commits in it).
+    """
+    command = ["git", "log", "--pretty=format:* %s", rev]
+    if max_count:
+        command[2:2] = ["-n", str(max_count)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, errors="replace")
+    chunk = []
+    try:
+        for line in process.stdout:
+            chunk.append(line.rstrip("\n"))
+            if len(chunk) >= chunk_commits:
+                yield "\n".join(chunk), len(chunk)
+                chunk = []
+        if chunk:
+            yield "\n".join(chunk), len(chunk)
+    finally:
+        process.stdout.close()
+        process.wait()
+
+def load_manifest() -> dict:
+    if os.path.exists(MANIFEST_PATH):
+        try:
+            with open(MANIFEST_PATH, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable changelog manifest: {e}")
+    return {"releases": {}}
+
+def save_manifest(manifest: dict):
+    os.makedirs(os.path.dirname(MANIFEST_PATH), exist_ok=True)
+    tmp_path = f"{MANIFEST_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, MANIFEST_PATH)
+
+def summarize(client, cache, model: str, item: str, prompt: str) -> str:
+    return complete(
+        client, cache,
+        item=item,
         model=model,
         max_tokens=1000,
         messages=[{"role": "user", "content": prompt}]
     )
 
-    notes = response.content[0].text.strip()
+def reduce_release(client, cache, model: str, pool, release: dict, summaries: list) -> str:
+    """
+    Merges a release's chunk summaries, in rounds of REDUCE_FAN_IN when there are many.
+    """
+    round_number = 0
+    while len(summaries) > 1:
+        round_number += 1
+        groups = [summaries[i:i + REDUCE_FAN_IN] for i in range(0, len(summaries), REDUCE_FAN_IN)]
+        summaries = context_map(pool, lambda numbered: summarize(
+            client, cache, model, f"{release['title']}#reduce{round_number}.{numbered[0]}",
+            format_reduce_prompt(release["title"], numbered[1])), enumerate(groups, start=1))
+    return summaries[0]
+
+def summarize_release(client, cache, model: str, pool, release: dict, chunk_commits: int, read_ahead: int) -> tuple:
+    """
+    Summarizes one release: each chunk is submitted to the pool as soon as `git log` produces it
+    (map), then the chunk summaries are merged (reduce).
+
+    At most read_ahead chunks are held waiting for their summaries, so memory
+    stays bounded however long the history is.
+
+    Args:
+        client: Anthropic client.
+        cache (ResponseCache): Shared response cache.
+        model (str): Model name.
+        pool (ThreadPoolExecutor): Pool that runs the summary calls.
+        release (dict): Release from plan_releases().
+        chunk_commits (int): Commits per chunk.
+        read_ahead (int): Most chunks submitted but not yet summarized.
+
+    Returns:
+        tuple: (notes, commits streamed, chunks).
+
+    Raises:
+        Exception: The first failed summary call.
+    """
+    futures, summaries, commits = [], [], 0
+    with contextlib.closing(stream_commit_chunks(release["rev"], chunk_commits, release.get("max_count"))) as chunks:
+        for part, (text, count) in enumerate(chunks, start=1):
+            commits += count
+            futures.append(pool.submit(contextvars.copy_context().run, summarize, client, cache, model,
+                                       f"{release['title']}#{part}", format_prompt(text)))
+            if len(futures) - len(summaries) >= read_ahead:
+                summaries.append(futures[len(summaries)].result())
+    summaries += [future.result() for future in futures[len(summaries):]]
+    if not summaries:
+        return "_No commits._", 0, 0
+    return reduce_release(client, cache, model, pool, release, summaries), commits, len(summaries)
+
+def render_changelog(releases: list, notes: dict, timestamp: str) -> str:
+    lines = ["# 📝 Changelog", "", f"_Last updated: {timestamp}_", ""]
+    for release in releases:
+        lines += [f"## {release['title']} ({release['date']})", "", notes[release["title"]].strip(), ""]
+    return "\n".join(lines)
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Summarize commits into docs/changelog.md with Claude.")
+    parser.add_argument("--commits", type=int, default=20,
+                        help="Number of recent commits to summarize without --all-tags/--range (default: 20).")
+    parser.add_argument("--all-tags", action="store_true", help="One section per release tag, plus unreleased commits.")
+    parser.add_argument("--range", dest="range_spec", metavar="FROM..TO",
+                        help="Only the releases after tag FROM up to tag TO (either end may be left empty).")
+    parser.add_argument("--chunk-commits", type=int, default=200,
+                        help="Commits per map call when summarizing a release (default: 200).")
+    parser.add_argument("--concurrency", type=int, default=4, help="Summaries generated in parallel (default: 4).")
+    parser.add_argument("--dry-run", action="store_true", help="Show the commits without calling Claude.")
+    return parser
+
+def main(argv: list = None, client=None, cache=None) -> int:
+    """
+    Writes the changelog.
+
+    Args:
+        argv (list): Command-line arguments (default: sys.argv[1:]).
+        client: Anthropic client to reuse; one is created when needed and omitted.
+        cache (ResponseCache): Response cache to reuse; opened (and closed) here when omitted.
+
+    Returns:
+        int: Exit code.
+    """
+    args = build_parser().parse_args(argv)
+    load_env()
+    model = os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-20250514")
+    by_release = bool(args.all_tags or args.range_spec)
+
+    if by_release:
+        try:
+            releases = plan_releases(args.range_spec)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+        if not releases:
+            print("⚠️ No releases found in that range.")
+            return 0
+    else:
+        releases = [{"title": "Recent changes", "date": datetime.now().strftime("%Y-%m-%d"),
+                     "rev": "HEAD", "key": None, "max_count": args.commits}]
+
+    manifest = load_manifest()
+    stored = manifest["releases"]
+    prompt = prompt_digest()
+
+    def reusable(release):
+        entry = stored.get(release["key"]) if release["key"] else None
+        # Notes written by another model or from other prompts are regenerated.
+        return entry is not None and entry.get("model") == model and entry.get("prompt") == prompt
+
+    pending = [release for release in releases if not reusable(release)]
+
+    if args.dry_run:
+        if not by_release:
+            print(get_git_log(args.commits))
+        calls = tokens = 0
+        for release in releases:
+            if release not in pending:
+                print(f"🏷️ {release['title']} ({release['rev']}): cached")
+                continue
+            parts = commits = 0
+            for text, count in stream_commit_chunks(release["rev"], args.chunk_commits, release.get("max_count")):
+                parts += 1
+                commits += count
+                tokens += approx_tokens(format_prompt(text))
+            calls += parts
+            print(f"🏷️ {release['title']} ({release['rev']}): {commits} commits in {parts} chunk(s)")
+        print(f"\n🧪 Dry run: {calls} summary calls (~{tokens} prompt tokens) for {len(pending)} releases; "
+              f"{len(releases) - len(pending)} reused.")
+        return 0
+
+    client = client or make_client()
+    own_cache = cache is None
+    if own_cache:
+        cache = open_cache()
+    ledger = start_ledger("changelog")
+    if len(pending) < len(releases):
+        print(f"♻️ Reusing {len(releases) - len(pending)} summarized releases; {len(pending)} to summarize.")
+
+    notes = {release["title"]: stored[release["key"]]["notes"] for release in releases if release not in pending}
+    manifest_lock = threading.Lock()
+    workers = max(1, args.concurrency)
+
+    def run_release(release):
+        # Each release is mapped, reduced and stored on its own, so one failure does not cost the others.
+        try:
+            text, commits, parts = summarize_release(client, cache, model, call_pool, release,
+                                                       args.chunk_commits, 2 * workers)
+        except Exception as e:
+            print(f"❌ Claude API error in {release['title']}: {e}")
+            return False
+        notes[release["title"]] = text
+        if release["key"] and commits:
+            with manifest_lock:
+                stored[release["key"]] = {
+                    "tag": release["title"],
+                    "date": release["date"],
+                    "model": model,
+                    "prompt": prompt,
+                    "commits": commits,
+                    "notes": text,
+                }
+                save_manifest(manifest)
+        if by_release:
+            print(f"✅ Summarized {release['title']}: {commits} commits in {parts} chunk(s)")
+        return True
+
+    with ThreadPoolExecutor(max_workers=workers) as call_pool, ThreadPoolExecutor(max_workers=workers) as release_pool:
+        finished = context_map(release_pool, run_release, pending)
+    failed = [release["title"] for release, ok in zip(pending, finished) if not ok]
+    if failed:
+        print(f"❌ Not summarized: {', '.join(failed)}; finished releases are kept, run again to retry.")
+        print(cache.summary())
+        print(ledger.summary())
+        if own_cache:
+            cache.close()
+        ledger.close()
+        return 1
+
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
-    output_path = "docs/changelog.md"
+    os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write("# 📝 Changelog\n\n")
-        f.write(f"_Last updated: {timestamp}_\n\n")
-        f.write(notes)
+    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
+        if by_release:
+            f.write(render_changelog(releases, notes, timestamp))
+        else:
+            f.write("# 📝 Changelog\n\n")
+            f.write(f"_Last updated: {timestamp}_\n\n")
+            f.write(notes[releases[0]["title"]])
 
-    print(f"✅ Changelog written to {output_path}")
+    print(f"✅ Changelog written to {OUTPUT_PATH}")
+    print(cache.summary())
+    print(ledger.summary())
+    if own_cache:
+        cache.close()
+    ledger.close()
+    return 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+Module Chunking
+
+Splits oversized Python modules at class and function boundaries with `ast`,
+so each part can be documented on its own next to a shared module header
+(module docstring and imports).
+"""
+
+import ast
+from tokens import approx_tokens
+
+MAX_HEADER_LINES = 200
+
+def node_start(node, lines: list) -> int:
+    """
+    First line of a top-level node, including its decorators and the comment block right above it.
+
+    Args:
+        node: ast node.
+        lines (list): Source lines.
+
+    Returns:
+        int: 1-based line number.
+    """
+    start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+    while start > 1 and lines[start - 2].lstrip().startswith("#"):
+        start -= 1
+    return start
+
+def is_header(node) -> bool:
+    if isinstance(node, (ast.Import, ast.ImportFrom)):
+        return True
+    # The module docstring.
+    return isinstance(node, ast.Expr) and isinstance(getattr(node, "value", None), ast.Constant) \
+        and isinstance(node.value.value, str)
+
+def module_header(source: str, tree=None) -> str:
+    """
+    Collects the module docstring and import statements that every chunk is documented against.
+
+    Args:
+        source (str): Module source.
+        tree: Parsed module, if already available.
+
+    Returns:
+        str: Header source, capped at MAX_HEADER_LINES lines.
+    """
+    tree = tree or ast.parse(source)
+    lines = source.splitlines()
+    header = []
+    for node in tree.body:
+        if is_header(node):
+            header.extend(lines[node.lineno - 1:node.end_lineno])
+    if len(header) > MAX_HEADER_LINES:
+        header = header[:MAX_HEADER_LINES] + [f"# ... {len(header) - MAX_HEADER_LINES} more header lines"]
+    return "\n".join(header)
+
+def node_name(node, start: int) -> str:
+    if getattr(node, "name", None):
+        return node.name
+    if isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+        targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+        return ", ".join(ast.unparse(target) for target in targets)
+    return f"lines {start}-{node.end_lineno}"
+
+def node_units(node, lines: list, max_tokens: int, count) -> list:
+    """
+    Turns a top-level node into documentable units, splitting classes that are too big on their own.
+
+    Returns:
+        list: (name, context, text) tuples; context is the class line for the parts of a split class.
+    """
+    start = node_start(node, lines)
+    text = "\n".join(lines[start - 1:node.end_lineno])
+    name = node_name(node, start)
+    methods = [child for child in getattr(node, "body", [])
+               if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))]
+    if not isinstance(node, ast.ClassDef) or not methods or count(text) <= max_tokens:
+        return [(name, "", text)]
+
+    # Class line, docstring and class attributes stay together; each method becomes its own unit.
+    context = lines[node.lineno - 1].rstrip() + "  # (continued)"
+    first = node_start(methods[0], lines)
+    units = [(name, context, "\n".join(lines[start - 1:first - 1]).rstrip())]
+    bounds = [node_start(child, lines) for child in methods[1:]] + [node.end_lineno + 1]
+    for child, end in zip(methods, bounds):
+        child_start = node_start(child, lines)
+        units.append((f"{name}.{child.name}", context, "\n".join(lines[child_start - 1:end - 1]).rstrip()))
+    return units
+
+def render(units: list) -> str:
+    """
+    Joins units into chunk source, repeating the class line before methods whose class starts in another chunk.
+    """
+    parts = []
+    context = ""
+    for name, unit_context, text in units:
+        # The class head unit itself already starts with the class line.
+        if unit_context and unit_context != context and "." in name:
+            parts.append(unit_context)
+        context = unit_context
+        parts.append(text)
+    return "\n\n".join(parts)
+
+def chunk_title(units: list) -> str:
+    names = [name for name, _, _ in units]
+    if len(names) <= 3:
+        return ", ".join(f"`{name}`" for name in names)
+    return f"`{names[0]}` … `{names[-1]}` ({len(names)} definitions)"
+
+def split_module(source: str, max_tokens: int, count=approx_tokens) -> list:
+    """
+    Splits a module into chunks of at most roughly max_tokens at definition boundaries.
+
+    A single function larger than the budget stays whole; it cannot be split
+    without losing its meaning.
+
+    Args:
+        source (str): Module source.
+        max_tokens (int): Token budget per chunk.
+        count (callable): Token counter for a piece of text.
+
+    Returns:
+        list: Chunks as {"title", "source"} dicts in source order, or None if
+        the module does not parse.
+    """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+    lines = source.splitlines()
+
+    units = []
+    for node in tree.body:
+        if not is_header(node):
+            units.extend(node_units(node, lines, max_tokens, count))
+
+    chunks = []
+    current = []
+    size = 0
+    for unit in units:
+        unit_size = count(unit[2])
+        if current and size + unit_size > max_tokens:
+            chunks.append(current)
+            current, size = [], 0
+        current.append(unit)
+        size += unit_size
+    if current:
+        chunks.append(current)
+
+    return [{"title": chunk_title(chunk), "source": render(chunk)} for chunk in chunks]
@@ -13,10 +13,30 @@ It focuses on:
 
 import os
 import sys
-import anthropic
-from dotenv import load_dotenv
+import argparse
 from datetime import datetime
+import io
 import time
+from llm import complete, stream_to_file, start_ledger, make_client, load_env
+from llm_cache import open_cache
+from discovery import discover_files, describe_skipped
+from tokens import TokenCounter
+from outline import outline, describe_reduction, OUTLINE_NOTE
+from dedup import relative_groups, twins_note, duplicates_report
+
+# Conservative characters-per-token used to bound how much of a file is read.
+CHARS_PER_TOKEN = 4
+
+PROMPT_HEADER = """You are a senior reviewer. Review the following **entire codebase folder** and return insights in **Markdown format**.
+
+Focus on:
+- Code organization
+- Bug patterns
+- Architecture weaknesses
+- Suggestions for modularization and clarity
+
+Files:
+"""
 
 def render_progress(current: int, total: int, width: int = 30) -> str:
     """
@@ -35,99 +55,233 @@ def render_progress(current: int, total: int, width: int = 30) -> str:
     bar = "█" * filled + "-" * (width - filled)
     return f"[{bar}] {int(percent * 100)}%"
 
-def estimate_valid_files(folder: str, valid_exts: tuple) -> list:
+def estimate_valid_files(folder: str, valid_exts: tuple, duplicates: dict = None) -> list:
     """
     Recursively finds all valid source files in a given folder.
 
     Args:
         folder (str): Root directory to search.
         valid_exts (tuple): Acceptable file extensions.
+        duplicates (dict): Optional dict receiving duplicate files left out (see discover_files).
 
     Returns:
         list: List of full file paths.
     """
-    files = []
-    for root, _, filenames in os.walk(folder):
-        for filename in filenames:
-            if filename.endswith(valid_exts):
-                files.append(os.path.join(root, filename))
+    stats = {}
+    files = discover_files(folder, valid_exts, stats=stats, duplicates=duplicates)
+    if stats:
+        print(describe_skipped(stats))
     return files
 
-def main():
-    # === Setup ===
-    load_dotenv()
-    client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-    model = os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-20250514")
+def build_folder_prompt(files: list, folder: str, budget: int, max_file_tokens: int,
+                        counter: TokenCounter, outlines: bool = False, twins: dict = None) -> tuple:
+    """
+    Assembles the single-shot prompt without exceeding the token budget.
 
-    folder = sys.argv[1] if len(sys.argv) > 1 else "../137docs"
-    os.makedirs("output", exist_ok=True)
+    File sizes are checked before reading, at most the remaining budget is read
+    from each file, oversized files are truncated with a note, and assembly stops
+    as soon as the budget is spent. In outline mode each file is read whole and
+    reduced to its outline first.
 
-    valid_exts = (".py", ".js", ".ts", ".tsx", ".jsx")
+    Args:
+        files (list): File paths in review order.
+        folder (str): Folder the paths are relative to.
+        budget (int): Token budget for the whole prompt.
+        max_file_tokens (int): Cap for any single file.
+        counter (TokenCounter): Token counter for the review model.
+        outlines (bool): Send file outlines instead of full sources.
+        twins (dict): Relative canonical path -> [(duplicate path, similarity)], noted under each file.
 
-    files = estimate_valid_files(folder, valid_exts)
+    Returns:
+        tuple: (prompt, reviewed, truncated, omitted) where the last three are lists of relative paths.
+    """
+    buffer = io.StringIO()
+    header = PROMPT_HEADER if not outlines else PROMPT_HEADER.replace("\nFiles:\n", f"\n{OUTLINE_NOTE}\n\nFiles:\n")
+    buffer.write(header)
+    used = counter.count(header)
+    full_tokens = outline_tokens = 0
+    # Keep room for the coverage note appended at the end.
+    budget -= 200
+    reviewed, truncated, omitted = [], [], []
+    start_time = time.time()
     total_files = len(files)
 
-    if total_files == 0:
-        print(f"❌ No valid files found in {folder}")
-        sys.exit(1)
+    for idx, file_path in enumerate(files, start=1):
+        rel_path = os.path.relpath(file_path, folder)
+        allowance = min(max_file_tokens, budget - used)
+        if allowance < 100:
+            omitted.extend(os.path.relpath(path, folder) for path in files[idx - 1:])
+            print(f"⚠️ Token budget reached; leaving out {total_files - idx + 1} remaining files")
+            break
 
-    print(f"🔍 Found {total_files} source files in: {folder}\n")
+        try:
+            if outlines:
+                with open(file_path, "r", errors="replace", newline="") as f:
+                    source = f.read()
+                code = outline(file_path, source)
+                full_tokens += counter.count(source)
+                outline_tokens += counter.count(code)
+                cut = False
+            else:
+                size = os.path.getsize(file_path)
+                limit = allowance * CHARS_PER_TOKEN
+                with open(file_path, "r", errors="replace", newline="") as f:
+                    code = f.read(limit)
+                cut = size > len(code.encode("utf-8"))
 
-    combined = ""
-    reviewed_files = []
-    start_time = time.time()
+            twin_line = f"\n{twins_note(twins[rel_path])}" if twins and rel_path in twins else ""
+            entry = f"\n\n### `{rel_path}`{twin_line}\n```python\n{code}\n```"
+            tokens = counter.count(entry)
+            while tokens > allowance and code:
+                code = code[:int(len(code) * allowance / tokens * 0.9)]
+                code = code[:code.rfind("\n") + 1] if "\n" in code else ""
+                cut = True
+                entry = f"\n\n### `{rel_path}`{twin_line}\n```python\n{code}\n```"
+                tokens = counter.count(entry)
 
-    for idx, file_path in enumerate(files, start=1):
-        try:
-            with open(file_path, "r") as f:
-                code = f.read()
-                rel_path = os.path.relpath(file_path, folder)
-                combined += f"\n\n### `{rel_path}`\n```python\n{code}\n```"
-                reviewed_files.append(rel_path)
+            if cut:
+                entry = f"\n\n### `{rel_path}` (truncated to fit the review budget){twin_line}\n```python\n{code}\n```"
+                truncated.append(rel_path)
+            buffer.write(entry)
+            used += counter.count(entry)
+            reviewed.append(rel_path)
 
             elapsed = time.time() - start_time
             avg_time = elapsed / idx
             remaining = avg_time * (total_files - idx)
             eta = time.strftime("%M:%S", time.gmtime(remaining))
-            print(f"{render_progress(idx, total_files)} ⏱ ETA: {eta} | ✅ {rel_path}")
+            marker = "✂️" if cut else "✅"
+            print(f"{render_progress(idx, total_files)} ⏱ ETA: {eta} | {marker} {rel_path}")
 
         except Exception as e:
             print(f"[ERR] ❌ Error reading {file_path}: {e}")
 
-    prompt = f"""You are a senior reviewer. Review the following **entire codebase folder** and return insights in **Markdown format**.
+    if outlines:
+        print(describe_reduction(full_tokens, outline_tokens))
+    if truncated or omitted:
+        buffer.write("\n\nNote: to fit the review budget, ")
+        buffer.write(f"{len(truncated)} files were truncated and {len(omitted)} files were left out.\n")
 
-Focus on:
-- Code organization
-- Bug patterns
-- Architecture weaknesses
-- Suggestions for modularization and clarity
+    return buffer.getvalue(), reviewed, truncated, omitted
 
-Files:
-{combined}
-"""
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Review a whole folder with Claude in a single prompt.")
+    parser.add_argument("folder", nargs="?", default="../137docs", help="Folder to review.")
+    parser.add_argument("--stream", action="store_true", help="Write the review to disk as it is generated.")
+    parser.add_argument("--echo", action="store_true", help="With --stream, also print the review to stdout.")
+    parser.add_argument("--budget", type=int, default=150000,
+                        help="Maximum prompt size in tokens (default: 150000).")
+    parser.add_argument("--max-file-tokens", type=int, default=20000,
+                        help="Files larger than this many tokens are truncated (default: 20000).")
+    parser.add_argument("--outline", action="store_true",
+                        help="Send signatures, imports and docstrings only, for architecture-level reviews.")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Build the prompt and report its size without calling Claude.")
+    return parser
 
-    try:
-        response = client.messages.create(
-            model=model,
-            max_tokens=2000,
-            messages=[{"role": "user", "content": prompt}]
-        )
+def main(argv: list = None, client=None, cache=None) -> int:
+    """
+    Runs the single-shot folder review.
+
+    Args:
+        argv (list): Command-line arguments (default: sys.argv[1:]).
+        client: Anthropic client to reuse; one is created when needed and omitted.
+        cache (ResponseCache): Response cache to reuse; opened (and closed) here when omitted.
+
+    Returns:
+        int: Exit code.
+    """
+    # === Setup ===
+    args = build_parser().parse_args(argv)
+    load_env()
+    model = os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-20250514")
+
+    folder = args.folder
+    os.makedirs("output", exist_ok=True)
+
+    valid_exts = (".py", ".js", ".ts", ".tsx", ".jsx")
+
+    duplicates = {}
+    files = estimate_valid_files(folder, valid_exts, duplicates)
+    twins = relative_groups(duplicates, folder)
+    total_files = len(files)
 
-        review = response.content[0].text.strip()
-        timestamp = datetime.now().strftime("%Y-%m-%dT%H-%M-%S")
-        out_path = f"output/folder_review_{timestamp}.md"
+    if total_files == 0:
+        print(f"❌ No valid files found in {folder}")
+        return 1
 
-        with open(out_path, "w") as f:
-            f.write(review)
+    print(f"🔍 Found {total_files} source files in: {folder}\n")
+
+    start_time = time.time()
+    counter = TokenCounter(client, model)
+    prompt, reviewed_files, truncated, omitted = build_folder_prompt(
+        files, folder, args.budget, args.max_file_tokens, counter, outlines=args.outline, twins=twins
+    )
+    counter.save()
+
+    if args.dry_run:
+        print(f"\n🧪 Dry run: one review call with ~{counter.count(prompt)} prompt tokens "
+              f"({len(reviewed_files)} files, {len(truncated)} truncated, {len(omitted)} left out).")
+        return 0
+
+    client = client or make_client()
+    own_cache = cache is None
+    if own_cache:
+        cache = open_cache()
+    ledger = start_ledger("folder_review")
+    timestamp = datetime.now().strftime("%Y-%m-%dT%H-%M-%S")
+    out_path = f"output/folder_review_{timestamp}.md"
+
+    try:
+        if args.stream:
+            stream_to_file(
+                client, out_path, cache,
+                item=folder,
+                echo=args.echo,
+                model=model,
+                max_tokens=2000,
+                messages=[{"role": "user", "content": prompt}]
+            )
+        else:
+            review = complete(
+                client, cache,
+                item=folder,
+                model=model,
+                max_tokens=2000,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            with open(out_path, "w") as f:
+                f.write(review)
 
         total_time = time.strftime("%M:%S", time.gmtime(time.time() - start_time))
         print(f"\n✅ Folder review saved to `{out_path}` in {total_time}")
         print("\n📁 Files Reviewed:")
         for path in reviewed_files:
-            print(f"  - {path}")
+            print(f"  - {path}{' (truncated)' if path in truncated else ''}")
+        if omitted:
+            print(f"\n⚠️ Left out to stay within {args.budget} tokens:")
+            for path in omitted:
+                print(f"  - {path}")
+            with open(out_path, "a") as f:
+                f.write("\n\n## ⚠️ Not reviewed\n\nLeft out to stay within the token budget:\n\n")
+                f.write("".join(f"- `{path}`\n" for path in omitted))
+        if twins:
+            print(f"\n🪞 {len(duplicates)} duplicate files were represented by their canonical copies")
+            with open(out_path, "a") as f:
+                f.write(f"\n\n{duplicates_report(twins)}")
 
     except Exception as e:
         print("❌ Claude API error:", e)
+        status = 1
+    else:
+        status = 0
+
+    print(cache.summary())
+    print(ledger.summary())
+    if own_cache:
+        cache.close()
+    ledger.close()
+    return status
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
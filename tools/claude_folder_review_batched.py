@@ -7,10 +7,23 @@ It automatically splits files into ~10k token chunks and stores individual markd
 
 import os
 import sys
-import anthropic
-from dotenv import load_dotenv
+import argparse
 from datetime import datetime
 import time
+from llm import complete, complete_batch, cached_system, repo_overview, start_ledger, make_client, load_env
+from llm_cache import open_cache
+from tokens import TokenCounter
+from discovery import discover_files, describe_skipped
+from outline import outline, describe_reduction, OUTLINE_NOTE
+from dedup import relative_groups, twins_note, duplicates_report
+from journal import open_journal, input_hash
+from imports import import_graph, communities, dependencies_note
+
+# In --batching imports mode each batch keeps at least DEPENDENCY_NOTE_MIN_TOKENS free for its dependency
+# note (enough for a one-line summary); the note may also use whatever room its batch has left, up to
+# DEPENDENCY_NOTE_TOKENS. Reserving the full note size in every batch would cost batches on tightly packed runs.
+DEPENDENCY_NOTE_MIN_TOKENS = 50
+DEPENDENCY_NOTE_TOKENS = 400
 
 def is_excluded(filename: str) -> bool:
     """
@@ -25,112 +38,418 @@ def is_excluded(filename: str) -> bool:
     lower = filename.lower()
     return "test" in lower or lower.startswith("test_") or "/test" in lower or "\\test" in lower
 
-def estimate_tokens(text: str) -> int:
+def format_entry(rel_path: str, code: str, twins: list = None) -> str:
+    """
+    Formats one file as a Markdown section for the prompt.
+
+    Args:
+        rel_path (str): Path relative to the reviewed folder.
+        code (str): File contents.
+        twins (list): (path, similarity) tuples of duplicates this file stands for.
+
+    Returns:
+        str: Markdown entry.
+    """
+    note = f"\n{twins_note(twins)}" if twins else ""
+    return f"\n\n### `{rel_path}`{note}\n```python\n{code}\n```"
+
+def fit_entry(rel_path: str, code: str, budget: int, counter: TokenCounter, twins: list = None) -> tuple:
     """
-    Estimates token count from text based on average token size.
+    Formats a file entry, truncating it at a line boundary when it alone exceeds the budget.
 
     Args:
-        text (str): Source content.
+        rel_path (str): Path relative to the reviewed folder.
+        code (str): File contents.
+        budget (int): Token budget for a whole batch of entries.
+        counter (TokenCounter): Token counter for the target model.
+        twins (list): (path, similarity) tuples of duplicates this file stands for.
 
     Returns:
-        int: Estimated token count.
+        tuple: (entry, tokens) with tokens <= budget.
+    """
+    entry = format_entry(rel_path, code, twins)
+    tokens = counter.count(entry)
+    lines = code.splitlines()
+    total_lines = len(lines)
+
+    while tokens > budget and lines:
+        keep = max(0, int(len(lines) * budget / tokens * 0.9))
+        lines = lines[:keep] if keep < len(lines) else lines[:-1]
+        note = f"\n# ... truncated by Nautee: showing {len(lines)} of {total_lines} lines to fit the batch budget"
+        entry = format_entry(rel_path, "\n".join(lines) + note, twins)
+        tokens = counter.count(entry)
+
+    return entry, tokens
+
+def pack_groups(groups: list, budget: int) -> list:
     """
-    return int(len(text) / 4)
+    Places groups of entries into as few batches as possible with first-fit-decreasing.
+
+    Args:
+        groups (list): (tokens, [(rel_path, entry, tokens), ...]) tuples, each within the budget.
+        budget (int): Token budget per batch.
+
+    Returns:
+        list: Batches as lists of relative paths, ordered by path.
+    """
+    bins = []
+    for size, members in sorted(groups, key=lambda g: (-g[0], g[1][0][0])):
+        for b in bins:
+            if b[0] + size <= budget:
+                b[0] += size
+                b[1].extend(members)
+                break
+        else:
+            bins.append([size, list(members)])
+
+    batches = [sorted(members) for _, members in bins]
+    batches.sort(key=lambda members: members[0][0])
+    return [[rel_path for rel_path, _, _ in members] for members in batches]
+
+def pack_batches(entries: list, budget: int) -> list:
+    """
+    Packs file entries into as few batches as possible without exceeding the budget.
+
+    Files from the same directory stay together whenever the directory fits in one
+    batch; larger directories are split into consecutive runs. The resulting groups
+    are placed with first-fit-decreasing.
+
+    Args:
+        entries (list): (rel_path, entry, tokens) tuples, each within the budget.
+        budget (int): Token budget per batch.
+
+    Returns:
+        list: Batches as lists of relative paths, ordered by path.
+    """
+    by_dir = {}
+    for item in sorted(entries):
+        by_dir.setdefault(os.path.dirname(item[0]), []).append(item)
+
+    groups = []
+    for members in by_dir.values():
+        run, run_tokens = [], 0
+        for item in members:
+            if run and run_tokens + item[2] > budget:
+                groups.append((run_tokens, run))
+                run, run_tokens = [], 0
+            run.append(item)
+            run_tokens += item[2]
+        if run:
+            groups.append((run_tokens, run))
+
+    return pack_groups(groups, budget)
+
+def pack_by_imports(entries: list, budget: int, edges: dict) -> list:
+    """
+    Packs file entries so that modules importing each other share a batch.
+
+    The import graph is cut into token-bounded communities (see imports.communities),
+    which are then placed with first-fit-decreasing like directory groups.
+
+    Args:
+        entries (list): (rel_path, entry, tokens) tuples, each within the budget.
+        budget (int): Token budget per batch.
+        edges (dict): rel_path -> set of imported rel_paths, from imports.import_graph().
+
+    Returns:
+        list: Batches as lists of relative paths, ordered by path.
+    """
+    by_path = {item[0]: item for item in entries}
+    groups = []
+    for members in communities(edges, {rel_path: tokens for rel_path, _, tokens in entries}, budget):
+        items = [by_path[rel_path] for rel_path in members]
+        groups.append((sum(tokens for _, _, tokens in items), items))
+    return pack_groups(groups, budget)
+
+def resume_plan(previous: list, entries: list, budget: int, pack=pack_batches) -> list:
+    """
+    Keeps the batches of an interrupted run so batch numbers (and output files) stay stable.
+
+    Files that disappeared leave their batch smaller (or empty, keeping its number);
+    new files are packed into batches appended after the old ones.
+
+    Args:
+        previous (list): Batches as lists of relative paths, from the run journal.
+        entries (list): Current (rel_path, entry, tokens) tuples.
+        budget (int): Token budget per batch.
+        pack (callable): Packs the new files, called as pack(entries, budget).
+
+    Returns:
+        list: Batches as lists of relative paths.
+    """
+    present = {rel_path for rel_path, _, _ in entries}
+    plan = [[rel_path for rel_path in batch if rel_path in present] for batch in previous]
+    planned = {rel_path for batch in plan for rel_path in batch}
+    return plan + pack([item for item in entries if item[0] not in planned], budget)
+
+REVIEW_INSTRUCTIONS = """You are a senior reviewer. Review the batch of files from a codebase folder in the user message and return insights in **Markdown format**.
 
-def main():
+Focus on:
+- Code organization
+- Bug patterns
+- Architecture weaknesses
+- Suggestions for modularization and clarity"""
+
+def build_prompt(batch: list, dependencies: str = "") -> str:
+    """
+    Joins a batch of file entries into the per-batch user message.
+
+    Args:
+        batch (list): Markdown-formatted file entries.
+        dependencies (str): Optional note on what the batch imports from outside itself.
+
+    Returns:
+        str: The user message for the batch.
+    """
+    note = f"{dependencies}\n\n" if dependencies else ""
+    return f"{note}Files:\n{''.join(batch)}\n"
+
+def batch_review_path(output_root: str, i: int) -> str:
+    return f"{output_root}/folder_review_batch_{i:02d}.md"
+
+def write_batch_review(output_root: str, i: int, review: str) -> str:
+    """
+    Writes one batch review to its numbered Markdown file.
+
+    Args:
+        output_root (str): Directory holding the batch reviews.
+        i (int): 1-based batch number.
+        review (str): Markdown review text.
+
+    Returns:
+        str: Path of the written file.
+    """
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
+    out_path = batch_review_path(output_root, i)
+
+    with open(out_path, "w") as f:
+        f.write(f"# 📦 Folder Review Batch {i}\n\n")
+        f.write(f"_Last updated: {timestamp}_\n\n")
+        f.write(review)
+
+    return out_path
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Review a folder with Claude in ~10k token batches.")
+    parser.add_argument("folder", nargs="?", default="../137docs", help="Folder to review.")
+    parser.add_argument("--submit-batch", action="store_true",
+                        help="Send all batches as one Message Batches job instead of sequential calls.")
+    parser.add_argument("--poll-interval", type=float, default=30,
+                        help="Seconds between status checks in --submit-batch mode (default: 30).")
+    parser.add_argument("--no-overview", action="store_true",
+                        help="Do not send the project file tree and README as shared context.")
+    parser.add_argument("--outline", action="store_true",
+                        help="Send signatures, imports and docstrings only, for architecture-level reviews.")
+    parser.add_argument("--batching", choices=("directory", "imports"), default=os.getenv("NAUTEE_BATCHING", "directory"),
+                        help="Group files by directory, or by import graph so coupled modules share a batch "
+                             "(default: NAUTEE_BATCHING or directory).")
+    parser.add_argument("--resume", action="store_true",
+                        help="Finish an interrupted run: keep its batches and skip the ones already reviewed.")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Plan the batches and report their size without calling Claude.")
+    return parser
+
+def main(argv: list = None, client=None, cache=None) -> int:
+    """
+    Runs the batched folder review.
+
+    Args:
+        argv (list): Command-line arguments (default: sys.argv[1:]).
+        client: Anthropic client to reuse; one is created when needed and omitted.
+        cache (ResponseCache): Response cache to reuse; opened (and closed) here when omitted.
+
+    Returns:
+        int: Exit code.
+    """
     # === Setup ===
-    load_dotenv()
-    client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+    args = build_parser().parse_args(argv)
+    load_env()
     model = os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-20250514")
+    if not args.dry_run:
+        client = client or make_client()
 
-    folder = sys.argv[1] if len(sys.argv) > 1 else "../137docs"
+    folder = args.folder
     output_root = "docs/folder_review"
     os.makedirs(output_root, exist_ok=True)
 
     valid_exts = (".py", ".js", ".ts", ".tsx", ".jsx", ".html", ".css", ".json", ".go", ".java", ".yaml", ".yml")
 
     # === Discover Files ===
-    files = []
-    for root, _, filenames in os.walk(folder):
-        for filename in filenames:
-            full_path = os.path.join(root, filename)
-            if filename.endswith(valid_exts) and not is_excluded(full_path):
-                files.append(full_path)
+    stats = {}
+    duplicates = {}
+    files = discover_files(folder, valid_exts, skip=is_excluded, stats=stats, duplicates=duplicates)
+    if stats:
+        print(describe_skipped(stats))
+    twins = relative_groups(duplicates, folder)
 
     if not files:
         print(f"❌ No valid files found in {folder}")
-        sys.exit(1)
+        return 1
 
     print(f"🔍 Found {len(files)} valid source files in: {folder}\n")
 
     # === Token Batching ===
     MAX_TOKENS = 10000
-    batches = []
-    current_batch = []
-    current_tokens = 0
+    sources = []
 
     for file_path in files:
         try:
             with open(file_path, "r") as f:
                 code = f.read()
-            rel_path = os.path.relpath(file_path, folder)
-            entry = f"\n\n### `{rel_path}`\n```python\n{code}\n```"
-            est = estimate_tokens(entry)
-
-            if current_tokens + est > MAX_TOKENS:
-                batches.append(current_batch)
-                current_batch = [entry]
-                current_tokens = est
-            else:
-                current_batch.append(entry)
-                current_tokens += est
+            sources.append((os.path.relpath(file_path, folder), code))
         except Exception as e:
             print(f"[ERR] ❌ Error reading {file_path}: {e}")
 
-    if current_batch:
-        batches.append(current_batch)
+    counter = TokenCounter(client, model)
+    counter.calibrate([format_entry(rel_path, code) for rel_path, code in sources])
+    instructions = REVIEW_INSTRUCTIONS
+    by_imports = args.batching == "imports"
+    if by_imports:
+        # Read imports from the full sources, before any outlining.
+        edges, external = import_graph(sources)
+        links = sum(len(targets) for targets in edges.values())
+        print(f"🕸️ Import graph: {links} links between {sum(1 for t in edges.values() if t)} importing files")
+    if args.outline:
+        before = sum(counter.count(code) for _, code in sources)
+        sources = [(rel_path, outline(rel_path, code)) for rel_path, code in sources]
+        print(describe_reduction(before, sum(counter.count(code) for _, code in sources)))
+        instructions = f"{REVIEW_INSTRUCTIONS}\n\n{OUTLINE_NOTE}"
+    # Leave room for the instructions and a margin for estimation error.
+    overview = "" if args.no_overview else repo_overview(folder, files)
+    system = cached_system(instructions, overview)
+    # The overview is a cached prefix shared by every batch, so only the instructions count against the budget.
+    budget = int((MAX_TOKENS - counter.count(instructions + build_prompt([]))) * 0.95)
+    if by_imports:
+        # Keep room for at least a short note on each batch's outside dependencies.
+        budget -= DEPENDENCY_NOTE_MIN_TOKENS
 
-    # === Run Batches ===
-    start_time = time.time()
+    entries = []
+    for rel_path, code in sources:
+        entry, tokens = fit_entry(rel_path, code, budget, counter, twins.get(rel_path))
+        entries.append((rel_path, entry, tokens))
+    counter.save()
 
-    for i, batch in enumerate(batches, start=1):
-        print(f"📦 Processing batch {i} of {len(batches)}...")
+    # The journal records the batch plan and each finished batch, so --resume can pick up where a run stopped.
+    journal = open_journal("folder_review_batched", folder, resume=args.resume)
+    pack = (lambda items, size: pack_by_imports(items, size, edges)) if by_imports else pack_batches
+    if args.resume and journal.plan:
+        plan = resume_plan(journal.plan, entries, budget, pack)
+    else:
+        plan = pack(entries, budget)
+    entry_by_path = {rel_path: entry for rel_path, entry, _ in entries}
+    tokens_by_path = {rel_path: tokens for rel_path, _, tokens in entries}
+    batches = [[entry_by_path[rel_path] for rel_path in batch] for batch in plan]
+    batch_of = {rel_path: i for i, batch in enumerate(plan, start=1) for rel_path in batch}
+    notes = []
+    for batch in plan:
+        if not by_imports:
+            notes.append("")
+            continue
+        # The note gets the reserved minimum plus whatever room the batch left.
+        room = budget + DEPENDENCY_NOTE_MIN_TOKENS - sum(tokens_by_path[rel_path] for rel_path in batch)
+        notes.append(dependencies_note(batch, edges, external, batch_of, counter=counter,
+                                       max_tokens=min(room, DEPENDENCY_NOTE_TOKENS)))
+    prompts = [build_prompt(batch, note) for batch, note in zip(batches, notes)]
+    # The overview is left out: it changes whenever a file is added, which would invalidate every finished batch.
+    digests = [input_hash(model, instructions, prompt) for prompt in prompts]
+    pending = [i for i, batch in enumerate(batches, start=1)
+               if batch and not (journal.is_done(f"batch-{i:02d}", digests[i - 1])
+                                 and os.path.exists(batch_review_path(output_root, i)))]
+    total_tokens = sum(tokens for _, _, tokens in entries)
+    if batches:
+        fill = total_tokens / (len(batches) * budget) * 100
+        print(f"🧮 Packed ~{total_tokens} tokens into {len(batches)} batches ({fill:.0f}% full)\n")
 
-        prompt = f"""You are a senior reviewer. Review the following batch of files from a codebase folder and return insights in **Markdown format**.
-
-Focus on:
-- Code organization
-- Bug patterns
-- Architecture weaknesses
-- Suggestions for modularization and clarity
+    if args.dry_run:
+        for i, batch in enumerate(batches, 1):
+            outside = ""
+            if by_imports:
+                imported = {target for rel_path in plan[i - 1] for target in edges[rel_path]} - set(plan[i - 1])
+                outside = f", imports {len(imported)} modules from other batches"
+            print(f"📦 Batch {i}: {len(batch)} files{outside}" + ("" if i in pending else " (already reviewed)"))
+        return 0
 
-Files:
-{''.join(batch)}
-"""
+    journal.set_plan(plan)
+    reviewed = sum(1 for i, batch in enumerate(batches, start=1) if batch and i not in pending)
+    if reviewed:
+        print(f"⏭️ {reviewed} batches already reviewed; {len(pending)} to go\n")
 
-        try:
-            response = client.messages.create(
-                model=model,
-                max_tokens=2000,
-                messages=[{"role": "user", "content": prompt}]
-            )
+    duplicates_path = os.path.join(output_root, "duplicates.md")
+    if twins:
+        with open(duplicates_path, "w") as f:
+            f.write(duplicates_report(twins))
+        print(f"🪞 {len(duplicates)} duplicate files folded into their canonical copies; see {duplicates_path}\n")
+    elif os.path.exists(duplicates_path):
+        os.remove(duplicates_path)
 
-            review = response.content[0].text.strip()
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
-            out_path = f"{output_root}/folder_review_batch_{i:02d}.md"
+    # === Run Batches ===
+    start_time = time.time()
+    own_cache = cache is None
+    cache = cache or open_cache()
+    ledger = start_ledger("folder_review_batched")
 
-            with open(out_path, "w") as f:
-                f.write(f"# 📦 Folder Review Batch {i}\n\n")
-                f.write(f"_Last updated: {timestamp}_\n\n")
-                f.write(review)
+    failed = []
+    if args.submit_batch:
+        requests = {
+            f"batch-{i:02d}": {
+                "model": model,
+                "max_tokens": 2000,
+                "system": system,
+                "messages": [{"role": "user", "content": prompts[i - 1]}],
+            }
+            for i in pending
+        }
+        try:
+            reviews = complete_batch(client, requests, cache=cache, poll_interval=args.poll_interval)
+        except Exception as e:
+            print(f"❌ Message batch failed: {e}")
+            reviews = {}
 
+        for i in pending:
+            review = reviews.get(f"batch-{i:02d}")
+            if review is None:
+                print(f"❌ No result for batch {i}")
+                journal.record(f"batch-{i:02d}", digests[i - 1], status="failed", files=plan[i - 1])
+                failed.append(i)
+                continue
+            out_path = write_batch_review(output_root, i, review)
+            journal.record(f"batch-{i:02d}", digests[i - 1], files=plan[i - 1])
             print(f"✅ Batch {i} saved to {out_path}")
+    else:
+        for i in pending:
+            print(f"📦 Processing batch {i} of {len(batches)}...")
 
-        except Exception as e:
-            print(f"❌ Claude API error in batch {i}: {e}")
+            try:
+                review = complete(
+                    client, cache,
+                    item=f"batch-{i:02d}",
+                    model=model,
+                    max_tokens=2000,
+                    system=system,
+                    messages=[{"role": "user", "content": prompts[i - 1]}]
+                )
+                out_path = write_batch_review(output_root, i, review)
+                journal.record(f"batch-{i:02d}", digests[i - 1], files=plan[i - 1])
+                print(f"✅ Batch {i} saved to {out_path}")
+
+            except Exception as e:
+                print(f"❌ Claude API error in batch {i}: {e}")
+                journal.record(f"batch-{i:02d}", digests[i - 1], status="failed", files=plan[i - 1])
+                failed.append(i)
 
     total_time = time.strftime("%M:%S", time.gmtime(time.time() - start_time))
     print(f"🎉 All batches complete in {total_time}")
+    print(cache.summary())
+    print(ledger.summary())
+    if own_cache:
+        cache.close()
+    ledger.close()
+    journal.close()
+    if failed:
+        print(f"❌ Batches without a review after retries: {', '.join(str(i) for i in failed)}")
+        print("↩️ Run again with --resume to retry only these batches.")
+        return 1
+    return 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -7,10 +7,26 @@ Outputs a single Markdown file with structured feedback.
 
 import os
 import sys
-import anthropic
-from dotenv import load_dotenv
+import argparse
 from datetime import datetime
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from llm import complete, stream_to_file, start_ledger, make_client, load_env, context_map
+from llm_cache import open_cache
+from tokens import TokenCounter, approx_tokens
+
+DIFF_PROMPT = '''You are a senior code reviewer. Please review the following GitHub diff and return your structured feedback in **Markdown format**.
+
+```diff
+{diff}
+```'''
+
+SHARD_PROMPT = '''You are a senior code reviewer. This is part {part} of {parts} of a larger GitHub diff; other parts are reviewed separately.
+Please review the changes below and return your structured feedback in **Markdown format**.
+
+```diff
+{diff}
+```'''
 
 def load_code(file_paths):
     """
@@ -49,17 +65,166 @@ def get_git_diff():
         except subprocess.CalledProcessError:
             return ""
 
-def main():
+def parse_diff(diff: str) -> list:
+    """
+    Splits a unified git diff into per-file units.
+
+    Args:
+        diff (str): Output of `git diff`.
+
+    Returns:
+        list: (path, header, hunks) tuples in diff order, where header holds the
+        `diff --git`/`---`/`+++` lines and hunks is a list of `@@` sections.
+    """
+    files = []
+    for chunk in ("\n" + diff).split("\ndiff --git ")[1:]:
+        lines = ("diff --git " + chunk).splitlines(keepends=True)
+        path = lines[0].split(" b/", 1)[-1].strip()
+        header, hunks = [], []
+        for line in lines:
+            if line.startswith("@@"):
+                hunks.append([line])
+            elif hunks:
+                hunks[-1].append(line)
+            else:
+                header.append(line)
+        files.append((path, "".join(header), ["".join(h) for h in hunks]))
+    return files
+
+def truncate_hunk(piece: str, tokens: int, budget: int, counter: TokenCounter) -> tuple:
+    """
+    Cuts a diff piece down until it fits the budget, at a line boundary when one is
+    close and by characters otherwise (e.g. a hunk of a few very long lines).
+
+    Args:
+        piece (str): File header plus one hunk.
+        tokens (int): Token count of piece.
+        budget (int): Token budget per shard.
+        counter (TokenCounter): Token counter for the review model.
+
+    Returns:
+        tuple: (truncated piece, tokens).
+    """
+    note = "\n... hunk truncated by Nautee to fit the shard budget\n"
+    text = piece
+    while tokens > budget and text:
+        keep = min(len(text) - 1, int(len(text) * budget / tokens * 0.9))
+        cut = text.rfind("\n", 0, keep) + 1
+        text = text[:cut] if cut > keep // 2 else text[:keep]
+        piece = text + note
+        tokens = counter.count(piece)
+    return piece, tokens
+
+def shard_diff(files: list, budget: int, counter: TokenCounter) -> list:
+    """
+    Packs per-file diff units into token-bounded shards, preserving diff order.
+
+    A file that does not fit in one shard is split at hunk boundaries (each piece
+    repeats the file header); a single hunk that is still too large is truncated
+    (see truncate_hunk), so every unit fits the budget.
+
+    Args:
+        files (list): Output of parse_diff().
+        budget (int): Token budget per shard.
+        counter (TokenCounter): Token counter for the review model.
+
+    Returns:
+        list: Shards as lists of (path, diff_text) units.
+    """
+    units = []
+    for path, header, hunks in files:
+        whole = header + "".join(hunks)
+        if counter.count(whole) <= budget:
+            units.append((path, whole, counter.count(whole)))
+            continue
+        for hunk in hunks:
+            piece = header + hunk
+            tokens = counter.count(piece)
+            if tokens > budget:
+                piece, tokens = truncate_hunk(piece, tokens, budget, counter)
+            units.append((path, piece, tokens))
+
+    shards, current, used = [], [], 0
+    for path, text, tokens in units:
+        if current and used + tokens > budget:
+            shards.append(current)
+            current, used = [], 0
+        current.append((path, text))
+        used += tokens
+    if current:
+        shards.append(current)
+    return shards
+
+def review_shards(client, cache, model: str, shards: list, concurrency: int) -> list:
+    """
+    Reviews diff shards in parallel.
+
+    Args:
+        client: Anthropic client.
+        cache (ResponseCache): Shared response cache.
+        model (str): Model name.
+        shards (list): Output of shard_diff().
+        concurrency (int): Maximum number of shards in flight.
+
+    Returns:
+        list: (files, review, error) tuples in shard order.
+    """
+    def review(numbered):
+        part, shard = numbered
+        files = list(dict.fromkeys(path for path, _ in shard))
+        prompt = SHARD_PROMPT.format(part=part, parts=len(shards), diff="".join(text for _, text in shard))
+        try:
+            text = complete(
+                client, cache,
+                item=f"part-{part}",
+                model=model,
+                max_tokens=1500,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            print(f"✅ Reviewed part {part} of {len(shards)}")
+            return files, text, None
+        except Exception as e:
+            print(f"❌ Claude API error in part {part}: {e}")
+            return files, None, e
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        return context_map(pool, review, enumerate(shards, start=1))
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Review files or the current git diff with Claude.")
+    parser.add_argument("files", nargs="*", help="Files to review (default: the git diff).")
+    parser.add_argument("--stream", action="store_true",
+                        help="Write the review to disk as it is generated (not with a diff split into parts).")
+    parser.add_argument("--echo", action="store_true", help="With --stream, also print the review to stdout.")
+    parser.add_argument("--shard-tokens", type=int, default=12000,
+                        help="Token budget per diff shard; larger diffs are reviewed in parallel parts.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Diff shards reviewed in parallel (default: 4).")
+    parser.add_argument("--dry-run", action="store_true", help="Show what would be reviewed without calling Claude.")
+    return parser
+
+def main(argv: list = None, client=None, cache=None) -> int:
+    """
+    Runs the review.
+
+    Args:
+        argv (list): Command-line arguments (default: sys.argv[1:]).
+        client: Anthropic client to reuse; one is created when needed and omitted.
+        cache (ResponseCache): Response cache to reuse; opened (and closed) here when omitted.
+
+    Returns:
+        int: Exit code.
+    """
     # === Setup ===
-    load_dotenv()
-    client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+    args = build_parser().parse_args(argv)
+    load_env()
     model = os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-20250514")
 
     os.makedirs("docs", exist_ok=True)
     output_path = "docs/claude_review.md"
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
 
-    file_paths = sys.argv[1:]
+    file_paths = args.files
+    shards = []
 
     # === MODE 1: Manual File Review ===
     if file_paths:
@@ -80,37 +245,102 @@ Code:
     else:
         diff = get_git_diff()
         if not diff:
+            if args.dry_run:
+                print("🧪 Dry run: no diff to review.")
+                return 0
             review_text = "# 🧠 Claude Review\n\n⚠️ No diff available — skipping review."
             with open(output_path, "w") as f:
                 f.write(review_text)
             print(f"📝 Stub review saved to `{output_path}`")
-            sys.exit(0)
+            return 0
 
-        prompt = f'''You are a senior code reviewer. Please review the following GitHub diff and return your structured feedback in **Markdown format**.
+        client = client or (None if args.dry_run else make_client())
+        counter = TokenCounter(client, model)
+        shards = shard_diff(parse_diff(diff), args.shard_tokens, counter)
+        counter.save()
+        # Even a single shard may have been trimmed to the budget, so the prompt is built from it, not the raw diff.
+        prompt = DIFF_PROMPT.format(diff="".join(text for _, text in shards[0]) if shards else diff)
+        if len(shards) > 1 and (args.stream or args.echo):
+            print(f"❌ --stream/--echo are not supported when the diff is reviewed in parts ({len(shards)} here); "
+                  f"drop them or raise --shard-tokens.")
+            return 2
 
-```diff
-{diff}
-```'''
+    if args.dry_run:
+        if len(shards) > 1:
+            for part, shard in enumerate(shards, start=1):
+                files = list(dict.fromkeys(path for path, _ in shard))
+                print(f"🧪 Part {part}: " + ", ".join(files))
+            print(f"\n🧪 Dry run: the diff would be reviewed in {len(shards)} parts.")
+        else:
+            print(f"🧪 Dry run: one review call with a ~{approx_tokens(prompt)} token prompt.")
+        return 0
 
-    # === Claude API Call ===
-    try:
-        response = client.messages.create(
-            model=model,
-            max_tokens=1500,
-            messages=[{"role": "user", "content": prompt}]
-        )
+    client = client or make_client()
+    own_cache = cache is None
+    if own_cache:
+        cache = open_cache()
+    ledger = start_ledger("claude_review")
+
+    if len(shards) > 1:
+        print(f"🧩 Diff split into {len(shards)} shards")
+        results = review_shards(client, cache, model, shards, args.concurrency)
+        print(cache.summary())
+        print(ledger.summary())
+        if own_cache:
+            cache.close()
+        ledger.close()
 
-        review_text = response.content[0].text.strip()
         with open(output_path, "w") as f:
             f.write(f"# 🧠 Claude Review\n\n")
             f.write(f"_Last updated: {timestamp}_\n\n")
-            f.write(review_text)
+            f.write(f"_Diff reviewed in {len(shards)} parts._\n")
+            for part, (files, review_text, error) in enumerate(results, start=1):
+                f.write(f"\n## Part {part}: " + ", ".join(f"`{path}`" for path in files) + "\n\n")
+                f.write(review_text if error is None else f"⚠️ Review failed for this part: {error}")
+                f.write("\n")
 
         print(f"✅ Markdown review saved to `{output_path}`")
+        return 1 if any(error is not None for _, _, error in results) else 0
+
+    # === Claude API Call ===
+    item = "files" if file_paths else "diff"
+    header = f"# 🧠 Claude Review\n\n_Last updated: {timestamp}_\n\n"
+    try:
+        if args.stream:
+            stream_to_file(
+                client, output_path, cache,
+                item=item,
+                header=header,
+                echo=args.echo,
+                model=model,
+                max_tokens=1500,
+                messages=[{"role": "user", "content": prompt}]
+            )
+        else:
+            review_text = complete(
+                client, cache,
+                item=item,
+                model=model,
+                max_tokens=1500,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            with open(output_path, "w") as f:
+                f.write(header)
+                f.write(review_text)
+
+        print(f"✅ Markdown review saved to `{output_path}`")
+        return 0
 
     except Exception as e:
         print("❌ Claude API error:", e)
-        sys.exit(1)
+        return 1
+
+    finally:
+        print(cache.summary())
+        print(ledger.summary())
+        if own_cache:
+            cache.close()
+        ledger.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
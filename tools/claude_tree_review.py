@@ -0,0 +1,405 @@
+"""
+Claude Tree Review
+
+Reviews a folder the way it is laid out. The files of each directory are
+reviewed in ~10k token batches, all in parallel. The reviews are then rolled
+up directory by directory, deepest first. Each parent's review is a synthesis
+of its own files' reviews and its subdirectories' reviews, and the top-level
+roll-up is a single project-level review. Latency grows with the depth of the
+tree rather than the number of files.
+
+Every directory review is stored with a hash of its whole subtree (the sources
+below it, the model and the prompts), so after a change only the directories
+on the path from the changed files to the root are reviewed again.
+
+Output: docs/folder_review/project_review.md and one review per directory in
+docs/folder_review/tree/.
+"""
+
+import os
+import sys
+import json
+import argparse
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from llm import complete, cached_system, repo_overview, start_ledger, make_client, load_env, context_map
+from llm_cache import open_cache
+from tokens import TokenCounter
+from discovery import discover_files, describe_skipped
+from outline import outline, describe_reduction, OUTLINE_NOTE
+from dedup import relative_groups
+from journal import input_hash
+from claude_folder_review_batched import is_excluded, format_entry, fit_entry, pack_batches, build_prompt, REVIEW_INSTRUCTIONS
+
+# Token budget of a file batch (as in the batched review) and of a roll-up prompt.
+MAX_TOKENS = 10000
+ROLLUP_TOKENS = 30000
+MANIFEST_NAME = "manifest.json"
+
+ROLLUP_INSTRUCTIONS = """You are a senior reviewer. The user message holds reviews of the files and subdirectories of one directory of a codebase.
+Synthesize them into one review of the directory as a whole, in **Markdown format**:
+- How its parts fit together and where the boundaries are unclear
+- Bug patterns and weaknesses that recur across the parts
+- The most important individual findings, with file paths
+- Concrete suggestions for modularization and clarity
+
+Keep it concise: it is rolled up again into the review of the parent directory."""
+
+PROJECT_INSTRUCTIONS = """You are a senior reviewer. The user message holds reviews of the top-level files and directories of a codebase.
+Synthesize them into one project-level review in **Markdown format**:
+- Overall architecture and code organization
+- Cross-cutting bug patterns and architecture weaknesses
+- The most important findings, with file paths
+- A prioritized list of suggestions for modularization and clarity"""
+
+def build_tree(rel_paths: list) -> dict:
+    """
+    Groups files into a directory tree, skipping directories that only lead to one subdirectory.
+
+    Args:
+        rel_paths (list): File paths relative to the reviewed folder.
+
+    Returns:
+        dict: Directory ("" for the root) -> {"files": [...], "children": [...]}, for
+        the root and every directory that holds files or joins several subtrees.
+    """
+    files, children = {"": []}, {"": set()}
+    for rel_path in sorted(rel_paths):
+        directory = os.path.dirname(rel_path)
+        files.setdefault(directory, []).append(rel_path)
+        while directory:
+            parent = os.path.dirname(directory)
+            children.setdefault(parent, set()).add(directory)
+            directory = parent
+
+    def collapse(directory):
+        # Follow chains like src/ -> src/pkg/ to the first directory worth a review of its own.
+        while directory and not files.get(directory) and len(children.get(directory, ())) == 1:
+            directory = next(iter(children[directory]))
+        return directory
+
+    tree = {}
+    pending = [""]
+    while pending:
+        directory = pending.pop()
+        kids = sorted(collapse(child) for child in children.get(directory, ()))
+        tree[directory] = {"files": files.get(directory, []), "children": kids}
+        pending.extend(kids)
+    return tree
+
+def heights(tree: dict) -> dict:
+    """
+    Distance of every directory from its deepest descendant; directories of equal height can run in parallel.
+    """
+    result = {}
+
+    def height(directory):
+        if directory not in result:
+            result[directory] = 1 + max((height(child) for child in tree[directory]["children"]), default=-1)
+        return result[directory]
+
+    height("")
+    return result
+
+def subtree_hashes(tree: dict, entries: dict, model: str, instructions: str) -> dict:
+    """
+    Hashes every directory from its own files and its children's hashes, so a change anywhere below a directory changes its hash.
+
+    Args:
+        tree (dict): From build_tree().
+        entries (dict): Relative path -> formatted prompt entry.
+        model (str): Review model.
+        instructions (str): File review instructions.
+
+    Returns:
+        dict: Directory -> hash.
+    """
+    result = {}
+    for directory in sorted(tree, key=lambda d: -d.count("/") - (d != "")):
+        node = tree[directory]
+        result[directory] = input_hash(
+            model, instructions, ROLLUP_INSTRUCTIONS, PROJECT_INSTRUCTIONS, directory,
+            [entries[rel_path] for rel_path in node["files"]],
+            [(child, result[child]) for child in node["children"]],
+        )
+    return result
+
+def label(directory: str) -> str:
+    return f"`{directory}/`" if directory else "the project root"
+
+def rollup_prompt(directory: str, parts: list) -> str:
+    """
+    Joins (heading, review) parts into the user message of a directory roll-up.
+    """
+    sections = "".join(f"\n\n## {heading}\n\n{review.strip()}" for heading, review in parts)
+    return f"Directory: {label(directory)}{sections}\n"
+
+def review_path(output_root: str, directory: str) -> str:
+    if not directory:
+        return os.path.join(output_root, "project_review.md")
+    return os.path.join(output_root, "tree", f"{directory}.md")
+
+def write_review(output_root: str, directory: str, review: str) -> str:
+    """
+    Writes one directory's review (the project review for the root).
+
+    Returns:
+        str: Path of the written file.
+    """
+    out_path = review_path(output_root, directory)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
+    title = "🌳 Project Review" if not directory else f"📂 Review of `{directory}/`"
+    with open(out_path, "w") as f:
+        f.write(f"# {title}\n\n")
+        f.write(f"_Last updated: {timestamp}_\n\n")
+        f.write(review)
+    return out_path
+
+def load_manifest(path: str) -> dict:
+    if os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable tree review manifest: {e}")
+    return {"nodes": {}}
+
+def save_manifest(path: str, manifest: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Review a folder directory by directory and roll the reviews up into one project review.")
+    parser.add_argument("folder", nargs="?", default="../137docs", help="Folder to review.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Calls in flight at once (default: 4).")
+    parser.add_argument("--no-overview", action="store_true",
+                        help="Do not send the project file tree and README as shared context.")
+    parser.add_argument("--outline", action="store_true",
+                        help="Send signatures, imports and docstrings only, for architecture-level reviews.")
+    parser.add_argument("--full", action="store_true", help="Review every directory again, ignoring stored reviews.")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Plan the tree and report the calls needed without calling Claude.")
+    return parser
+
+def main(argv: list = None, client=None, cache=None) -> int:
+    """
+    Runs the tree review.
+
+    Args:
+        argv (list): Command-line arguments (default: sys.argv[1:]).
+        client: Anthropic client to reuse; one is created when needed and omitted.
+        cache (ResponseCache): Response cache to reuse; opened (and closed) here when omitted.
+
+    Returns:
+        int: Exit code.
+    """
+    # === Setup ===
+    args = build_parser().parse_args(argv)
+    load_env()
+    model = os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-20250514")
+    if not args.dry_run:
+        client = client or make_client()
+
+    folder = args.folder
+    output_root = "docs/folder_review"
+    manifest_path = os.path.join(output_root, "tree", MANIFEST_NAME)
+
+    valid_exts = (".py", ".js", ".ts", ".tsx", ".jsx", ".html", ".css", ".json", ".go", ".java", ".yaml", ".yml")
+
+    # === Discover Files ===
+    stats = {}
+    duplicates = {}
+    files = discover_files(folder, valid_exts, skip=is_excluded, stats=stats, duplicates=duplicates)
+    if stats:
+        print(describe_skipped(stats))
+    twins = relative_groups(duplicates, folder)
+
+    if not files:
+        print(f"❌ No valid files found in {folder}")
+        return 1
+
+    print(f"🔍 Found {len(files)} valid source files in: {folder}\n")
+
+    sources = []
+    for file_path in files:
+        try:
+            with open(file_path, "r") as f:
+                code = f.read()
+            sources.append((os.path.relpath(file_path, folder), code))
+        except Exception as e:
+            print(f"[ERR] ❌ Error reading {file_path}: {e}")
+
+    counter = TokenCounter(client, model)
+    counter.calibrate([format_entry(rel_path, code) for rel_path, code in sources])
+    instructions = REVIEW_INSTRUCTIONS
+    if args.outline:
+        before = sum(counter.count(code) for _, code in sources)
+        sources = [(rel_path, outline(rel_path, code)) for rel_path, code in sources]
+        print(describe_reduction(before, sum(counter.count(code) for _, code in sources)))
+        instructions = f"{REVIEW_INSTRUCTIONS}\n\n{OUTLINE_NOTE}"
+    overview = "" if args.no_overview else repo_overview(folder, files)
+    budget = int((MAX_TOKENS - counter.count(instructions + build_prompt([]))) * 0.95)
+    rollup_budget = int((ROLLUP_TOKENS - counter.count(ROLLUP_INSTRUCTIONS)) * 0.95)
+
+    entries = {}
+    sizes = {}
+    for rel_path, code in sources:
+        entries[rel_path], sizes[rel_path] = fit_entry(rel_path, code, budget, counter, twins.get(rel_path))
+    counter.save()
+
+    # === Plan the Tree ===
+    tree = build_tree(list(entries))
+    height = heights(tree)
+    hashes = subtree_hashes(tree, entries, model, instructions)
+    manifest = load_manifest(manifest_path)
+    stored = manifest["nodes"]
+    # A stored review is only valid for the exact subtree it was written for.
+    pending = {directory for directory in tree
+               if args.full or stored.get(directory, {}).get("hash") != hashes[directory]}
+    file_batches = {
+        directory: pack_batches([(rel_path, entries[rel_path], sizes[rel_path]) for rel_path in tree[directory]["files"]],
+                                budget)
+        for directory in pending
+    }
+    batch_calls = sum(len(batches) for batches in file_batches.values())
+    rollups = sum(1 for directory in pending if tree[directory]["children"] or len(file_batches[directory]) > 1)
+    depth = height[""] + 1
+    print(f"🌳 {len(tree)} directories, {depth} levels: {len(pending)} to review "
+          f"({batch_calls} file batches, {rollups} roll-ups), {len(tree) - len(pending)} unchanged\n")
+
+    if args.dry_run:
+        for level in range(depth):
+            members = [directory for directory in tree if height[directory] == level]
+            todo = [directory for directory in members if directory in pending]
+            print(f"📶 Level {level}: {len(members)} directories, {len(todo)} to review")
+        return 0
+
+    # === Review Files ===
+    start_time = time.time()
+    own_cache = cache is None
+    cache = cache or open_cache()
+    ledger = start_ledger("tree_review")
+    file_system = cached_system(instructions, overview)
+
+    def call(item, system, prompt):
+        return complete(
+            client, cache,
+            item=item,
+            model=model,
+            max_tokens=2000,
+            system=system,
+            messages=[{"role": "user", "content": prompt}]
+        )
+
+    def review_batch(job):
+        directory, i, batch = job
+        try:
+            return call(f"{directory or '.'}#files{i}", file_system,
+                        build_prompt([entries[rel_path] for rel_path in batch]))
+        except Exception as e:
+            print(f"❌ Claude API error in {label(directory)} batch {i}: {e}")
+            return None
+
+    def roll_up(directory, parts):
+        system = cached_system(PROJECT_INSTRUCTIONS if not directory else ROLLUP_INSTRUCTIONS, overview)
+        round_number = 0
+        # Parts that do not fit one prompt are merged in groups first.
+        while len(parts) > 1 and counter.count(rollup_prompt(directory, parts)) > rollup_budget:
+            round_number += 1
+            groups, group, used = [], [], 0
+            for part in parts:
+                tokens = counter.count(rollup_prompt("", [part]))
+                if group and used + tokens > rollup_budget:
+                    groups.append(group)
+                    group, used = [], 0
+                group.append(part)
+                used += tokens
+            groups.append(group)
+            parts = [(f"Merged reviews, group {i}",
+                      call(f"{directory or '.'}#merge{round_number}.{i}", cached_system(ROLLUP_INSTRUCTIONS, overview),
+                           rollup_prompt(directory, group)))
+                     for i, group in enumerate(groups, start=1)]
+        return call(f"{directory or '.'}#rollup", system, rollup_prompt(directory, parts))
+
+    jobs = [(directory, i, batch) for directory in sorted(pending)
+            for i, batch in enumerate(file_batches[directory], start=1)]
+    reviews = {}
+    failed = set()
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        for (directory, i, batch), review in zip(jobs, context_map(pool, review_batch, jobs)):
+            if review is None:
+                failed.add(directory)
+            reviews.setdefault(directory, []).append((i, batch, review))
+        done = sum(1 for batches in reviews.values() for *_, review in batches if review is not None)
+        print(f"✅ Reviewed {done} of {len(jobs)} file batches\n")
+
+        # === Roll Up, Deepest First ===
+        def review_directory(directory):
+            node = tree[directory]
+            batches = reviews.get(directory, [])
+            if not node["children"] and len(batches) == 1:
+                return batches[0][2]
+            parts = []
+            for i, batch, review in batches:
+                heading = f"Files in {label(directory)}" if len(batches) == 1 else \
+                    f"Files in {label(directory)}, part {i} ({', '.join(os.path.basename(p) for p in batch)})"
+                parts.append((heading, review))
+            parts += [(f"Subdirectory `{child}/`", stored[child]["review"]) for child in node["children"]]
+            try:
+                return roll_up(directory, parts)
+            except Exception as e:
+                print(f"❌ Claude API error rolling up {label(directory)}: {e}")
+                return None
+
+        for level in range(depth):
+            todo = [directory for directory in sorted(pending) if height[directory] == level]
+            # A directory can only be rolled up once everything below it has a review.
+            blocked = [directory for directory in todo
+                       if directory in failed or any(child in failed for child in tree[directory]["children"])]
+            failed.update(blocked)
+            todo = [directory for directory in todo if directory not in blocked]
+            for directory, review in zip(todo, context_map(pool, review_directory, todo)):
+                if review is None:
+                    failed.add(directory)
+                    continue
+                stored[directory] = {"hash": hashes[directory], "review": review,
+                                     "files": tree[directory]["files"], "children": tree[directory]["children"]}
+                write_review(output_root, directory, review)
+            save_manifest(manifest_path, manifest)
+            if todo:
+                print(f"📶 Level {level}: {len(todo)} directories reviewed")
+
+    # Drop reviews of directories that no longer exist (or are now folded into a chain).
+    for directory in [d for d in stored if d not in tree]:
+        del stored[directory]
+        out_path = review_path(output_root, directory)
+        if os.path.exists(out_path):
+            os.remove(out_path)
+            try:
+                os.removedirs(os.path.dirname(out_path))
+            except OSError:
+                pass
+    save_manifest(manifest_path, manifest)
+
+    total_time = time.strftime("%M:%S", time.gmtime(time.time() - start_time))
+    if "" not in failed:
+        print(f"🎉 Project review saved to {review_path(output_root, '')} in {total_time}")
+    print(cache.summary())
+    print(ledger.summary())
+    if own_cache:
+        cache.close()
+    ledger.close()
+    if failed:
+        print(f"❌ Directories without a review: {', '.join(sorted(label(d) for d in failed))}")
+        print("↩️ Run again to retry; finished directories are kept.")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
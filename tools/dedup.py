@@ -0,0 +1,214 @@
+"""
+Duplicate Detection
+
+Finds exact and near-duplicate source files (vendored copies, generated files,
+near-clones) so only one canonical representative is sent to Claude.
+
+Exact duplicates share a hash of their whitespace-normalized content. Near
+duplicates are found with MinHash: each file is shingled into pairs of
+consecutive normalized lines, summarized as a bottom-k sketch, and files whose
+estimated Jaccard similarity reaches the threshold are grouped together.
+
+Settings: NAUTEE_DEDUP_THRESHOLD (default 0.8; set to 1 for exact duplicates
+only, or "off" to disable).
+"""
+
+import os
+import heapq
+import zlib
+import hashlib
+from collections import defaultdict
+
+DEFAULT_THRESHOLD = 0.8
+SKETCH_SIZE = 128
+SHINGLE_LINES = 2
+# Near-duplicate matching needs enough shingles to be meaningful.
+MIN_SHINGLES = 8
+# Sketch values shared by more files than this are boilerplate and not used to find candidates.
+MAX_BUCKET = 64
+
+def normalized_lines(text: str) -> list:
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+def shingles(lines: list) -> set:
+    """
+    Hashes each run of SHINGLE_LINES consecutive lines.
+    """
+    count = max(1, len(lines) - SHINGLE_LINES + 1)
+    return {zlib.crc32("\n".join(lines[i:i + SHINGLE_LINES]).encode("utf-8")) for i in range(count)}
+
+def sketch(values: set) -> frozenset:
+    """
+    Bottom-k MinHash sketch: the SKETCH_SIZE smallest shingle hashes.
+    """
+    return frozenset(heapq.nsmallest(SKETCH_SIZE, values))
+
+def similarity(a: frozenset, b: frozenset) -> float:
+    """
+    Estimates the Jaccard similarity of two files from their sketches.
+
+    Args:
+        a (frozenset): Sketch of the first file.
+        b (frozenset): Sketch of the second file.
+
+    Returns:
+        float: Estimated similarity between 0 and 1.
+    """
+    union = heapq.nsmallest(SKETCH_SIZE, a | b)
+    if not union:
+        return 0.0
+    return sum(1 for value in union if value in a and value in b) / len(union)
+
+def canonical_key(path: str) -> tuple:
+    """
+    Orders the members of a duplicate group: the shallowest path with the shortest name represents the group.
+    """
+    return (path.count(os.sep), len(os.path.basename(path)), path)
+
+def dedup_threshold():
+    """
+    Reads NAUTEE_DEDUP_THRESHOLD; returns None when deduplication is disabled.
+
+    A value that is not a number in (0, 1] is reported and DEFAULT_THRESHOLD is used instead.
+    """
+    value = os.getenv("NAUTEE_DEDUP_THRESHOLD", str(DEFAULT_THRESHOLD)).strip().lower()
+    if value in ("", "off", "0", "none"):
+        return None
+    try:
+        threshold = float(value)
+    except ValueError:
+        threshold = None
+    if threshold is None or not 0 < threshold <= 1:
+        print(f"⚠️ Ignoring NAUTEE_DEDUP_THRESHOLD={value!r}: expected a number in (0, 1] or off; "
+              f"using {DEFAULT_THRESHOLD}")
+        return DEFAULT_THRESHOLD
+    return threshold
+
+def find_duplicates(paths: list, threshold: float = DEFAULT_THRESHOLD) -> dict:
+    """
+    Groups exact and near-duplicate files and picks a canonical representative for each group.
+
+    Args:
+        paths (list): File paths to compare.
+        threshold (float): Minimum estimated Jaccard similarity for near duplicates.
+
+    Returns:
+        dict: Maps each duplicate path to (canonical_path, similarity). Canonical
+        files and files without duplicates are not included.
+    """
+    parent = {path: path for path in paths}
+
+    def find(path):
+        while parent[path] != path:
+            parent[path] = parent[parent[path]]
+            path = parent[path]
+        return path
+
+    def union(a, b):
+        a, b = find(a), find(b)
+        if a != b:
+            parent[max(a, b, key=canonical_key)] = min(a, b, key=canonical_key)
+
+    exact = {}
+    same_as = {}
+    sketches = {}
+    for path in paths:
+        try:
+            with open(path, "r", errors="replace") as f:
+                lines = normalized_lines(f.read())
+        except OSError:
+            continue
+        digest = hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
+        if digest in exact:
+            union(exact[digest], path)
+            same_as[path] = exact[digest]
+            continue
+        exact[digest] = path
+        values = shingles(lines)
+        if threshold < 1 and len(values) >= MIN_SHINGLES:
+            sketches[path] = sketch(values)
+
+    # Candidate pairs share sketch values; only those are compared.
+    buckets = defaultdict(list)
+    for path, values in sketches.items():
+        for value in values:
+            buckets[value].append(path)
+    shared = defaultdict(int)
+    for members in buckets.values():
+        if len(members) > MAX_BUCKET:
+            continue
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                shared[(a, b)] += 1
+    for (a, b), count in shared.items():
+        # A pair at the threshold shares roughly that fraction of its sketch values.
+        smaller = min(len(sketches[a]), len(sketches[b]))
+        if count >= threshold * smaller / 2 and similarity(sketches[a], sketches[b]) >= threshold:
+            union(a, b)
+
+    duplicates = {}
+    for path in paths:
+        canonical = find(path)
+        if canonical == path:
+            continue
+        a = sketches.get(same_as.get(path, path))
+        b = sketches.get(same_as.get(canonical, canonical))
+        score = similarity(a, b) if a is not None and b is not None and a is not b else 1.0
+        duplicates[path] = (canonical, score)
+    return duplicates
+
+def group_duplicates(duplicates: dict) -> dict:
+    """
+    Inverts find_duplicates() output: canonical path -> sorted [(duplicate_path, similarity)].
+    """
+    groups = defaultdict(list)
+    for path, (canonical, score) in duplicates.items():
+        groups[canonical].append((path, score))
+    return {canonical: sorted(members) for canonical, members in groups.items()}
+
+def describe_twin(path: str, score: float) -> str:
+    """
+    Formats a duplicate for prompts and reports, e.g. "`vendor/x.py` (93% similar)".
+    """
+    return f"`{path}` ({'identical' if score >= 1 else f'{score:.0%} similar'})"
+
+def relative_groups(duplicates: dict, root: str) -> dict:
+    """
+    group_duplicates() with every path made relative to root.
+    """
+    return {
+        os.path.relpath(canonical, root): [(os.path.relpath(path, root), score) for path, score in members]
+        for canonical, members in group_duplicates(duplicates).items()
+    }
+
+def twins_note(members: list) -> str:
+    """
+    One-line prompt note naming the duplicates a canonical file stands for.
+
+    Args:
+        members (list): (path, similarity) tuples.
+
+    Returns:
+        str: The note, or "" when there are no duplicates.
+    """
+    if not members:
+        return ""
+    return "Near-duplicates not shown (findings apply to them too): " + ", ".join(
+        describe_twin(path, score) for path, score in members)
+
+def duplicates_report(groups: dict) -> str:
+    """
+    Markdown section listing each canonical file and the duplicates it stood in for.
+
+    Args:
+        groups (dict): canonical path -> [(duplicate path, similarity)], e.g. from relative_groups().
+
+    Returns:
+        str: Markdown, or "" when there were no duplicates.
+    """
+    if not groups:
+        return ""
+    lines = ["## 🪞 Duplicates not sent separately", ""]
+    for canonical in sorted(groups):
+        lines.append(f"- `{canonical}` stands for " + ", ".join(describe_twin(p, s) for p, s in groups[canonical]))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,283 @@
+"""
+File Discovery
+
+One scanner for every Nautee tool. It lists candidate source files through
+`git ls-files` when the folder is inside a git checkout (so .gitignore is
+honoured for free) and falls back to an `os.scandir` walk that prunes ignored
+directories before descending into them.
+
+Binary, minified and oversized files are dropped, as is anything matched by the
+project exclude list (`.nauteeignore` in the scanned folder, plus the
+comma-separated NAUTEE_EXCLUDE environment variable). Callers that ask for it
+also get exact and near-duplicate files folded into one canonical copy (see
+dedup.py).
+"""
+
+import os
+import fnmatch
+import subprocess
+from dedup import find_duplicates, dedup_threshold
+
+# Directories that hold generated or vendored files. Only untracked files are dropped from them:
+# whatever git tracks there is the project's own source.
+PRUNED_DIRS = {
+    ".git", ".hg", ".svn", "node_modules", ".venv", "venv", "__pycache__",
+    ".tox", ".nox", ".mypy_cache", ".pytest_cache", ".ruff_cache", ".eggs",
+    "dist", "build", "site", "target", "coverage", ".next", ".nuxt",
+    ".idea", ".vscode", ".nautee",
+}
+
+DEFAULT_MAX_BYTES = 512 * 1024
+SNIFF_BYTES = 8192
+MINIFIED_LINE_LENGTH = 1000
+
+def read_patterns(path: str) -> list:
+    """
+    Reads gitignore-style patterns, skipping comments, blanks and negations.
+
+    Args:
+        path (str): Pattern file (.gitignore or .nauteeignore).
+
+    Returns:
+        list: Patterns in file order.
+    """
+    if not os.path.isfile(path):
+        return []
+    with open(path, "r", errors="replace") as f:
+        lines = [line.strip() for line in f]
+    return [line for line in lines if line and not line.startswith(("#", "!"))]
+
+def matches(rel_path: str, patterns: list, is_dir: bool = False) -> bool:
+    """
+    Checks a path against gitignore-style patterns.
+
+    Args:
+        rel_path (str): Path relative to the directory the patterns came from, using `/`.
+        patterns (list): Patterns from read_patterns().
+        is_dir (bool): Whether the path is a directory (for `dir/` patterns).
+
+    Returns:
+        bool: True if any pattern matches.
+    """
+    name = rel_path.rsplit("/", 1)[-1]
+    for pattern in patterns:
+        if pattern.endswith("/"):
+            if not is_dir:
+                continue
+            pattern = pattern.rstrip("/")
+        if "/" in pattern:
+            if fnmatch.fnmatch(rel_path, pattern.lstrip("/")):
+                return True
+        elif fnmatch.fnmatch(name, pattern):
+            return True
+    return False
+
+def sniff(path: str, max_bytes: int) -> str:
+    """
+    Classifies a file without reading all of it.
+
+    Args:
+        path (str): File to inspect.
+        max_bytes (int): Size cap.
+
+    Returns:
+        str: "ok", "oversized", "binary", "minified" or "unreadable".
+    """
+    try:
+        if os.path.getsize(path) > max_bytes:
+            return "oversized"
+        with open(path, "rb") as f:
+            head = f.read(SNIFF_BYTES)
+    except OSError:
+        return "unreadable"
+    if b"\0" in head:
+        return "binary"
+    name = os.path.basename(path)
+    if ".min." in name:
+        return "minified"
+    lines = head.splitlines() or [b""]
+    longest = max(len(line) for line in lines)
+    if longest > MINIFIED_LINE_LENGTH:
+        return "minified"
+    return "ok"
+
+def git_listing(root: str):
+    """
+    Lists tracked and untracked-but-not-ignored files under root via git.
+
+    Tracked files are all kept; untracked ones inside PRUNED_DIRS are dropped.
+
+    Args:
+        root (str): Folder to list.
+
+    Returns:
+        list: Paths relative to root, or None if root is not in a git work tree.
+    """
+    listings = []
+    for flags in (["--cached"], ["--others", "--exclude-standard"]):
+        try:
+            output = subprocess.check_output(["git", "-C", root, "ls-files", "-z", *flags], stderr=subprocess.DEVNULL)
+        except (subprocess.CalledProcessError, OSError):
+            return None
+        listings.append([p for p in output.decode("utf-8", "replace").split("\0") if p])
+    tracked, untracked = listings
+    return sorted(set(tracked) | set(p for p in untracked if not in_pruned_dir(p)))
+
+def in_pruned_dir(rel_path: str) -> bool:
+    """
+    True when a path (relative, using `/`) lies inside one of PRUNED_DIRS.
+    """
+    return any(part in PRUNED_DIRS for part in rel_path.split("/")[:-1])
+
+def walk_listing(root: str) -> list:
+    """
+    Walks root with os.scandir, pruning PRUNED_DIRS and .gitignore matches before descending.
+
+    Args:
+        root (str): Folder to walk.
+
+    Returns:
+        list: Paths relative to root.
+    """
+    results = []
+    # Each entry: (directory relative to root, gitignore layers as (base, patterns)).
+    stack = [("", [])]
+    while stack:
+        rel_dir, layers = stack.pop()
+        abs_dir = os.path.join(root, rel_dir) if rel_dir else root
+        patterns = read_patterns(os.path.join(abs_dir, ".gitignore"))
+        if patterns:
+            layers = layers + [(rel_dir, patterns)]
+        try:
+            entries = sorted(os.scandir(abs_dir), key=lambda e: e.name)
+        except OSError:
+            continue
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if is_dir and entry.name in PRUNED_DIRS:
+                continue
+            ignored = any(
+                matches(rel_path[len(base) + 1:] if base else rel_path, layer, is_dir)
+                for base, layer in layers
+            )
+            if ignored:
+                continue
+            if is_dir:
+                stack.append((rel_path, layers))
+            elif entry.is_file(follow_symlinks=False):
+                results.append(rel_path)
+    return sorted(results)
+
+def git_ignored(root: str, rel_paths: list) -> set:
+    """
+    Asks git which of the given paths are ignored.
+
+    Args:
+        root (str): Folder the paths are relative to.
+        rel_paths (list): Paths relative to root.
+
+    Returns:
+        set: The ignored paths (empty outside a git work tree).
+    """
+    if not rel_paths:
+        return set()
+    try:
+        result = subprocess.run(
+            ["git", "-C", root, "check-ignore", "-z", "--stdin"],
+            input="\0".join(rel_paths).encode("utf-8"), capture_output=True
+        )
+    except OSError:
+        return set()
+    # Exit status 1 means nothing is ignored; 128 means root is not in a work tree.
+    if result.returncode != 0:
+        return set()
+    return set(p for p in result.stdout.decode("utf-8", "replace").split("\0") if p)
+
+def filter_files(root: str, listing: list, exts: tuple, skip=None, exclude: list = None,
+                 max_bytes: int = None, stats: dict = None) -> list:
+    """
+    Applies the extension, exclude-list and content checks of discover_files() to a list of paths.
+
+    PRUNED_DIRS are not checked here; git_listing() and walk_listing() have already pruned them.
+
+    Args:
+        root (str): Folder the paths are relative to.
+        listing (list): Candidate paths relative to root, using `/`.
+        exts (tuple): Accepted file extensions.
+        skip (callable): Optional predicate on the relative path; True drops the file.
+        exclude (list): Extra gitignore-style patterns to exclude.
+        max_bytes (int): Per-file size cap (default: NAUTEE_MAX_FILE_KB or 512 KB).
+        stats (dict): Optional dict that receives counts of dropped files by reason.
+
+    Returns:
+        list: Full paths (joined onto root) of the files that pass, in listing order.
+    """
+    if max_bytes is None:
+        max_bytes = int(os.getenv("NAUTEE_MAX_FILE_KB", str(DEFAULT_MAX_BYTES // 1024))) * 1024
+
+    patterns = read_patterns(os.path.join(root, ".nauteeignore")) + list(exclude or [])
+    patterns += [p.strip() for p in os.getenv("NAUTEE_EXCLUDE", "").split(",") if p.strip()]
+
+    counts = stats if stats is not None else {}
+    results = []
+    for rel_path in listing:
+        parts = rel_path.split("/")
+        if not rel_path.endswith(exts):
+            continue
+        if (skip and skip(rel_path)) or matches(rel_path, patterns) or any(
+            matches("/".join(parts[:i]), patterns, is_dir=True) for i in range(1, len(parts))
+        ):
+            counts["excluded"] = counts.get("excluded", 0) + 1
+            continue
+        full_path = os.path.join(root, rel_path)
+        kind = sniff(full_path, max_bytes)
+        if kind != "ok":
+            counts[kind] = counts.get(kind, 0) + 1
+            continue
+        results.append(full_path)
+    return results
+
+def discover_files(root: str, exts: tuple, skip=None, exclude: list = None,
+                   max_bytes: int = None, use_git: bool = True, stats: dict = None,
+                   duplicates: dict = None) -> list:
+    """
+    Finds reviewable source files under a folder.
+
+    Args:
+        root (str): Folder to scan.
+        exts (tuple): Accepted file extensions.
+        skip (callable): Optional predicate on the relative path; True drops the file.
+        exclude (list): Extra gitignore-style patterns to exclude.
+        max_bytes (int): Per-file size cap (default: NAUTEE_MAX_FILE_KB or 512 KB).
+        use_git (bool): Prefer `git ls-files` when root is inside a git checkout.
+        stats (dict): Optional dict that receives counts of dropped files by reason.
+        duplicates (dict): Optional dict; when given, duplicate files are dropped and
+            recorded here as full path -> (canonical full path, similarity).
+
+    Returns:
+        list: Sorted full paths (joined onto root).
+    """
+    listing = git_listing(root) if use_git else None
+    if listing is None:
+        listing = walk_listing(root)
+
+    counts = stats if stats is not None else {}
+    results = filter_files(root, listing, exts, skip=skip, exclude=exclude, max_bytes=max_bytes, stats=counts)
+
+    threshold = dedup_threshold()
+    if duplicates is not None and threshold is not None:
+        found = find_duplicates(results, threshold)
+        if found:
+            duplicates.update(found)
+            counts["duplicate"] = counts.get("duplicate", 0) + len(found)
+            results = [path for path in results if path not in found]
+    return results
+
+def describe_skipped(stats: dict) -> str:
+    """
+    Formats the stats filled in by discover_files() for a progress line.
+    """
+    if not stats:
+        return ""
+    return "🧹 Skipped " + ", ".join(f"{count} {reason}" for reason, count in sorted(stats.items()))
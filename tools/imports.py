@@ -0,0 +1,264 @@
+"""
+Import Graph
+
+Builds a project's import graph so coupled modules can be reviewed together.
+Python imports are read with `ast` (relative imports included); JavaScript and
+TypeScript imports, re-exports and `require()` calls are found with a regex
+and resolved like a bundler would (extensions, `index` files). Imports that
+resolve to a file in the project become edges; everything else is recorded as
+a third-party dependency.
+
+communities() then cuts the graph into token-bounded groups: the strongest
+links (imports in both directions, then one-way imports, then files sharing a
+directory) are merged first, as long as the group still fits the budget.
+"""
+
+import os
+import re
+import ast
+import sys
+
+PYTHON_EXTS = (".py",)
+JS_EXTS = (".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs")
+
+STDLIB = set(getattr(sys, "stdlib_module_names", ())) | {"__future__"}
+
+_JS_IMPORT = re.compile(
+    r"""(?:\bimport\s+(?:[\w*{}\s,$]+\s+from\s+)?|\bexport\s+[\w*{}\s,$]+\s+from\s+|\brequire\s*\(\s*|\bimport\s*\(\s*)['"]([^'"\n]+)['"]"""
+)
+
+# Edge strengths: imports both ways bind tighter than one-way imports, which bind tighter than sharing a directory.
+MUTUAL_IMPORT = 3
+ONE_WAY_IMPORT = 2
+SAME_DIRECTORY = 1
+
+def python_module(rel_path: str) -> str:
+    """
+    Dotted module name of a Python file (`pkg/mod.py` -> `pkg.mod`, `pkg/__init__.py` -> `pkg`).
+    """
+    parts = rel_path[:-3].replace(os.sep, "/").split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts)
+
+def python_imports(rel_path: str, code: str) -> list:
+    """
+    Modules a Python file imports, with relative imports made absolute.
+
+    `from pkg import name` yields both `pkg.name` (in case name is a submodule) and `pkg`.
+
+    Args:
+        rel_path (str): Path relative to the project root.
+        code (str): File contents.
+
+    Returns:
+        list: Dotted module names, possibly unresolvable ones; empty when the file does not parse.
+    """
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return []
+    package = python_module(rel_path).split(".")
+    if not rel_path.endswith("__init__.py"):
+        package = package[:-1]
+    modules = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base = package[:len(package) - node.level + 1] if node.level <= len(package) + 1 else []
+                prefix = ".".join(base + ([node.module] if node.module else []))
+            else:
+                prefix = node.module or ""
+            modules += [f"{prefix}.{alias.name}" if prefix else alias.name for alias in node.names if alias.name != "*"]
+            if prefix:
+                modules.append(prefix)
+    return modules
+
+def js_imports(code: str) -> list:
+    """
+    Specifiers a JavaScript/TypeScript file imports, re-exports or requires.
+    """
+    return _JS_IMPORT.findall(code)
+
+def resolve_js(rel_path: str, specifier: str, known: set):
+    """
+    Resolves a relative JS/TS specifier to a project file, or None.
+    """
+    if not specifier.startswith("."):
+        return None
+    base = os.path.normpath(os.path.join(os.path.dirname(rel_path), specifier))
+    candidates = [base] + [base + ext for ext in JS_EXTS] + [os.path.join(base, "index" + ext) for ext in JS_EXTS]
+    # TypeScript sources are often imported with the extension of their compiled output.
+    stem, ext = os.path.splitext(base)
+    if ext in JS_EXTS:
+        candidates += [stem + other for other in JS_EXTS]
+    return next((candidate for candidate in candidates if candidate in known), None)
+
+def package_name(specifier: str) -> str:
+    """
+    Top-level package of a third-party import (`yaml.loader` -> `yaml`, `@scope/pkg/sub` -> `@scope/pkg`).
+    """
+    if specifier.startswith("@"):
+        return "/".join(specifier.split("/")[:2])
+    return re.split(r"[./]", specifier, maxsplit=1)[0]
+
+def import_graph(sources: list) -> tuple:
+    """
+    Resolves every file's imports against the project.
+
+    A Python import resolves to the file with that absolute dotted name, or to
+    a file of that name next to the importer (as for a script run from its
+    folder). Standard-library names are skipped after that; other names fall
+    back to a dotted-suffix match, so `src/`-style layouts resolve, but only
+    when exactly one project file matches.
+
+    Args:
+        sources (list): (rel_path, code) tuples.
+
+    Returns:
+        tuple: (edges, external) where edges maps each rel_path to the set of
+        project files it imports and external maps it to the set of third-party packages.
+    """
+    known = {rel_path for rel_path, _ in sources}
+    by_module, by_suffix = {}, {}
+    for rel_path in sorted(known):
+        if rel_path.endswith(PYTHON_EXTS):
+            parts = python_module(rel_path).split(".")
+            by_module[".".join(parts)] = rel_path
+            for i in range(1, len(parts)):
+                by_suffix.setdefault(".".join(parts[i:]), set()).add(rel_path)
+
+    def resolve_python(rel_path, module):
+        if module in by_module:
+            return by_module[module]
+        package = python_module(rel_path).split(".")[:-1]
+        sibling = by_module.get(".".join(package + [module]))
+        if sibling:
+            return sibling
+        if module.split(".")[0] in STDLIB:
+            return None
+        matches = by_suffix.get(module, ())
+        return next(iter(matches)) if len(matches) == 1 else None
+
+    project_names = {module.split(".")[0] for module in by_module} | {suffix.split(".")[0] for suffix in by_suffix}
+    edges, external = {}, {}
+    for rel_path, code in sources:
+        targets, packages = set(), set()
+        if rel_path.endswith(PYTHON_EXTS):
+            for module in python_imports(rel_path, code):
+                target = resolve_python(rel_path, module)
+                top = module.split(".")[0]
+                if target:
+                    targets.add(target)
+                elif top not in project_names and top not in STDLIB:
+                    packages.add(package_name(module))
+        elif rel_path.endswith(JS_EXTS):
+            for specifier in js_imports(code):
+                target = resolve_js(rel_path, specifier, known)
+                if target:
+                    targets.add(target)
+                elif not specifier.startswith((".", "node:")):
+                    packages.add(package_name(specifier))
+        targets.discard(rel_path)
+        edges[rel_path] = targets
+        external[rel_path] = packages
+    return edges, external
+
+def communities(edges: dict, sizes: dict, budget: int) -> list:
+    """
+    Partitions the graph into groups of at most budget tokens, keeping the most tightly coupled files together.
+
+    Links are taken strongest first (mutual imports, one-way imports, shared
+    directory; ties go to the link whose two files are smaller) and the groups
+    on both ends are merged whenever the result still fits the budget.
+
+    Args:
+        edges (dict): rel_path -> set of imported rel_paths, from import_graph().
+        sizes (dict): rel_path -> tokens.
+        budget (int): Token budget per group.
+
+    Returns:
+        list: Groups as sorted lists of rel_paths, largest first.
+    """
+    weights = {}
+    for source, targets in edges.items():
+        for target in targets:
+            if source in sizes and target in sizes:
+                pair = tuple(sorted((source, target)))
+                weights[pair] = MUTUAL_IMPORT if pair in weights else ONE_WAY_IMPORT
+    by_dir = {}
+    for rel_path in sorted(sizes):
+        by_dir.setdefault(os.path.dirname(rel_path), []).append(rel_path)
+    for members in by_dir.values():
+        # Neighbours in path order are enough to chain a directory together.
+        for a, b in zip(members, members[1:]):
+            weights.setdefault((a, b), SAME_DIRECTORY)
+
+    parent = {rel_path: rel_path for rel_path in sizes}
+    tokens = dict(sizes)
+
+    def find(rel_path):
+        while parent[rel_path] != rel_path:
+            parent[rel_path] = parent[parent[rel_path]]
+            rel_path = parent[rel_path]
+        return rel_path
+
+    for (a, b), _ in sorted(weights.items(), key=lambda item: (-item[1], sizes[item[0][0]] + sizes[item[0][1]], item[0])):
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b and tokens[root_a] + tokens[root_b] <= budget:
+            parent[root_b] = root_a
+            tokens[root_a] += tokens.pop(root_b)
+
+    groups = {}
+    for rel_path in sorted(sizes):
+        groups.setdefault(find(rel_path), []).append(rel_path)
+    return sorted(groups.values(), key=lambda members: (-tokens[find(members[0])], members[0]))
+
+def dependencies_note(batch: list, edges: dict, external: dict, batch_of: dict, limit: int = 20,
+                      counter=None, max_tokens: int = None) -> str:
+    """
+    Lists what a batch depends on outside itself, for its prompt.
+
+    With a counter and max_tokens, the note is measured and shortened until it
+    fits: fewer names are listed, then only their counts, then nothing.
+
+    Args:
+        batch (list): rel_paths in the batch.
+        edges (dict): From import_graph().
+        external (dict): From import_graph().
+        batch_of (dict): rel_path -> batch number.
+        limit (int): Most project modules and most packages listed.
+        counter (TokenCounter): Optional token counter for the review model.
+        max_tokens (int): Optional token cap for the note; requires counter.
+
+    Returns:
+        str: Markdown note, or "" when the batch is self-contained or nothing fits.
+    """
+    members = set(batch)
+    internal = sorted({target for rel_path in batch for target in edges.get(rel_path, ()) if target not in members})
+    packages = sorted({package for rel_path in batch for package in external.get(rel_path, ())})
+    if not internal and not packages:
+        return ""
+    while True:
+        note = _render_note(internal, packages, batch_of, limit)
+        if counter is None or max_tokens is None or counter.count(note) <= max_tokens:
+            return note
+        if limit == 0:
+            return ""
+        limit //= 2
+
+def _render_note(internal: list, packages: list, batch_of: dict, limit: int) -> str:
+    if not limit:
+        return (f"These files depend on {len(internal)} project modules from other batches "
+                f"and {len(packages)} third-party packages.")
+    lines = []
+    if internal:
+        shown = [f"`{target}`" + (f" (batch {batch_of[target]})" if target in batch_of else "") for target in internal[:limit]]
+        more = f", and {len(internal) - limit} more" if len(internal) > limit else ""
+        lines.append(f"- Project modules reviewed elsewhere: {', '.join(shown)}{more}")
+    if packages:
+        more = f", and {len(packages) - limit} more" if len(packages) > limit else ""
+        lines.append(f"- Third-party packages: {', '.join(packages[:limit])}{more}")
+    return "These files depend on the following code that is not part of this batch:\n" + "\n".join(lines)
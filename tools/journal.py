@@ -0,0 +1,152 @@
+"""
+Run Journal
+
+Checkpoints long runs so an interrupted one can be finished with --resume
+instead of starting over. The journal is an append-only JSONL file per tool and
+target that records the run's plan (e.g. which files went into which batch)
+and, for every finished item, the hash of its input. Each record is one line
+flushed as soon as the item finishes, so a crash or CI timeout loses at most
+the calls in flight; a torn last line is ignored on load.
+
+Settings: NAUTEE_JOURNAL_DIR (default .nautee/journal).
+"""
+
+import os
+import json
+import hashlib
+import threading
+from datetime import datetime, timezone
+
+DEFAULT_JOURNAL_DIR = os.path.join(".nautee", "journal")
+
+def input_hash(*parts) -> str:
+    """
+    Hashes everything that determines an item's output (model, prompts, sources).
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(json.dumps(part, sort_keys=True).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+class RunJournal:
+    """
+    Per-item completion record for one tool run over one target.
+
+    Args:
+        path (str): JSONL journal file.
+        fresh (bool): Start a new journal instead of continuing the existing one.
+    """
+
+    def __init__(self, path: str, fresh: bool = False):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+        self.fresh = fresh
+        self.data = {"plan": None, "items": {}}
+        if not fresh and os.path.exists(path):
+            with open(path, "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if "plan" in record:
+                        self.data["plan"] = record["plan"]
+                    elif "item" in record:
+                        self.data["items"][record.pop("item")] = record
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    @property
+    def plan(self):
+        return self.data.get("plan")
+
+    def set_plan(self, plan):
+        with self._lock:
+            self.data["plan"] = plan
+            self._append({"plan": plan})
+
+    def get(self, item: str):
+        return self.data["items"].get(item)
+
+    def is_done(self, item: str, digest: str) -> bool:
+        """
+        Whether an item finished in an earlier run with exactly this input.
+        """
+        entry = self.get(item)
+        return bool(entry) and entry.get("status") == "done" and entry.get("hash") == digest
+
+    def record(self, item: str, digest: str, status: str = "done", **extra):
+        """
+        Records an item's outcome by appending it to the journal.
+
+        Args:
+            item (str): Item id (batch id or file path).
+            digest (str): Input hash from input_hash().
+            status (str): "done" or "failed".
+            **extra: Additional JSON-serializable fields to keep for the item.
+        """
+        entry = {
+            "hash": digest,
+            "status": status,
+            "ts": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            **extra,
+        }
+        with self._lock:
+            self.data["items"][item] = entry
+            self._append({"item": item, **entry})
+
+    def count_done(self) -> int:
+        return sum(1 for entry in self.data["items"].values() if entry.get("status") == "done")
+
+    def _append(self, record: dict):
+        if self._file is None:
+            # A fresh journal replaces the previous run's on its first record, not before.
+            self._file = open(self.path, "w" if self.fresh else "a")
+            # Start on a new line if the previous run died halfway through writing one.
+            if self._file.tell() and not self._ends_with_newline():
+                self._file.write("\n")
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def discard(self):
+        """
+        Deletes the journal once its work is recorded elsewhere.
+        """
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def open_journal(tool: str, target: str, resume: bool = False) -> RunJournal:
+    """
+    Opens the journal of a tool for a target folder.
+
+    Args:
+        tool (str): Name of the running tool.
+        target (str): Folder the run works on; each target gets its own journal.
+        resume (bool): Continue the previous journal; otherwise it is replaced.
+
+    Returns:
+        RunJournal: The journal.
+    """
+    directory = os.getenv("NAUTEE_JOURNAL_DIR", DEFAULT_JOURNAL_DIR)
+    key = hashlib.sha1(os.path.abspath(target).encode("utf-8")).hexdigest()[:12]
+    journal = RunJournal(os.path.join(directory, f"{tool}-{key}.jsonl"), fresh=not resume)
+    if resume:
+        if journal.data["items"]:
+            print(f"📒 Resuming from {journal.path}: {journal.count_done()} items already done")
+        else:
+            print("📒 No earlier run to resume; starting fresh")
+    return journal
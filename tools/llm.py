@@ -0,0 +1,321 @@
+"""
+Claude Call Helpers
+
+Shared wrapper around `client.messages.create` used by every Nautee tool, so
+caching, rate limiting, retries (and anything else that has to see each
+request) live in one place.
+"""
+
+import os
+import json
+import time
+import threading
+import contextvars
+from llm_cache import ResponseCache
+from telemetry import Ledger, open_ledger
+from ratelimit import Scheduler
+
+# Telemetry ledger for the current tool run; set by start_ledger(). It is a context variable so
+# tool runs sharing one process (see orchestrate.py) each record to their own ledger.
+_ledger = contextvars.ContextVar("nautee_ledger", default=None)
+
+# Paces, limits and retries every call in this process (see ratelimit.py); created on first use.
+scheduler = None
+_scheduler_lock = threading.Lock()
+
+def load_env():
+    """
+    Loads settings from .env. python-dotenv is imported only here, when a tool actually runs.
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+
+def make_client():
+    """
+    Creates an Anthropic client for use with the helpers in this module.
+
+    The SDK's own retries are switched off: the shared scheduler retries
+    instead, so throttling feeds back into its concurrency limit. The SDK is
+    imported here rather than at module level so planning and --help stay fast.
+    """
+    import anthropic
+    return anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"), max_retries=0)
+
+def set_scheduler(shared: Scheduler):
+    """
+    Replaces the process-wide scheduler, e.g. with one built from command-line limits.
+    """
+    global scheduler
+    with _scheduler_lock:
+        scheduler = shared
+
+def get_scheduler() -> Scheduler:
+    """
+    Returns the process-wide scheduler, reading its settings on first use (after .env is loaded).
+    """
+    global scheduler
+    with _scheduler_lock:
+        if scheduler is None:
+            scheduler = Scheduler.from_env()
+        return scheduler
+
+def request_tokens(params: dict) -> int:
+    """
+    Roughly estimates a request's input tokens for the tokens-per-minute bucket.
+    """
+    return len(json.dumps([params.get("system", ""), params.get("messages", [])])) // 4
+
+def start_ledger(tool: str) -> Ledger:
+    """
+    Starts recording every call made through this module in a telemetry ledger.
+
+    Args:
+        tool (str): Name of the running tool.
+
+    Returns:
+        Ledger: The run's ledger; print ledger.summary() and call close() at the end.
+    """
+    ledger = open_ledger(tool)
+    _ledger.set(ledger)
+    return ledger
+
+def current_ledger():
+    """
+    Returns the ledger of the tool run in the current context, or None.
+    """
+    return _ledger.get()
+
+def record_call(item: str, model: str, **fields):
+    """
+    Adds a call to the run's ledger, if one was started.
+    """
+    ledger = _ledger.get()
+    if ledger is not None:
+        ledger.record(item, model, **fields)
+
+def context_map(pool, fn, items) -> list:
+    """
+    Like list(pool.map(fn, items)), but each call runs in a copy of the caller's context,
+    so worker threads record to the caller's ledger.
+
+    Args:
+        pool (ThreadPoolExecutor): Worker pool.
+        fn (callable): Function applied to each item.
+        items (iterable): Inputs.
+
+    Returns:
+        list: Results in input order.
+    """
+    futures = [pool.submit(contextvars.copy_context().run, fn, item) for item in items]
+    return [future.result() for future in futures]
+
+def cached_system(instructions: str, context: str = "") -> list:
+    """
+    Builds a system prompt whose stable prefix is marked for prompt caching.
+
+    Put everything that is identical across the calls of a run (instructions,
+    repo overview) here and only the per-file or per-batch content in the user
+    message, so later calls read the prefix from the cache.
+
+    Args:
+        instructions (str): Task instructions.
+        context (str): Optional shared project context, e.g. from repo_overview().
+
+    Returns:
+        list: System content blocks for messages.create.
+    """
+    text = instructions if not context else f"{instructions}\n\n{context}"
+    return [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]
+
+def repo_overview(root: str, paths: list, max_files: int = 500, max_readme_chars: int = 4000) -> str:
+    """
+    Summarizes a project as its file tree plus the start of its README.
+
+    Args:
+        root (str): Project root.
+        paths (list): Source file paths under root.
+        max_files (int): Cap on listed files, keeping the overview small on big repos.
+        max_readme_chars (int): How much of the README to include.
+
+    Returns:
+        str: Markdown project overview.
+    """
+    rel_paths = sorted(os.path.relpath(path, root) for path in paths)
+    tree = "\n".join(rel_paths[:max_files])
+    if len(rel_paths) > max_files:
+        tree += f"\n... and {len(rel_paths) - max_files} more files"
+    overview = f"## Project overview\n\nSource files:\n```\n{tree}\n```"
+    for name in ("README.md", "README.rst", "README.txt", "README"):
+        readme_path = os.path.join(root, name)
+        if os.path.isfile(readme_path):
+            with open(readme_path, "r", errors="replace") as f:
+                overview += f"\n\nREADME excerpt:\n\n{f.read(max_readme_chars)}"
+            break
+    return overview
+
+def complete(client, cache: ResponseCache = None, item: str = None, **params) -> str:
+    """
+    Sends a messages.create request, answering from the response cache when possible.
+
+    Args:
+        client: Anthropic client.
+        cache (ResponseCache): Optional shared response cache.
+        item (str): File, batch or part label recorded in the telemetry ledger.
+        **params: Keyword arguments for messages.create (model, max_tokens, messages, ...).
+
+    Returns:
+        str: The stripped text of the first content block.
+    """
+    model = params.get("model")
+    key = None
+    if cache is not None:
+        key = ResponseCache.make_key(params)
+        cached = cache.get(key)
+        if cached is not None:
+            record_call(item, model, cached=True)
+            return cached
+
+    start = time.perf_counter()
+    try:
+        raw, retries = get_scheduler().call(lambda: client.messages.with_raw_response.create(**params),
+                                      tokens=request_tokens(params))
+        response = raw.parse()
+    except Exception as e:
+        record_call(item, model, latency=time.perf_counter() - start, error=str(e))
+        raise
+    record_call(item, model, usage=response.usage, latency=time.perf_counter() - start,
+                retries=retries + raw.retries_taken, stop_reason=response.stop_reason)
+    text = response.content[0].text.strip()
+
+    if cache is not None:
+        cache.put(key, params.get("model"), text)
+    return text
+
+def stream_to_file(client, path: str, cache: ResponseCache = None, header: str = "",
+                   echo: bool = False, item: str = None, **params) -> str:
+    """
+    Streams a response into a Markdown file as it is generated.
+
+    Text is appended to `<path>.partial` and flushed as each chunk arrives; the
+    file is renamed onto `path` only once the stream completes, so readers never
+    see a half-written review. A retried stream starts the partial file over;
+    if the stream finally fails, the partial file is kept.
+
+    Args:
+        client: Anthropic client.
+        path (str): Final output path.
+        cache (ResponseCache): Optional shared response cache.
+        header (str): Text written before the response.
+        echo (bool): Also print the text to stdout as it arrives.
+        item (str): Label recorded in the telemetry ledger.
+        **params: Keyword arguments for messages.stream (model, max_tokens, messages, ...).
+
+    Returns:
+        str: The stripped response text.
+    """
+    partial_path = f"{path}.partial"
+    model = params.get("model")
+    key = ResponseCache.make_key(params) if cache is not None else None
+    text = cache.get(key) if cache is not None else None
+
+    with open(partial_path, "w") as f:
+        f.write(header)
+        if text is not None:
+            record_call(item, model, cached=True)
+            f.write(text)
+            if echo:
+                print(text, flush=True)
+        else:
+            chunks = []
+
+            def run_stream():
+                # A retry starts over, so drop whatever the failed attempt wrote.
+                chunks.clear()
+                f.seek(0)
+                f.truncate()
+                f.write(header)
+                with client.messages.stream(**params) as stream:
+                    for chunk in stream.text_stream:
+                        chunks.append(chunk)
+                        f.write(chunk)
+                        f.flush()
+                        if echo:
+                            print(chunk, end="", flush=True)
+                    return stream.get_final_message()
+
+            start = time.perf_counter()
+            try:
+                final, retries = get_scheduler().call(run_stream, tokens=request_tokens(params))
+            except Exception as e:
+                record_call(item, model, latency=time.perf_counter() - start, error=str(e))
+                print(f"\n⚠️ Stream interrupted; partial output kept in `{partial_path}`")
+                raise
+            record_call(item, model, usage=final.usage, latency=time.perf_counter() - start,
+                        retries=retries, stop_reason=final.stop_reason)
+            if echo:
+                print(flush=True)
+            text = "".join(chunks).strip()
+            if cache is not None:
+                cache.put(key, params.get("model"), text)
+
+    os.replace(partial_path, path)
+    return text
+
+def complete_batch(client, requests: dict, cache: ResponseCache = None, poll_interval: float = 30) -> dict:
+    """
+    Runs many requests as a single Message Batches job and waits for it to finish.
+
+    Requests already in the response cache are answered locally and never submitted.
+
+    Args:
+        client: Anthropic client.
+        requests (dict): Maps a custom_id to the messages.create params for that request.
+        cache (ResponseCache): Optional shared response cache.
+        poll_interval (float): Seconds between status checks.
+
+    Returns:
+        dict: Maps each custom_id that succeeded to its stripped response text.
+    """
+    results = {}
+    pending = {}
+    for custom_id, params in requests.items():
+        cached = cache.get(ResponseCache.make_key(params)) if cache is not None else None
+        if cached is not None:
+            record_call(custom_id, params.get("model"), cached=True)
+            results[custom_id] = cached
+        else:
+            pending[custom_id] = params
+
+    if not pending:
+        return results
+
+    start = time.perf_counter()
+    job, _ = get_scheduler().call(lambda: client.messages.batches.create(
+        requests=[{"custom_id": custom_id, "params": params} for custom_id, params in pending.items()]
+    ))
+    print(f"📨 Submitted message batch {job.id} with {len(pending)} requests")
+
+    while job.processing_status != "ended":
+        time.sleep(poll_interval)
+        job, _ = get_scheduler().call(lambda: client.messages.batches.retrieve(job.id))
+        counts = job.request_counts
+        print(f"⏳ Batch {job.id}: {counts.processing} processing, {counts.succeeded} succeeded, {counts.errored} errored")
+
+    latency = time.perf_counter() - start
+    # results() is a lazy stream; read it inside the call so a dropped connection is retried too.
+    entries, _ = get_scheduler().call(lambda: list(client.messages.batches.results(job.id)))
+    for entry in entries:
+        model = pending[entry.custom_id].get("model")
+        if entry.result.type != "succeeded":
+            record_call(entry.custom_id, model, latency=latency, batch=True, error=entry.result.type)
+            print(f"❌ Request {entry.custom_id} {entry.result.type}")
+            continue
+        message = entry.result.message
+        record_call(entry.custom_id, model, usage=message.usage, latency=latency,
+                    stop_reason=message.stop_reason, batch=True)
+        text = message.content[0].text.strip()
+        results[entry.custom_id] = text
+        if cache is not None:
+            cache.put(ResponseCache.make_key(pending[entry.custom_id]), pending[entry.custom_id].get("model"), text)
+
+    return results
@@ -0,0 +1,193 @@
+"""
+LLM Response Cache
+
+A small SQLite-backed cache shared by all Nautee tools. Responses are keyed by
+(model, max_tokens, prompt hash), so re-running a review on the same diff or the
+same batch returns the stored Markdown instead of paying for another call.
+
+Entries are evicted by age and, once the database grows past its size budget,
+in least-recently-used order.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+DEFAULT_CACHE_PATH = os.path.join(".nautee", "cache.sqlite3")
+
+class ResponseCache:
+    """
+    Persistent, thread-safe store of Claude responses.
+
+    Args:
+        path (str): Location of the SQLite database.
+        max_bytes (int): Size budget for stored responses; LRU entries beyond it are evicted.
+        max_age_days (float): Entries older than this are evicted.
+        bypass (bool): Skip lookups (fresh responses are still stored).
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = 256 * 1024 * 1024,
+                 max_age_days: float = 30, bypass: bool = False):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                created REAL,
+                last_used REAL,
+                size INTEGER,
+                response TEXT
+            )
+        """)
+        self._db.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER)")
+        self._db.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(params: dict) -> str:
+        """
+        Builds the cache key for a messages.create request.
+
+        Args:
+            params (dict): Keyword arguments for messages.create.
+
+        Returns:
+            str: Hex digest of model, max_tokens and a hash of the prompt.
+        """
+        prompt = {k: v for k, v in params.items() if k not in ("model", "max_tokens")}
+        prompt_hash = hashlib.sha256(json.dumps(prompt, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        key = f"{params.get('model')}\0{params.get('max_tokens')}\0{prompt_hash}"
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """
+        Looks up a cached response and marks it as recently used.
+
+        Args:
+            key (str): Key from make_key().
+
+        Returns:
+            str: The cached response text, or None on a miss.
+        """
+        if self.bypass:
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.max_age:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self.hits += 1
+            return row[0]
+
+    def has(self, key: str) -> bool:
+        """
+        Checks for a fresh cached response without counting a hit or miss.
+
+        Args:
+            key (str): Key from make_key().
+
+        Returns:
+            bool: True when get() would return a response.
+        """
+        if self.bypass:
+            return False
+        with self._lock:
+            row = self._db.execute("SELECT created FROM responses WHERE key = ?", (key,)).fetchone()
+        return row is not None and time.time() - row[0] <= self.max_age
+
+    def put(self, key: str, model: str, response: str):
+        """
+        Stores a response.
+
+        Args:
+            key (str): Key from make_key().
+            model (str): Model that produced the response.
+            response (str): Response text.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, now, now, len(response.encode("utf-8")), response),
+            )
+            self._db.commit()
+
+    def evict(self) -> int:
+        """
+        Drops expired entries, then least-recently-used ones until the size budget fits.
+
+        Returns:
+            int: Number of entries removed.
+        """
+        with self._lock:
+            removed = self._db.execute(
+                "DELETE FROM responses WHERE created < ?", (time.time() - self.max_age,)
+            ).rowcount
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                for key, size in self._db.execute(
+                    "SELECT key, size FROM responses ORDER BY last_used ASC"
+                ).fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    total -= size
+                    removed += 1
+            self._db.commit()
+            return removed
+
+    def summary(self) -> str:
+        """
+        Returns a one-line hit/miss report for this run.
+        """
+        lookups = self.hits + self.misses
+        rate = (self.hits / lookups * 100) if lookups else 0
+        state = " (bypassed)" if self.bypass else ""
+        return f"🗄️ Response cache{state}: {self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate)"
+
+    def close(self):
+        """
+        Adds this run's counters to the lifetime stats, evicts and closes the database.
+        """
+        self.evict()
+        with self._lock:
+            for name, value in (("hits", self.hits), ("misses", self.misses)):
+                self._db.execute("INSERT OR IGNORE INTO stats VALUES (?, 0)", (name,))
+                self._db.execute("UPDATE stats SET value = value + ? WHERE name = ?", (value, name))
+            self._db.commit()
+            self._db.close()
+
+def open_cache(bypass: bool = False) -> ResponseCache:
+    """
+    Opens the shared response cache using the NAUTEE_CACHE_* environment settings.
+
+    Args:
+        bypass (bool): Force lookups off regardless of NAUTEE_NO_CACHE.
+
+    Returns:
+        ResponseCache: The configured cache.
+    """
+    return ResponseCache(
+        path=os.getenv("NAUTEE_CACHE_PATH", DEFAULT_CACHE_PATH),
+        max_bytes=int(float(os.getenv("NAUTEE_CACHE_MAX_MB", "256")) * 1024 * 1024),
+        max_age_days=float(os.getenv("NAUTEE_CACHE_MAX_AGE_DAYS", "30")),
+        bypass=bypass or os.getenv("NAUTEE_NO_CACHE", "").lower() in ("1", "true", "yes"),
+    )
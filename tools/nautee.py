@@ -0,0 +1,127 @@
+"""
+Nautee Command Line
+
+Single entry point for the Nautee tools:
+
+    python tools/nautee.py doc [target]          # autodoc.py
+    python tools/nautee.py review [files...]     # claude_review.py
+    python tools/nautee.py folder-review [dir]   # claude_folder_review_batched.py (--single: one prompt,
+                                                 #   --tree: directory roll-up, claude_tree_review.py)
+    python tools/nautee.py changelog             # changelog.py
+    python tools/nautee.py watch [dir]           # watch.py
+    python tools/nautee.py doc-repos [repos...]  # orchestrate.py
+
+Several subcommands can run in one process, separated by `+`, sharing one
+Anthropic client and response cache:
+
+    python tools/nautee.py doc . + folder-review . + changelog
+
+Subcommand modules (and with them anthropic, yaml and dotenv) are only
+imported when they run, so --help and dry runs start instantly.
+"""
+
+import sys
+import importlib
+
+# Subcommand -> (module, one-line description).
+COMMANDS = {
+    "doc": ("autodoc", "Generate Markdown docs and mkdocs navigation for a project."),
+    "review": ("claude_review", "Review files or the current git diff."),
+    "folder-review": ("claude_folder_review_batched", "Review a folder in token-bounded batches (--single: one prompt, --tree: directory roll-up)."),
+    "changelog": ("changelog", "Summarize recent commits or releases into docs/changelog.md."),
+    "watch": ("watch", "Review or re-document files as they are saved."),
+    "doc-repos": ("orchestrate", "Document many repos concurrently under one rate budget."),
+}
+SEPARATOR = "+"
+
+def usage() -> str:
+    lines = [
+        "usage: nautee <command> [options] [+ <command> [options] ...]",
+        "",
+        "commands:",
+    ]
+    lines += [f"  {name:<15}{description}" for name, (_, description) in COMMANDS.items()]
+    lines += [
+        "",
+        "Run `nautee <command> --help` for a command's options. Commands joined",
+        "with `+` run in order in one process, sharing the client and cache.",
+    ]
+    return "\n".join(lines)
+
+def split_steps(argv: list) -> list:
+    """
+    Splits the command line into (command, args) steps at `+` separators.
+
+    Args:
+        argv (list): Arguments after the program name.
+
+    Returns:
+        list: (command, argument list) tuples.
+    """
+    steps = [[]]
+    for arg in argv:
+        if arg == SEPARATOR:
+            steps.append([])
+        else:
+            steps[-1].append(arg)
+    return [(step[0], step[1:]) for step in steps if step]
+
+def resolve(command: str, args: list) -> tuple:
+    """
+    Maps a subcommand to its tool module and arguments; `folder-review --single` uses the single-prompt review
+    and `folder-review --tree` the directory roll-up review.
+    """
+    module = COMMANDS[command][0]
+    if command == "folder-review" and "--single" in args:
+        module = "claude_folder_review"
+        args = [arg for arg in args if arg != "--single"]
+    elif command == "folder-review" and "--tree" in args:
+        module = "claude_tree_review"
+        args = [arg for arg in args if arg != "--tree"]
+    return module, args
+
+def main(argv: list = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help", "help"):
+        print(usage())
+        return 0
+
+    steps = split_steps(argv)
+    unknown = [command for command, _ in steps if command not in COMMANDS]
+    if unknown:
+        print(f"❌ Unknown command: {unknown[0]}\n\n{usage()}")
+        return 2
+    steps = [resolve(command, args) for command, args in steps]
+
+    # A single step needs nothing shared; it sets up its own client and cache.
+    client = cache = None
+    shared = len(steps) > 1 and any("--dry-run" not in args and "-h" not in args and "--help" not in args
+                                    for _, args in steps)
+    if shared:
+        from llm import load_env, make_client
+        from llm_cache import open_cache
+        load_env()
+        client = make_client()
+        cache = open_cache()
+
+    status = 0
+    try:
+        for module_name, args in steps:
+            module = importlib.import_module(module_name)
+            if len(steps) > 1:
+                print(f"\n▶️ {module_name} {' '.join(args)}".rstrip())
+            try:
+                status = module.main(args, client=client, cache=cache) or 0
+            except SystemExit as e:
+                # argparse errors and --help exit; treat them as the step's result.
+                status = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            if status:
+                print(f"❌ {module_name} failed (exit {status}); stopping.")
+                break
+    finally:
+        if cache is not None:
+            cache.close()
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+"""
+Multi-Repo Orchestrator
+
+Documents many repositories in one process. Each source (a local checkout, a
+git URL or path to clone, or a GitHub `owner/name`) is cloned or updated,
+then documented with autodoc into its own output root (`<output>/<name>/docs`
+and `<output>/<name>/mkdocs.yml`). A small worker pool runs several repos at
+once; they share one client, one response cache and the process-wide
+scheduler, so NAUTEE_RPM / NAUTEE_TPM (or --rpm / --tpm) are one global budget
+rather than a budget per repo. Each repo's output goes to its own log file,
+and a combined status report is written at the end.
+
+Usage:
+    python tools/orchestrate.py --repos repos.txt --workers 4 --output sites
+    python tools/orchestrate.py ../repo-a https://github.com/org/repo-b.git -- --full
+"""
+
+import os
+import re
+import base64
+import sys
+import json
+import time
+import argparse
+import subprocess
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from llm import make_client, load_env, current_ledger, set_scheduler
+from llm_cache import open_cache
+from ratelimit import Scheduler
+
+# Log file of the repo whose run is executing in the current context (see RepoOutput).
+_repo_log = contextvars.ContextVar("nautee_repo_log", default=None)
+
+class RepoOutput:
+    """
+    Stands in for sys.stdout and sends whatever a repo's run prints to that repo's log file.
+
+    Args:
+        stream: The real stdout, used outside repo runs.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        log = _repo_log.get()
+        return (log or self.stream).write(text)
+
+    def flush(self):
+        log = _repo_log.get()
+        (log or self.stream).flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+def read_repo_list(path: str) -> list:
+    """
+    Reads sources from a file: one per line, `#` comments and blank lines ignored.
+    """
+    with open(path, "r") as f:
+        lines = [line.split("#", 1)[0].strip() for line in f]
+    return [line for line in lines if line]
+
+def is_bare_repo(path: str) -> bool:
+    try:
+        output = subprocess.check_output(
+            ["git", "-C", path, "rev-parse", "--is-bare-repository"], stderr=subprocess.DEVNULL
+        )
+    except (subprocess.CalledProcessError, OSError):
+        return False
+    return output.decode().strip() == "true"
+
+def repo_name(source: str) -> str:
+    name = os.path.basename(source.rstrip("/"))
+    name = name[:-4] if name.endswith(".git") else name
+    return re.sub(r"[^A-Za-z0-9._-]", "_", name) or "repo"
+
+def clone_url(source: str) -> str:
+    """
+    Turns a GitHub `owner/name` shorthand into a clone URL.
+    """
+    if re.fullmatch(r"[\w.-]+/[\w.-]+", source) and not os.path.exists(source):
+        return f"https://github.com/{source}.git"
+    return source
+
+def git_auth(url: str) -> list:
+    """
+    Git options that authenticate one command against GitHub with GH_TOKEN.
+
+    The token travels in an HTTP header for that command only, so it is never
+    written into the clone's remote URL or config.
+
+    Args:
+        url (str): Remote URL the command talks to.
+
+    Returns:
+        list: `-c http.extraheader=...` options, or [] when there is no token or the remote is not GitHub over HTTPS.
+    """
+    token = os.getenv("GH_TOKEN")
+    if not token or not url.startswith("https://github.com/"):
+        return []
+    credentials = base64.b64encode(f"x-access-token:{token}".encode("utf-8")).decode("ascii")
+    return ["-c", f"http.https://github.com/.extraheader=AUTHORIZATION: basic {credentials}"]
+
+def checkout(source: str, workdir: str, name: str) -> str:
+    """
+    Returns a work tree for a source: local folders are used in place, anything else is cloned or updated.
+
+    Args:
+        source (str): Local path, git URL, bare repo path or GitHub `owner/name`.
+        workdir (str): Folder holding the clones.
+        name (str): Folder name of the clone.
+
+    Returns:
+        str: Path of the work tree.
+
+    Raises:
+        subprocess.CalledProcessError: When cloning or updating fails.
+    """
+    if os.path.isdir(source) and not is_bare_repo(source):
+        return source
+    path = os.path.join(workdir, name)
+    if os.path.isdir(os.path.join(path, ".git")):
+        url = subprocess.check_output(["git", "-C", path, "remote", "get-url", "origin"]).decode().strip()
+        clean = re.sub(r"^https://[^@/]+@github\.com/", "https://github.com/", url)
+        if clean != url:
+            # Clones made by older versions kept the token in their remote URL.
+            subprocess.run(["git", "-C", path, "remote", "set-url", "origin", clean], check=True, capture_output=True)
+        subprocess.run(["git", *git_auth(clean), "-C", path, "pull", "--ff-only", "--quiet"],
+                       check=True, capture_output=True)
+    else:
+        os.makedirs(workdir, exist_ok=True)
+        url = clone_url(source)
+        subprocess.run(["git", *git_auth(url), "clone", "--quiet", url, path], check=True, capture_output=True)
+    return path
+
+def unique_names(sources: list) -> list:
+    names, seen = [], {}
+    for source in sources:
+        name = repo_name(source)
+        seen[name] = seen.get(name, 0) + 1
+        names.append(name if seen[name] == 1 else f"{name}-{seen[name]}")
+    return names
+
+def document_repo(source: str, name: str, args, client, cache) -> dict:
+    """
+    Checks out and documents one repo; runs on a worker thread.
+
+    Returns:
+        dict: Status record for the combined report.
+    """
+    import autodoc
+    output_root = os.path.join(args.output, name)
+    os.makedirs(output_root, exist_ok=True)
+    log_path = os.path.join(output_root, "autodoc.log")
+    status = {"repo": name, "source": source, "output": output_root, "log": log_path}
+    started = time.time()
+    with open(log_path, "w") as log:
+        _repo_log.set(log)
+        try:
+            path = checkout(source, args.workdir, name)
+            status["commit"] = autodoc.git_head(path)
+            code = autodoc.main([path, "--output-root", output_root, *args.autodoc_args], client=client, cache=cache)
+            status["status"] = "ok" if code == 0 else "failed"
+        except subprocess.CalledProcessError as e:
+            message = (e.stderr or b"").decode(errors="replace").strip()
+            if os.getenv("GH_TOKEN"):
+                message = message.replace(os.getenv("GH_TOKEN"), "***")
+            print(f"❌ git failed: {message}")
+            status["status"] = "checkout failed"
+        except SystemExit as e:
+            status["status"] = "ok" if not e.code else "failed"
+        except Exception as e:
+            print(f"❌ {type(e).__name__}: {e}")
+            status["status"] = "failed"
+        finally:
+            _repo_log.set(None)
+
+    ledger = current_ledger()
+    if ledger is not None:
+        totals = ledger.totals()
+        status.update(calls=totals["calls"], errors=totals["errors"], input_tokens=totals["input_tokens"],
+                      output_tokens=totals["output_tokens"], cost_usd=round(totals["cost_usd"], 4))
+    manifest_path = os.path.join(output_root, autodoc.OUTPUT_DIR, autodoc.MANIFEST_NAME)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r") as f:
+            targets = json.load(f).get("targets", {})
+        status["modules"] = sum(len(state.get("files", {})) for state in targets.values())
+    status["seconds"] = round(time.time() - started, 1)
+    icon = "✅" if status["status"] == "ok" else "❌"
+    print(f"{icon} {name}: {status['status']} in {status['seconds']}s ({status.get('calls', 0)} calls) → {output_root}")
+    return status
+
+def status_report(results: list, elapsed: float) -> str:
+    """
+    Markdown table of every repo's outcome.
+    """
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
+    ok = sum(1 for r in results if r["status"] == "ok")
+    lines = [
+        "# 🗂️ Multi-Repo Documentation Status",
+        "",
+        f"_Last updated: {timestamp}_",
+        "",
+        f"{ok} of {len(results)} repos documented in {elapsed:.0f}s; "
+        f"{sum(r.get('calls', 0) for r in results)} calls, ~${sum(r.get('cost_usd', 0) for r in results):.4f}.",
+        "",
+        "| Repo | Status | Commit | Modules | Calls | Tokens in / out | Cost | Time | Log |",
+        "|---|---|---|---|---|---|---|---|---|",
+    ]
+    for r in results:
+        icon = "✅" if r["status"] == "ok" else "❌"
+        lines.append(
+            f"| {r['repo']} | {icon} {r['status']} | {(r.get('commit') or '')[:10]} | {r.get('modules', '')} "
+            f"| {r.get('calls', 0)} | {r.get('input_tokens', 0)} / {r.get('output_tokens', 0)} "
+            f"| ${r.get('cost_usd', 0):.4f} | {r['seconds']}s | `{r['log']}` |"
+        )
+    return "\n".join(lines) + "\n"
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Document many repos concurrently under one global rate budget.",
+        epilog="Arguments after `--` are passed to every autodoc run (e.g. -- --full --concurrency 2).")
+    parser.add_argument("sources", nargs="*", help="Local checkouts, git URLs or paths, or GitHub owner/name.")
+    parser.add_argument("--repos", help="File listing one source per line.")
+    parser.add_argument("--workers", type=int, default=4, help="Repos documented at the same time (default: 4).")
+    parser.add_argument("--output", default="sites", help="Root for each repo's docs/ and mkdocs.yml (default: sites).")
+    parser.add_argument("--workdir", default="repos", help="Where sources are cloned (default: repos).")
+    parser.add_argument("--rpm", type=float, help="Global requests per minute (default: NAUTEE_RPM).")
+    parser.add_argument("--tpm", type=float, help="Global input tokens per minute (default: NAUTEE_TPM).")
+    return parser
+
+def main(argv: list = None, client=None, cache=None) -> int:
+    """
+    Documents every listed repo and writes the combined status report.
+
+    Args:
+        argv (list): Command-line arguments (default: sys.argv[1:]).
+        client: Anthropic client to reuse; one is created and shared by all repos when omitted.
+        cache (ResponseCache): Response cache to reuse; opened (and closed) here when omitted.
+
+    Returns:
+        int: 0 when every repo was documented.
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    autodoc_args = argv[argv.index("--") + 1:] if "--" in argv else []
+    argv = argv[:argv.index("--")] if "--" in argv else argv
+    args = build_parser().parse_args(argv)
+    args.autodoc_args = autodoc_args
+    load_env()
+
+    sources = list(args.sources) + (read_repo_list(args.repos) if args.repos else [])
+    if not sources:
+        print("❌ No repos given; pass sources or --repos FILE.")
+        return 1
+    names = unique_names(sources)
+
+    if args.rpm or args.tpm:
+        base = Scheduler.from_env()
+        set_scheduler(Scheduler(
+            rpm=args.rpm or (base.requests.capacity if base.requests else None),
+            tpm=args.tpm or (base.tokens.capacity if base.tokens else None),
+            max_concurrency=base.limiter.maximum,
+            max_retries=base.max_retries,
+        ))
+    client = client or make_client()
+    own_cache = cache is None
+    cache = cache or open_cache()
+    os.makedirs(args.output, exist_ok=True)
+
+    print(f"🚀 Documenting {len(sources)} repos with {args.workers} workers → {args.output}/<repo>\n")
+    started = time.time()
+    stdout = sys.stdout
+    sys.stdout = RepoOutput(stdout)
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, document_repo, source, name, args, client, cache)
+                       for source, name in zip(sources, names)]
+            results = [future.result() for future in futures]
+    finally:
+        sys.stdout = stdout
+        if own_cache:
+            cache.close()
+
+    elapsed = time.time() - started
+    report = status_report(results, elapsed)
+    with open(os.path.join(args.output, "status.md"), "w") as f:
+        f.write(report)
+    with open(os.path.join(args.output, "status.json"), "w") as f:
+        json.dump({"elapsed_s": round(elapsed, 1), "repos": results}, f, indent=2)
+    failed = [r["repo"] for r in results if r["status"] != "ok"]
+    print(f"\n📋 Status report: {os.path.join(args.output, 'status.md')}")
+    if failed:
+        print(f"❌ Not documented: {', '.join(failed)}")
+        return 1
+    print(f"🎉 All {len(results)} repos documented in {elapsed:.0f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""
+Request Scheduler
+
+Keeps Claude calls as close to the account's rate limits as possible without
+losing work. Every call goes through a shared Scheduler that:
+
+- paces requests and input tokens with token buckets (NAUTEE_RPM, NAUTEE_TPM),
+- caps in-flight calls with an AIMD limiter: it starts at half of the maximum,
+  gains one slot per window of successful calls up to the maximum, and is
+  halved whenever the API throttles us,
+- retries 429 / 529 / 5xx and connection errors, honouring `retry-after` and
+  otherwise backing off exponentially with full jitter.
+"""
+
+import os
+import time
+import random
+import threading
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+THROTTLE_STATUS = {429, 529}
+
+class TokenBucket:
+    """
+    Blocking token bucket refilled continuously at `per_minute` units per minute.
+
+    Args:
+        per_minute (float): Sustained rate; also the burst capacity.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1):
+        """
+        Waits until `amount` units are available and takes them.
+
+        Requests larger than the capacity are let through once the bucket is full.
+        """
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.level >= amount:
+                    self.level -= amount
+                    return
+                wait = (amount - self.level) / self.rate
+            time.sleep(min(wait, 5))
+
+class AIMDLimiter:
+    """
+    Concurrency limit adjusted by additive increase / multiplicative decrease.
+
+    Args:
+        initial (int): Starting number of concurrent calls.
+        maximum (int): Upper bound for the limit.
+        minimum (int): Lower bound for the limit.
+    """
+
+    def __init__(self, initial: int, maximum: int, minimum: int = 1):
+        self.limit = float(initial)
+        self.maximum = maximum
+        self.minimum = minimum
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self):
+        with self._cond:
+            self.limit = min(self.maximum, self.limit + 1.0 / max(self.limit, 1.0))
+            self._cond.notify_all()
+
+    def on_throttle(self):
+        with self._cond:
+            self.limit = max(self.minimum, self.limit / 2)
+
+def status_of(error: Exception):
+    return getattr(error, "status_code", None)
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Whether an API error is worth retrying (throttling, overload, 5xx, connection trouble).
+    """
+    status = status_of(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+def retry_after(error: Exception):
+    """
+    Reads the server's requested delay from a failed response, in seconds.
+
+    Returns:
+        float: Delay from `retry-after-ms` / `retry-after`, or None if absent.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+class Scheduler:
+    """
+    Shared gatekeeper for Claude calls.
+
+    Args:
+        rpm (float): Requests per minute (None for no pacing).
+        tpm (float): Input tokens per minute (None for no pacing).
+        max_concurrency (int): Upper bound for concurrent calls; the limit starts at half of it.
+        max_retries (int): Retries per call before giving up.
+        base_delay (float): First backoff delay in seconds.
+        max_delay (float): Cap on a single backoff delay.
+    """
+
+    def __init__(self, rpm: float = None, tpm: float = None, max_concurrency: int = 8,
+                 max_retries: int = 6, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        # Start below the cap so additive increase has room to probe for more throughput.
+        self.limiter = AIMDLimiter(max(1, max_concurrency // 2), max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.throttled = 0
+
+    @classmethod
+    def from_env(cls):
+        """
+        Builds a scheduler from NAUTEE_RPM, NAUTEE_TPM, NAUTEE_MAX_CONCURRENCY and NAUTEE_MAX_RETRIES.
+        """
+        rpm = os.getenv("NAUTEE_RPM")
+        tpm = os.getenv("NAUTEE_TPM")
+        return cls(
+            rpm=float(rpm) if rpm else None,
+            tpm=float(tpm) if tpm else None,
+            max_concurrency=int(os.getenv("NAUTEE_MAX_CONCURRENCY", "8")),
+            max_retries=int(os.getenv("NAUTEE_MAX_RETRIES", "6")),
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Full-jitter exponential backoff for the given retry attempt (1-based).
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def call(self, fn, tokens: int = 0) -> tuple:
+        """
+        Runs fn under the rate limits, retrying retryable failures.
+
+        Args:
+            fn (callable): Makes the API call; may be invoked several times.
+            tokens (int): Estimated input tokens, charged to the tokens-per-minute bucket.
+
+        Returns:
+            tuple: (result of fn, number of retries taken).
+        """
+        attempt = 0
+        while True:
+            if self.requests:
+                self.requests.acquire(1)
+            if self.tokens and tokens:
+                self.tokens.acquire(tokens)
+            self.limiter.acquire()
+            try:
+                result = fn()
+            except Exception as e:
+                self.limiter.release()
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                if status_of(e) in THROTTLE_STATUS:
+                    self.throttled += 1
+                    self.limiter.on_throttle()
+                delay = retry_after(e)
+                delay = self.backoff(attempt) if delay is None else min(delay, self.max_delay)
+                print(f"🔁 {type(e).__name__}; retry {attempt}/{self.max_retries} in {delay:.1f}s "
+                      f"(concurrency limit {int(self.limiter.limit)})")
+                time.sleep(delay)
+                continue
+            self.limiter.release()
+            self.limiter.on_success()
+            return result, attempt
@@ -0,0 +1,231 @@
+"""
+Call Telemetry
+
+Records one JSON line per Claude call (tool, file or batch id, model, token
+usage, latency, estimated cost, retries, stop reason) in a shared ledger, and
+summarizes the run at the end. Optionally writes the run totals as a Prometheus
+textfile for node_exporter's textfile collector.
+
+Settings: NAUTEE_LEDGER (default .nautee/ledger.jsonl, set to "off" to disable)
+and NAUTEE_PROM_TEXTFILE (a .prom file, or a directory for one file per tool).
+"""
+
+import os
+import json
+import time
+import threading
+from datetime import datetime, timezone
+
+DEFAULT_LEDGER_PATH = os.path.join(".nautee", "ledger.jsonl")
+
+# USD per million input / output tokens, matched by model-name prefix (first match wins).
+PRICES = [
+    ("claude-opus-4-5", 5.0, 25.0),
+    ("claude-opus-4", 15.0, 75.0),
+    ("claude-3-opus", 15.0, 75.0),
+    ("claude-sonnet-4", 3.0, 15.0),
+    ("claude-3-7-sonnet", 3.0, 15.0),
+    ("claude-3-5-sonnet", 3.0, 15.0),
+    ("claude-haiku-4-5", 1.0, 5.0),
+    ("claude-3-5-haiku", 0.8, 4.0),
+    ("claude-3-haiku", 0.25, 1.25),
+]
+CACHE_WRITE_MULTIPLIER = 1.25
+CACHE_READ_MULTIPLIER = 0.1
+BATCH_DISCOUNT = 0.5
+
+TOKEN_FIELDS = ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens")
+
+def estimate_cost(model: str, tokens: dict, batch: bool = False):
+    """
+    Estimates the USD cost of one call from its token usage.
+
+    Args:
+        model (str): Model name.
+        tokens (dict): Token counts keyed by TOKEN_FIELDS.
+        batch (bool): Whether the call went through the Message Batches API.
+
+    Returns:
+        float: Estimated cost, or None for an unknown model.
+    """
+    for prefix, input_price, output_price in PRICES:
+        if (model or "").startswith(prefix):
+            cost = (
+                tokens.get("input_tokens", 0) * input_price
+                + tokens.get("cache_creation_input_tokens", 0) * input_price * CACHE_WRITE_MULTIPLIER
+                + tokens.get("cache_read_input_tokens", 0) * input_price * CACHE_READ_MULTIPLIER
+                + tokens.get("output_tokens", 0) * output_price
+            ) / 1_000_000
+            return cost * BATCH_DISCOUNT if batch else cost
+    return None
+
+class Ledger:
+    """
+    Per-run telemetry: appends call records to the JSONL ledger and keeps run totals.
+
+    Args:
+        tool (str): Name of the running tool (e.g. "autodoc").
+        path (str): JSONL ledger path, or None to keep totals in memory only.
+        prom_path (str): Optional Prometheus textfile written on close().
+    """
+
+    def __init__(self, tool: str, path: str = DEFAULT_LEDGER_PATH, prom_path: str = None):
+        self.tool = tool
+        self.path = path
+        self.prom_path = prom_path
+        self.started = time.time()
+        self.records = []
+        self._lock = threading.Lock()
+        if path and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def record(self, item: str, model: str, usage=None, latency: float = 0.0, retries: int = 0,
+               stop_reason: str = None, cached: bool = False, batch: bool = False, error: str = None) -> dict:
+        """
+        Adds one call to the ledger.
+
+        Args:
+            item (str): File path, batch id or other label for what the call was about.
+            model (str): Model name.
+            usage: Usage object from the response (None for cache hits and failures).
+            latency (float): Seconds spent on the call, including retries.
+            retries (int): Retries before the call succeeded or gave up.
+            stop_reason (str): Response stop_reason.
+            cached (bool): Answered from the local response cache.
+            batch (bool): Sent through the Message Batches API.
+            error (str): Error message if the call failed.
+
+        Returns:
+            dict: The stored record.
+        """
+        tokens = {field: (getattr(usage, field, None) or 0) if usage is not None else 0 for field in TOKEN_FIELDS}
+        record = {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "tool": self.tool,
+            "item": item,
+            "model": model,
+            **tokens,
+            "latency_s": round(latency, 3),
+            "cost_usd": estimate_cost(model, tokens, batch),
+            "retries": retries,
+            "stop_reason": stop_reason,
+            "cached": cached,
+            "batch": batch,
+            "error": error,
+        }
+        with self._lock:
+            self.records.append(record)
+            if self.path:
+                with open(self.path, "a") as f:
+                    f.write(json.dumps(record) + "\n")
+        return record
+
+    def totals(self) -> dict:
+        """
+        Aggregates this run's records.
+        """
+        with self._lock:
+            records = list(self.records)
+        totals = {field: sum(r[field] for r in records) for field in TOKEN_FIELDS}
+        totals.update(
+            calls=len(records),
+            cached=sum(1 for r in records if r["cached"]),
+            errors=sum(1 for r in records if r["error"]),
+            retries=sum(r["retries"] for r in records),
+            cost_usd=sum(r["cost_usd"] or 0 for r in records),
+            latency_s=sum(r["latency_s"] for r in records),
+        )
+        return totals
+
+    def summary(self, slowest: int = 3) -> str:
+        """
+        Returns a short multi-line report of this run: calls, tokens, cost, latency and hot spots.
+
+        Args:
+            slowest (int): How many of the slowest calls to list.
+        """
+        t = self.totals()
+        with self._lock:
+            live = sorted((r for r in self.records if not r["cached"]), key=lambda r: r["latency_s"])
+        lines = [
+            f"📊 {self.tool}: {t['calls']} calls ({t['cached']} cached, {t['errors']} failed, {t['retries']} retries) "
+            f"in {time.time() - self.started:.1f}s",
+            f"🔢 Tokens: {t['input_tokens']} in, {t['output_tokens']} out, "
+            f"{t['cache_read_input_tokens']} cache read, {t['cache_creation_input_tokens']} cache write "
+            f"(~${t['cost_usd']:.4f})",
+        ]
+        if live:
+            p50 = live[len(live) // 2]["latency_s"]
+            p95 = live[min(len(live) - 1, int(len(live) * 0.95))]["latency_s"]
+            hot = ", ".join(f"{r['item']} ({r['latency_s']:.1f}s)" for r in reversed(live[-slowest:]))
+            lines.append(f"⏱️ Latency p50 {p50:.2f}s, p95 {p95:.2f}s; slowest: {hot}")
+        return "\n".join(lines)
+
+    def write_prometheus(self, path: str):
+        """
+        Writes the run totals in Prometheus text format, atomically.
+
+        Args:
+            path (str): Target .prom file.
+        """
+        t = self.totals()
+        label = f'tool="{self.tool}"'
+        lines = [
+            "# HELP nautee_llm_calls Claude calls in the last run.",
+            "# TYPE nautee_llm_calls gauge",
+            f"nautee_llm_calls{{{label}}} {t['calls']}",
+            # The breakdown is its own metric, so sum(nautee_llm_calls) counts each call once.
+            "# HELP nautee_llm_call_outcomes Claude calls in the last run that were answered from the cache or failed.",
+            "# TYPE nautee_llm_call_outcomes gauge",
+            f'nautee_llm_call_outcomes{{{label},outcome="cached"}} {t["cached"]}',
+            f'nautee_llm_call_outcomes{{{label},outcome="error"}} {t["errors"]}',
+            "# HELP nautee_llm_retries Retries in the last run.",
+            "# TYPE nautee_llm_retries gauge",
+            f"nautee_llm_retries{{{label}}} {t['retries']}",
+            "# HELP nautee_llm_tokens Tokens used in the last run.",
+            "# TYPE nautee_llm_tokens gauge",
+        ]
+        lines += [f'nautee_llm_tokens{{{label},kind="{field}"}} {t[field]}' for field in TOKEN_FIELDS]
+        lines += [
+            "# HELP nautee_llm_cost_usd Estimated cost of the last run.",
+            "# TYPE nautee_llm_cost_usd gauge",
+            f"nautee_llm_cost_usd{{{label}}} {t['cost_usd']:.6f}",
+            "# HELP nautee_llm_latency_seconds Total call latency in the last run.",
+            "# TYPE nautee_llm_latency_seconds gauge",
+            f"nautee_llm_latency_seconds{{{label}}} {t['latency_s']:.3f}",
+            "# HELP nautee_run_timestamp_seconds When the last run finished.",
+            "# TYPE nautee_run_timestamp_seconds gauge",
+            f"nautee_run_timestamp_seconds{{{label}}} {time.time():.0f}",
+        ]
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+    def close(self):
+        """
+        Writes the Prometheus textfile, if configured.
+        """
+        if self.prom_path:
+            self.write_prometheus(self.prom_path)
+
+def open_ledger(tool: str) -> Ledger:
+    """
+    Creates the ledger for a tool run from the NAUTEE_LEDGER / NAUTEE_PROM_TEXTFILE settings.
+
+    Args:
+        tool (str): Name of the running tool.
+
+    Returns:
+        Ledger: The run's ledger.
+    """
+    path = os.getenv("NAUTEE_LEDGER", DEFAULT_LEDGER_PATH)
+    if path.lower() in ("", "off", "0", "none"):
+        path = None
+    prom_path = os.getenv("NAUTEE_PROM_TEXTFILE") or None
+    if prom_path and (prom_path.endswith("/") or os.path.isdir(prom_path)):
+        # A directory gets one textfile per tool so runs of different tools do not overwrite each other.
+        prom_path = os.path.join(prom_path, f"nautee_{tool}.prom")
+    return Ledger(tool, path=path, prom_path=prom_path)
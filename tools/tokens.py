@@ -0,0 +1,161 @@
+"""
+Token Counting
+
+A local token estimator calibrated against Anthropic's count-tokens endpoint.
+Exact counts and the per-model calibration ratio are cached on disk, so only the
+first run against a model pays for calibration calls.
+"""
+
+import os
+import re
+import json
+import math
+import hashlib
+import threading
+
+DEFAULT_COUNTS_PATH = os.path.join(".nautee", "token_counts.json")
+
+# Identifier runs, numbers, single symbols and whitespace runs roughly follow
+# how Claude's tokenizer splits source code.
+_PIECES = re.compile(r"[A-Za-z]+|\d+|\s+|[^\w\s]|_+")
+
+def approx_tokens(text: str) -> int:
+    """
+    Estimates tokens without any API call.
+
+    Args:
+        text (str): Text to measure.
+
+    Returns:
+        int: Uncalibrated token estimate.
+    """
+    total = 0
+    for piece in _PIECES.findall(text):
+        if piece[0].isspace():
+            # Indentation and blank lines usually merge into one or two tokens.
+            total += 1 if len(piece) <= 4 else 2
+        elif piece[0].isalpha():
+            total += math.ceil(len(piece) / 5)
+        elif piece[0].isdigit():
+            total += math.ceil(len(piece) / 3)
+        else:
+            total += 1
+    return total
+
+class TokenCounter:
+    """
+    Counts tokens for a model, preferring cached exact counts over the calibrated estimate.
+
+    Args:
+        client: Optional Anthropic client used for calibration and exact counts.
+        model (str): Model whose tokenizer is being approximated.
+        path (str): JSON file caching exact counts and calibration ratios.
+    """
+
+    def __init__(self, client=None, model: str = "", path: str = DEFAULT_COUNTS_PATH):
+        self.client = client
+        self.model = model
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = {"ratios": {}, "counts": {}}
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    self._data.update(json.load(f))
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Ignoring unreadable token cache {path}: {e}")
+
+    @property
+    def ratio(self) -> float:
+        """
+        Calibration factor applied to approx_tokens() for this model.
+        """
+        return self._data["ratios"].get(self.model, {}).get("ratio", 1.0)
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{text}".encode("utf-8")).hexdigest()
+
+    def count(self, text: str) -> int:
+        """
+        Returns the cached exact count for text, or the calibrated estimate.
+
+        Args:
+            text (str): Text to measure.
+
+        Returns:
+            int: Token count.
+        """
+        exact = self._data["counts"].get(self._key(text))
+        if exact is not None:
+            return exact
+        return math.ceil(approx_tokens(text) * self.ratio)
+
+    def exact(self, text: str) -> int:
+        """
+        Counts tokens with the count-tokens endpoint and caches the result.
+
+        Args:
+            text (str): Text to measure as a single user message.
+
+        Returns:
+            int: Exact input token count.
+        """
+        key = self._key(text)
+        cached = self._data["counts"].get(key)
+        if cached is not None:
+            return cached
+        result = self.client.messages.count_tokens(
+            model=self.model,
+            messages=[{"role": "user", "content": text}]
+        )
+        with self._lock:
+            self._data["counts"][key] = result.input_tokens
+        return result.input_tokens
+
+    def calibrate(self, samples: list, min_samples: int = 5) -> float:
+        """
+        Fits the estimator to the real tokenizer using a few sample texts.
+
+        Skipped when the model is already calibrated or no client is available.
+
+        Args:
+            samples (list): Representative texts (e.g. file entries about to be batched).
+            min_samples (int): Number of samples to measure.
+
+        Returns:
+            float: The calibration ratio in use.
+        """
+        if self.client is None or self.model in self._data["ratios"] or not samples:
+            return self.ratio
+
+        # Spread the samples over the size range instead of taking the first few.
+        ordered = sorted(samples, key=len)
+        step = max(1, len(ordered) // min_samples)
+        picked = ordered[::step][:min_samples]
+
+        try:
+            measured = sum(self.exact(text) for text in picked)
+        except Exception as e:
+            print(f"⚠️ Token calibration failed, using the uncalibrated estimate: {e}")
+            return self.ratio
+
+        estimated = sum(approx_tokens(text) for text in picked)
+        ratio = measured / estimated if estimated else 1.0
+        with self._lock:
+            self._data["ratios"][self.model] = {"ratio": ratio, "samples": len(picked)}
+        print(f"📏 Calibrated token estimate for {self.model}: ×{ratio:.2f} over {len(picked)} samples")
+        self.save()
+        return ratio
+
+    def save(self):
+        """
+        Persists exact counts and calibration ratios.
+        """
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Written atomically: several tool runs in one process (see orchestrate.py) may save at once.
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with self._lock:
+            with open(tmp_path, "w") as f:
+                json.dump(self._data, f)
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,355 @@
+"""
+Watch Mode
+
+Reviews or re-documents modules as they are saved. Changes are picked up with
+inotify on Linux (through ctypes, no extra dependency) or by polling
+modification times elsewhere. Bursts of saves are debounced: a run starts
+once the tree has been quiet for --debounce seconds (or --max-wait after the
+first save, so constant saving cannot starve it). All events for a file within
+that window are coalesced into one entry, and only the touched files are sent,
+through one long-lived client and response cache.
+
+Usage:
+    python tools/watch.py ../yourrepo/ --action both
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import argparse
+from llm import make_client, load_env
+from llm_cache import open_cache
+from discovery import PRUNED_DIRS, filter_files, git_ignored, describe_skipped
+
+# inotify(7) constants.
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+# Saves show up as close-after-write or as a rename onto the file (editors writing a temp file first).
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+REVIEW_EXTS = (".py", ".js", ".ts", ".tsx", ".jsx", ".html", ".css", ".json", ".go", ".java", ".yaml", ".yml")
+# Written by the tools themselves; changes there must not trigger another run.
+OUTPUT_PATHS = ("docs", "output", "mkdocs.yml", ".nautee")
+
+def walk_dirs(root: str):
+    """
+    Yields root and its subdirectories, skipping PRUNED_DIRS and tool output.
+    """
+    outputs = {os.path.abspath(path) for path in OUTPUT_PATHS}
+    for current, dirs, _ in os.walk(root):
+        dirs[:] = [d for d in dirs if d not in PRUNED_DIRS and os.path.abspath(os.path.join(current, d)) not in outputs]
+        yield current
+
+class InotifyWatcher:
+    """
+    Recursive inotify watch on a folder; new subdirectories are watched as they appear.
+
+    Args:
+        root (str): Folder to watch.
+
+    Raises:
+        OSError: When inotify is unavailable (not Linux, or out of watches).
+    """
+
+    def __init__(self, root: str):
+        import ctypes
+        import ctypes.util
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._errno = ctypes.get_errno
+        self.fd = self.libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            code = self._errno()
+            raise OSError(code, os.strerror(code))
+        self.dirs = {}
+        try:
+            for path in walk_dirs(root):
+                self.add_watch(path)
+        except OSError:
+            self.close()
+            raise
+
+    def add_watch(self, path: str):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            code = self._errno()
+            if code == errno.ENOSPC:
+                raise OSError(code, "inotify watch limit reached (raise fs.inotify.max_user_watches)")
+            # The directory vanished before we got to it.
+            return
+        self.dirs[wd] = path
+
+    def watch_new_dir(self, path: str) -> set:
+        """
+        Watches a directory that appeared after startup and returns the files already inside it.
+        """
+        found = set()
+        for current in walk_dirs(path):
+            self.add_watch(current)
+            try:
+                found.update(entry.path for entry in os.scandir(current) if entry.is_file(follow_symlinks=False))
+            except OSError:
+                pass
+        return found
+
+    def poll(self, timeout: float) -> set:
+        """
+        Waits up to timeout seconds for events.
+
+        Returns:
+            set: Paths of the files that were written, created, moved or deleted.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        data = os.read(self.fd, 64 * 1024)
+        changed = set()
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0")
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                print("⚠️ inotify queue overflowed; some saves may have been missed.")
+                continue
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            if wd not in self.dirs:
+                continue
+            path = os.path.join(self.dirs[wd], os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and os.path.basename(path) not in PRUNED_DIRS and not is_output(path):
+                    changed.update(self.watch_new_dir(path))
+                continue
+            changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """
+    Portable fallback: rescans the folder every `interval` seconds and compares modification times.
+
+    Args:
+        root (str): Folder to watch.
+        interval (float): Seconds between scans.
+    """
+
+    def __init__(self, root: str, interval: float = 1.0):
+        self.root = root
+        self.interval = interval
+        self.state = self.snapshot()
+
+    def snapshot(self) -> dict:
+        state = {}
+        for current in walk_dirs(self.root):
+            try:
+                for entry in os.scandir(current):
+                    if entry.is_file(follow_symlinks=False):
+                        stat = entry.stat(follow_symlinks=False)
+                        state[entry.path] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                continue
+        return state
+
+    def poll(self, timeout: float) -> set:
+        time.sleep(self.interval if timeout is None else min(self.interval, timeout))
+        current = self.snapshot()
+        changed = {path for path, stamp in current.items() if self.state.get(path) != stamp}
+        changed.update(path for path in self.state if path not in current)
+        self.state = current
+        return changed
+
+    def close(self):
+        pass
+
+def open_watcher(root: str, polling: bool = False, interval: float = 1.0):
+    """
+    Creates an inotify watcher where possible, otherwise a polling one.
+
+    Args:
+        root (str): Folder to watch.
+        polling (bool): Skip inotify even when it is available.
+        interval (float): Scan interval for the polling watcher.
+
+    Returns:
+        InotifyWatcher or PollingWatcher.
+    """
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            watcher = InotifyWatcher(root)
+            print(f"👀 Watching {len(watcher.dirs)} directories under {root} with inotify")
+            return watcher
+        except (OSError, AttributeError) as e:
+            print(f"⚠️ inotify unavailable ({e}); falling back to polling.")
+    print(f"👀 Polling {root} every {interval:g}s")
+    return PollingWatcher(root, interval)
+
+class Debouncer:
+    """
+    Coalesces file events until the tree has been quiet for a while.
+
+    Args:
+        quiet (float): Seconds without events before a run starts.
+        max_wait (float): Upper bound on how long the first pending event can wait.
+    """
+
+    def __init__(self, quiet: float, max_wait: float):
+        self.quiet = quiet
+        self.max_wait = max_wait
+        self.pending = {}
+        self.first = None
+        self.last = None
+
+    def add(self, paths: set, now: float):
+        if not paths:
+            return
+        for path in paths:
+            self.pending[path] = self.pending.get(path, 0) + 1
+        self.first = self.first or now
+        self.last = now
+
+    def timeout(self, now: float):
+        """
+        Seconds until the pending batch is due, or None when nothing is pending.
+        """
+        if not self.pending:
+            return None
+        return max(0.0, min(self.last + self.quiet, self.first + self.max_wait) - now)
+
+    def ready(self, now: float) -> bool:
+        return bool(self.pending) and self.timeout(now) == 0
+
+    def drain(self) -> dict:
+        """
+        Takes the pending batch: path -> number of events coalesced into it.
+        """
+        pending, self.pending = self.pending, {}
+        self.first = self.last = None
+        return pending
+
+def is_output(path: str) -> bool:
+    absolute = os.path.abspath(path)
+    return any(absolute == out or absolute.startswith(out + os.sep) for out in map(os.path.abspath, OUTPUT_PATHS))
+
+def select_files(root: str, paths: list, exts: tuple) -> tuple:
+    """
+    Splits changed paths into files worth sending and deleted files, applying the usual discovery rules.
+
+    Args:
+        root (str): Watched folder.
+        paths (list): Changed paths.
+        exts (tuple): Accepted file extensions.
+
+    Returns:
+        tuple: (existing full paths, deleted full paths), each sorted.
+    """
+    rel_paths = [os.path.relpath(path, root).replace(os.sep, "/") for path in paths
+                 if path.endswith(exts) and not is_output(path)]
+    ignored = git_ignored(root, rel_paths)
+    rel_paths = [p for p in rel_paths if p not in ignored]
+    present = [p for p in rel_paths if os.path.exists(os.path.join(root, p))]
+    deleted = sorted(os.path.join(root, p) for p in rel_paths if p not in present)
+    stats = {}
+    existing = sorted(filter_files(root, present, exts, stats=stats))
+    if stats:
+        print(describe_skipped(stats))
+    return existing, deleted
+
+def run_actions(args, client, cache, changed: dict) -> int:
+    """
+    Reviews and/or re-documents the files of one debounced batch.
+
+    Returns:
+        int: 0 when every action succeeded.
+    """
+    status = 0
+    if args.action in ("review", "both"):
+        files, _ = select_files(args.folder, list(changed), REVIEW_EXTS)
+        if files:
+            import claude_review
+            print(f"🧠 Reviewing {len(files)} changed files")
+            status |= claude_review.main(files, client=client, cache=cache)
+    if args.action in ("doc", "both"):
+        files, deleted = select_files(args.folder, list(changed), (".py",))
+        if files or deleted:
+            import autodoc
+            print(f"📝 Re-documenting {len(files)} changed modules" + (f", {len(deleted)} deleted" if deleted else ""))
+            status |= autodoc.main([args.folder, "--files", *files, *deleted], client=client, cache=cache)
+    return status
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Review or re-document files with Claude as they are saved.")
+    parser.add_argument("folder", nargs="?", default=".", help="Folder to watch.")
+    parser.add_argument("--action", choices=("review", "doc", "both"), default="review",
+                        help="What to do with saved files (default: review).")
+    parser.add_argument("--debounce", type=float, default=float(os.getenv("NAUTEE_WATCH_DEBOUNCE", "1.5")),
+                        help="Quiet seconds after the last save before a run starts (default: 1.5).")
+    parser.add_argument("--max-wait", type=float, default=10.0,
+                        help="Longest a save waits while others keep arriving (default: 10).")
+    parser.add_argument("--polling", action="store_true", help="Poll modification times instead of using inotify.")
+    parser.add_argument("--interval", type=float, default=1.0, help="Polling interval in seconds (default: 1).")
+    return parser
+
+def main(argv: list = None, client=None, cache=None) -> int:
+    """
+    Watches a folder until interrupted.
+
+    Args:
+        argv (list): Command-line arguments (default: sys.argv[1:]).
+        client: Anthropic client to reuse; one is created and kept for the whole session when omitted.
+        cache (ResponseCache): Response cache to reuse; opened (and closed) here when omitted.
+
+    Returns:
+        int: Exit code.
+    """
+    args = build_parser().parse_args(argv)
+    load_env()
+    client = client or make_client()
+    own_cache = cache is None
+    cache = cache or open_cache()
+    watcher = open_watcher(args.folder, polling=args.polling, interval=args.interval)
+    debouncer = Debouncer(args.debounce, args.max_wait)
+    # Editor swap files and the like are dropped before they can start a run.
+    exts = (".py",) if args.action == "doc" else REVIEW_EXTS
+    print(f"⌛ Waiting for saves (debounce {args.debounce:g}s, action: {args.action}); Ctrl+C to stop.\n")
+
+    try:
+        while True:
+            timeout = debouncer.timeout(time.monotonic())
+            # Wake up regularly even when idle so Ctrl+C is handled promptly.
+            changes = watcher.poll(1.0 if timeout is None else timeout)
+            debouncer.add({path for path in changes if path.endswith(exts) and not is_output(path)}, time.monotonic())
+            if not debouncer.ready(time.monotonic()):
+                continue
+            last_save = debouncer.last
+            changed = debouncer.drain()
+            events = sum(changed.values())
+            print(f"\n💾 {events} events on {len(changed)} files")
+            try:
+                status = run_actions(args, client, cache, changed)
+            except SystemExit as e:
+                status = e.code
+            print(f"{'⚡' if not status else '⚠️'} Done {time.monotonic() - last_save:.1f}s after the last save\n")
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching.")
+    finally:
+        watcher.close()
+        if own_cache:
+            cache.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())